@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 import time
@@ -11,29 +11,38 @@ from models.schemas import (QueryRequest, QueryResponse, ChatRequest, ChatRespon
                             IntentCategory, ActionType, UserInfo, UsersConfig, LoginRequest, 
                             LoginResponse, SessionCheckResponse)
 from iris_db import IRISVectorDB
+from vector_snapshot import SnapshotVectorStore
 from ingestion.embedder import EmbeddingGenerator
 from rag.retriever import VectorRetriever
+from rag.context import ContextPacker
+from ingestion.tokens import count_tokens
+from rag.lexical import BM25Index
+from rag.structured import ProcessTableStore
 from rag.generator import ResponseGenerator
 from conversation.session_manager import SessionManager
+from conversation.summarizer import ConversationSummarizer
 from rag.router import RAGRouter
 from config import get_settings
 from datetime import datetime
 from fhir.client import FHIRClient
 from fhir.executor import FHIRToolExecutor
+from usage import start_request_usage
+from metrics import REGISTRY, MetricsMiddleware, timed
+from tracing import start_trace, current_trace_id, shutdown_tracing
+from logging_setup import configure_logging, shutdown_logging, log_prompt
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queue-based, redacted; see logging_setup.py)
+configure_logging(get_settings())
 logger = logging.getLogger(__name__)
 
 # Global instances
 db = None
 embedder = None
 retriever = None
+context_packer = None
 generator = None
 session_manager = None
+summarizer = None
 rag_router = None
 fhir_client = None
 fhir_tool_executor = None
@@ -42,7 +51,7 @@ fhir_tool_executor = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
-    global db, embedder, retriever, generator, session_manager, rag_router, fhir_client, fhir_tool_executor
+    global db, embedder, retriever, context_packer, generator, session_manager, summarizer, rag_router, fhir_client, fhir_tool_executor
 
     # Startup
     logger.info("Starting up FN Brno Virtual Assistant API")
@@ -50,9 +59,15 @@ async def lifespan(app: FastAPI):
     try:
         # Initialize components
         settings = get_settings()
-        logger.info("Initializing database connection...")
-        db = IRISVectorDB()
+        if settings.vector_store == "snapshot":
+            logger.info(f"Opening vector snapshot from {settings.snapshot_dir}...")
+            db = SnapshotVectorStore()
+        else:
+            logger.info("Initializing database connection...")
+            db = IRISVectorDB()
         db.connect()
+        if isinstance(db, IRISVectorDB):
+            db.ensure_schema()
 
         logger.info("Initializing embedding generator...")
         embedder = EmbeddingGenerator()
@@ -60,14 +75,27 @@ async def lifespan(app: FastAPI):
         logger.info("Initializing FHIR client...")
         fhir_client = FHIRClient(settings)
         fhir_tool_executor = FHIRToolExecutor(fhir_client)
+        if fhir_client.index:
+            logger.info("Starting FHIR patient index sync...")
+            fhir_client.index.start()
 
         logger.info("Initializing retriever and generator...")
-        retriever = VectorRetriever(db, embedder)
+        lexical_index = None
+        if settings.hybrid_search:
+            logger.info("Building BM25 lexical index...")
+            lexical_index = BM25Index.from_rows(db.iter_chunks(include_vectors=False))
+        retriever = VectorRetriever(db, embedder, lexical_index)
+        context_packer = ContextPacker()
         generator = ResponseGenerator(fhir_tool_executor)
 
         logger.info("Initializing session manager and RAG router...")
         session_manager = SessionManager()
-        rag_router = RAGRouter()
+        summarizer = ConversationSummarizer(session_manager)
+        process_tables = None
+        if settings.structured_queries:
+            logger.info("Loading process tables...")
+            process_tables = ProcessTableStore.from_directory(settings.raw_data_dir)
+        rag_router = RAGRouter(process_tables)
 
         logger.info("Startup complete!")
 
@@ -79,9 +107,15 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down...")
+    if summarizer:
+        summarizer.shutdown()
     if db:
         db.disconnect()
+    if fhir_client:
+        fhir_client.close()
+    shutdown_tracing()
     logger.info("Shutdown complete")
+    shutdown_logging()
 
 
 # Create FastAPI app
@@ -99,7 +133,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
@@ -117,10 +153,13 @@ async def health_check():
     """Health check endpoint."""
     try:
         chunk_count = db.get_chunk_count() if db else 0
+        fhir = fhir_client.health() if fhir_client else None
+        degraded = fhir is not None and fhir["circuit"]["state"] == "open"
         return {
-            "status": "healthy",
+            "status": "degraded" if degraded else "healthy",
             "database": "connected" if db else "disconnected",
-            "chunks_in_db": chunk_count
+            "chunks_in_db": chunk_count,
+            "fhir": fhir
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -130,6 +169,12 @@ async def health_check():
         }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage latencies, LLM token counters, cache and error counts."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     """
@@ -144,7 +189,7 @@ async def query(request: QueryRequest):
     start_time = time.time()
 
     try:
-        logger.info(f"Received query: {request.query}")
+        logger.info("Received query (%d chars)", len(request.query))
 
         # Retrieve relevant chunks
         retrieved_chunks = retriever.retrieve(request.query)
@@ -164,8 +209,7 @@ async def query(request: QueryRequest):
         )
 
         processing_time = time.time() - start_time
-        logger.info(f"Query processed in {processing_time:.2f}s")
-        print(result)
+        logger.info("Query processed in %.2fs", processing_time)
         return QueryResponse(
             answer=result['answer'],
             sources=result['sources'],
@@ -197,13 +241,28 @@ async def chat(request: ChatRequest):
     """
     Multi-turn conversation endpoint with agentic RAG routing.
 
+    Each request is traced; the trace id is returned in the response and
+    can be rendered with scripts/trace_waterfall.py.
+
     Args:
         request: Chat request with query and optional session ID
 
     Returns:
         ChatResponse with answer, sources, and session ID
     """
+    with start_trace("chat", user_id=request.user_id) as root:
+        response = await _chat(request)
+        root.set_attributes(
+            session_id=response.session_id,
+            used_rag=response.used_rag,
+            prompt_tokens=response.prompt_tokens
+        )
+        return response
+
+
+async def _chat(request: ChatRequest) -> ChatResponse:
     start_time = time.time()
+    usage = start_request_usage()
 
     try:
         # Load user info
@@ -211,26 +270,22 @@ async def chat(request: ChatRequest):
         user_data: UserInfo = settings.users_config.users[str(request.user_id)]
         
         # Log incoming request
-        logger.debug("\n" + "=" * 80)
-        logger.debug("INCOMING CHAT REQUEST")
-        logger.debug("=" * 80)
-        logger.debug(f"Query: {request.query}")
-        logger.debug(f"Session ID: {request.session_id if request.session_id else 'None (new session)'}")
-        logger.debug(f"User ID: {request.user_id}")
-        if user_data:
-            logger.debug(f"User Name: {user_data.name}")
-            logger.debug(f"User Role: {user_data.role}")
-        logger.debug("=" * 80 + "\n")
+        logger.debug(
+            "Chat request: session=%s user=%s role=%s",
+            request.session_id or "new", request.user_id, user_data.role if user_data else None
+        )
 
         # Get or create session
         if request.session_id and session_manager.session_exists(request.session_id):
             session_id = request.session_id
-            history = session_manager.get_session(session_id)
-            logger.info(f"Using existing session: {session_id} with {len(history)} messages")
+            # Snapshot of the session before this turn. The user message saved below is sent as the
+            # current query, so it must not also appear in the history given to the router and generator
+            history = list(session_manager.get_session(session_id))
+            logger.info("Using existing session: %s with %d messages", session_id, len(history))
         else:
             session_id = session_manager.create_session()
             history = []
-            logger.info(f"Created new session: {session_id}")
+            logger.info("Created new session: %s", session_id)
 
         # Add user message to history
         user_message = Message(
@@ -240,8 +295,17 @@ async def chat(request: ChatRequest):
         )
         session_manager.add_message(session_id, user_message)
 
+        allowed_files = settings.users_config.get_allowed_files_for_user(user_data)
+
         # Classify user intent
-        category = rag_router.classify_intent(request.query, history)
+        with timed("router"):
+            category = rag_router.classify_intent(request.query, history)
+
+        # Process table lookups are answered from the structured store without vector retrieval
+        structured_result = None
+        if category == IntentCategory.GENERAL_RAG:
+            with timed("structured"):
+                structured_result = rag_router.answer_structured(request.query, allowed_files)
 
         # Determine if RAG needed based on category
         # FHIR patient lookup doesn't need traditional RAG but uses tool calling instead
@@ -261,12 +325,19 @@ async def chat(request: ChatRequest):
         # Retrieve context if needed
         sources = []
         context = None
-        if needs_rag:
-            allowed_files = settings.users_config.get_allowed_files_for_user(user_data)
-            retrieved_chunks = retriever.retrieve(request.query, allowed_files=allowed_files)
+        if structured_result:
+            context = structured_result['context']
+            sources = structured_result['sources']
+            usage.context_tokens = count_tokens(context)
+        elif needs_rag:
+            with timed("retrieval"):
+                retrieved_chunks = retriever.retrieve(request.query, allowed_files=allowed_files)
             if retrieved_chunks:
-                # Format context
-                context = retriever.format_context_for_llm(retrieved_chunks)
+                # Pack context within the category's token budget
+                with timed("context_packing"):
+                    context, packing_stats = context_packer.pack(retrieved_chunks, category)
+                usage.context_tokens = packing_stats['context_tokens']
+                retrieved_chunks = packing_stats['packed_chunks']
                 # Format sources
                 sources = [
                     {
@@ -275,7 +346,8 @@ async def chat(request: ChatRequest):
                         'relevance_score': chunk['relevance_score'],
                         'metadata': {
                             'department': chunk.get('department'),
-                            'process_owner': chunk.get('process_owner')
+                            'process_owner': chunk.get('process_owner'),
+                            'retrieval': chunk.get('retrieval')
                         }
                     }
                     for chunk in retrieved_chunks
@@ -283,14 +355,19 @@ async def chat(request: ChatRequest):
             else:
                 logger.warning("No relevant chunks found despite RAG routing")
 
+        # Older turns are replaced by the rolling summary once the session is compacted
+        history_summary, recent_history = summarizer.history_for_prompt(session_id, history)
+
         # Generate response with history, optional context, and category
-        answer = generator.generate_response(
-            query=request.query,
-            context=context,
-            history=history,
-            category=category,
-            user_system_prompt=settings.users_config.get_user_system_prompt(request.user_id)
-        )
+        with timed("generation"):
+            answer = generator.generate_response(
+                query=request.query,
+                context=context,
+                history=recent_history,
+                category=category,
+                user_system_prompt=settings.users_config.get_user_system_prompt(request.user_id),
+                history_summary=history_summary
+            )
 
         # Create assistant message
         assistant_message = Message(
@@ -301,20 +378,16 @@ async def chat(request: ChatRequest):
         )
         session_manager.add_message(session_id, assistant_message)
 
-        processing_time = time.time() - start_time
+        # Compact long sessions off the request path
+        summarizer.schedule(session_id)
 
+        processing_time = time.time() - start_time
         # Log final response
-        logger.debug("\n" + "=" * 80)
-        logger.debug("CHAT RESPONSE")
-        logger.debug("=" * 80)
-        logger.debug(f"Session ID: {session_id}")
-        logger.debug(f"Intent Category: {category.value}")
-        logger.debug(f"Used RAG: {needs_rag}")
-        logger.debug(f"Action Type: {action_type.value if action_type else 'None'}")
-        logger.debug(f"Number of sources: {len(sources)}")
-        logger.debug(f"Processing time: {processing_time:.2f}s")
-        logger.debug(f"Assistant Response:\n{answer}")
-        logger.debug("=" * 80 + "\n")
+        logger.info(
+            "Chat response: session=%s category=%s rag=%s sources=%d time=%.2fs usage=%s",
+            session_id, category.value, needs_rag, len(sources), processing_time, usage.summary()
+        )
+        log_prompt(logger, category.value, "Assistant Response", answer)
 
         return ChatResponse(
             session_id=session_id,
@@ -322,7 +395,9 @@ async def chat(request: ChatRequest):
             used_rag=needs_rag,
             sources=sources,
             processing_time=processing_time,
-            action_type=action_type
+            action_type=action_type,
+            prompt_tokens=usage.input_tokens,
+            trace_id=current_trace_id()
         )
 
     except Exception as e:
@@ -2,12 +2,13 @@ from pydantic_settings import BaseSettings
 from functools import lru_cache
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from models.schemas import UsersConfig
 
 
 class Settings(BaseSettings):
     openai_api_key: str
+    openai_base_url: Optional[str] = None  # OpenAI-compatible endpoint (vLLM, load-test stand-in); None = api.openai.com
 
     # InterSystems IRIS Configuration
     iris_host: str = "localhost"
@@ -16,25 +17,105 @@ class Settings(BaseSettings):
     iris_username: str = "_SYSTEM"
     iris_password: str = "ISCDEMO"
 
+    # Vector Store Configuration
+    vector_store: str = "iris"  # "iris" or "snapshot" (memory-mapped export shared by workers)
+    snapshot_dir: str = str(Path(__file__).parent.parent / "snapshots")
+
     # Model Configuration
     embedding_model: str = "text-embedding-3-large"
     embedding_dimension: int = 3072
     openai_model: str = "gpt-5"
+    prompt_cache_key_prefix: str = "fnbrno"  # Requests sharing a static prompt prefix share a cache key
 
     # RAG Configuration
     top_k_results: int = 10
     min_relevance_score: float = 0.0
+    hybrid_search: bool = True  # Run BM25 alongside vector search and fuse with RRF
+    hybrid_candidates: int = 30  # Candidates taken from each retriever before fusion
+    rrf_k: int = 60
+    two_stage_retrieval: bool = False  # Select top documents by centroid first, then search their chunks
+    prefilter_documents: int = 8
+    mmr_enabled: bool = True  # Diversify the candidate pool with maximal marginal relevance
+    mmr_lambda: float = 0.7
+    mmr_candidates: int = 30
+    merge_adjacent_chunks: bool = True  # Merge consecutive ChunkIndex hits into one span
+    structured_queries: bool = True  # Answer process lookups from the XLSX tables without retrieval
+    raw_data_dir: str = str(Path(__file__).parent.parent / "raw_data")
+
+    # Context Packing Configuration (prompt tokens for retrieved chunks)
+    context_token_budget: int = 3000
+    context_token_budgets: Dict[str, int] = {
+        "general_rag": 3000,
+        "trip_request": 2000,
+        "trip_expense": 2000,
+    }
+    context_min_chunk_tokens: int = 60  # Do not add truncated chunks shorter than this
+
+    # Ingestion Configuration
+    chunk_size: int = 700
+    chunk_overlap: int = 100
 
     # Conversation Configuration
     max_history_messages: int = 10
+    history_summarization: bool = True  # Fold older turns into a rolling summary in the background
+    history_summary_trigger_tokens: int = 1500  # Unsummarized history size that triggers compaction
+    history_recent_messages: int = 4  # Messages always kept verbatim after the summary
+    summary_model: str = "gpt-5-mini"
     router_model: str = "gpt-5"
-    router_reasoning_effort: str = "minimal"
+    router_reasoning_effort: str = "minimal"  # Empty for models without reasoning support
 
     # FHIR Configuration
     fhir_base_url: str = "http://localhost:32783"
     fhir_patient_endpoint: str = "/csp/healthshare/demo/fhir/r4/Patient"
-    fhir_timeout: int = 30
-    fhir_max_results: int = 50
+    fhir_connect_timeout: float = 3.0
+    fhir_timeout: float = 10.0  # Read timeout per attempt
+    fhir_max_results: int = 50  # Patients returned per search; larger result sets report their total instead
+    fhir_page_size: int = 50  # _count per request; further pages are fetched from Bundle next links
+    fhir_max_pages: int = 20  # Bound on next links followed by one search
+    fhir_search_elements: str = "identifier,name,gender,birthDate,telecom"  # _elements sent with searches; empty for full resources
+    fhir_stream_parsing: bool = True  # Parse Bundles incrementally when ijson is installed
+    fhir_search_total: str = "accurate"  # _total mode for the first page; empty for servers that reject it
+    fhir_pool_size: int = 10  # Keep-alive connections; further concurrent requests wait for one
+    fhir_tool_max_steps: int = 3  # Tool-calling rounds per question before the model must answer
+    fhir_rule_extraction: bool = True  # Search simple Czech lookups directly, without the tool-selection LLM call
+    fhir_result_format: str = "compact"  # Patient results for the model: "compact" table rows or "verbose" blocks
+    fhir_compact_max_rows: int = 20  # Rows in compact results; larger results add a gender/birth decade summary
+    fhir_tool_concurrency: int = 4  # Searches run in parallel when the model issues several tool calls in one turn
+    fhir_retries: int = 2  # GET retries on connection errors and 502/503/504; read timeouts are not retried
+    fhir_retry_backoff: float = 0.3
+    fhir_breaker_failure_threshold: int = 5  # Consecutive failures that open the circuit
+    fhir_breaker_reset_timeout: float = 30.0  # Seconds before a trial request is let through
+    fhir_cache_enabled: bool = True  # Patient search results, in process memory only
+    fhir_cache_ttl: float = 60.0  # Seconds an entry is served without asking the server
+    fhir_cache_max_stale: float = 600.0  # Older entries are dropped instead of revalidated
+    fhir_cache_max_entries: int = 256
+    fhir_cache_max_patients: int = 20000  # Bound on formatted patients held across all entries
+    fhir_cache_last_updated_check: bool = True  # Revalidate via _lastUpdated when the server sends no ETag
+    fhir_index_enabled: bool = False  # Serve demographic Patient searches from a locally synced index
+    fhir_index_path: str = ""  # SQLite file; empty keeps the index in memory so no patient data is written to disk
+    fhir_index_sync_interval: float = 60.0  # Seconds between _lastUpdated delta syncs
+    fhir_index_full_sync_interval: float = 86400.0  # Full reload, which also drops deleted patients
+    fhir_index_max_staleness: float = 300.0  # Searches fall back to REST when the last sync is older
+    fhir_index_page_size: int = 500  # _count for sync requests
+
+    # Observability Configuration
+    log_level: str = "INFO"
+    log_format: str = "text"  # "text" or "json"
+    log_queue_size: int = 10000  # Records beyond this are dropped instead of blocking requests
+    log_max_chars: int = 2000  # Longer messages are truncated
+    log_redact_phi: bool = True
+    prompt_log_sample_rates: Dict[str, float] = {  # Share of requests whose prompts are logged
+        "default": 0.0,
+        "router": 0.01,
+        "general_rag": 0.02,
+        "conversational": 0.02,
+        "trip_request": 0.02,
+        "trip_expense": 0.02,
+        "fhir_patient_lookup": 0.0,
+    }
+    tracing_enabled: bool = True
+    trace_file: str = str(Path(__file__).parent.parent / "traces" / "traces.jsonl")
+    trace_queue_size: int = 1000  # Finished traces beyond this are dropped instead of blocking requests
 
     # User Configuration
     _users_config: Optional[UsersConfig] = None
@@ -1,6 +1,7 @@
 import uuid
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from models.schemas import Message
@@ -15,6 +16,8 @@ class SessionManager:
         """Initialize session manager with empty storage."""
         self.conversations: Dict[str, List[Message]] = {}
         self.user_sessions: Dict[str, dict] = {}  # session_id -> {user_id, name, role, created_at}
+        self.summaries: Dict[str, Tuple[str, int]] = {}  # session_id -> (summary, summarized message count)
+        self._summary_lock = threading.Lock()
         logger.info("SessionManager initialized")
 
     def create_session(self) -> str:
@@ -62,7 +65,39 @@ class SessionManager:
             raise KeyError(f"Session not found: {session_id}")
 
         self.conversations[session_id].append(message)
-        logger.debug(f"Added {message.role} message to session {session_id}")
+        logger.debug("Added %s message to session %s", message.role, session_id)
+
+    def get_summary(self, session_id: str) -> Tuple[Optional[str], int]:
+        """
+        Get the rolling summary of a session's older messages.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Tuple of (summary or None, number of leading messages it covers)
+        """
+        with self._summary_lock:
+            return self.summaries.get(session_id, (None, 0))
+
+    def set_summary(self, session_id: str, summary: str, summarized_count: int) -> None:
+        """
+        Store a rolling summary covering the first summarized_count messages.
+
+        An older summary never replaces a newer one, so concurrent
+        summarization jobs cannot move the boundary backwards.
+
+        Args:
+            session_id: Session ID
+            summary: Summary text
+            summarized_count: Number of leading messages folded into the summary
+        """
+        with self._summary_lock:
+            _, current_count = self.summaries.get(session_id, (None, 0))
+            if summarized_count <= current_count:
+                return
+            self.summaries[session_id] = (summary, summarized_count)
+        logger.debug("Session %s summary now covers %s messages", session_id, summarized_count)
 
     def session_exists(self, session_id: str) -> bool:
         """
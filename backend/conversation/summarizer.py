@@ -0,0 +1,129 @@
+"""
+Rolling summarization of long conversations.
+
+Once the unsummarized part of a session grows past a token threshold, the
+older messages are folded into a running summary stored in the
+SessionManager. The work runs on a background executor after the response
+has been returned, so it never adds latency to /chat.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from openai import OpenAI
+
+from config import get_settings
+from conversation.session_manager import SessionManager
+from ingestion.tokens import count_tokens
+from models.schemas import Message
+from rag.prompts import SUMMARY_SYSTEM_PROMPT, get_summary_user_message
+from usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+
+def format_messages(messages: List[Message]) -> str:
+    """Format messages as a Czech transcript."""
+    formatted = []
+    for msg in messages:
+        role = "Uživatel" if msg.role == "user" else "Asistent"
+        formatted.append(f"[{role}]: {msg.content}")
+    return "\n".join(formatted)
+
+
+class ConversationSummarizer:
+    """Compacts session history into a rolling summary in the background."""
+
+    def __init__(self, session_manager: SessionManager, max_workers: int = 2):
+        self.settings = get_settings()
+        self.client = OpenAI(api_key=self.settings.openai_api_key, base_url=self.settings.openai_base_url)
+        self.session_manager = session_manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def history_for_prompt(self, session_id: str, history: List[Message]) -> Tuple[Optional[str], List[Message]]:
+        """
+        Split history into the rolling summary and the messages after it.
+
+        Args:
+            session_id: Session ID
+            history: Full session history (without the current query)
+
+        Returns:
+            Tuple of (summary or None, messages not covered by the summary)
+        """
+        summary, summarized_count = self.session_manager.get_summary(session_id)
+        if summary is None:
+            return None, history
+        return summary, history[summarized_count:]
+
+    def schedule(self, session_id: str) -> None:
+        """
+        Queue a compaction of the session if its unsummarized history is too long.
+
+        Returns immediately; at most one job per session runs at a time.
+        """
+        if not self.settings.history_summarization:
+            return
+
+        messages = list(self.session_manager.get_session(session_id))
+        _, summarized_count = self.session_manager.get_summary(session_id)
+        fold_end = len(messages) - self.settings.history_recent_messages
+        if fold_end <= summarized_count:
+            return
+
+        pending_tokens = sum(count_tokens(msg.content) for msg in messages[summarized_count:])
+        if pending_tokens < self.settings.history_summary_trigger_tokens:
+            return
+
+        with self._lock:
+            if session_id in self._in_flight:
+                return
+            self._in_flight.add(session_id)
+
+        logger.info(
+            f"Scheduling summary of session {session_id}: messages {summarized_count}-{fold_end} "
+            f"({pending_tokens} unsummarized tokens)"
+        )
+        self._executor.submit(self._summarize, session_id, messages, summarized_count, fold_end)
+
+    def _summarize(self, session_id: str, messages: List[Message], start: int, end: int) -> None:
+        try:
+            previous_summary, _ = self.session_manager.get_summary(session_id)
+            user_message = get_summary_user_message(previous_summary, format_messages(messages[start:end]))
+
+            call_start = time.perf_counter()
+            response = self.client.responses.create(
+                model=self.settings.summary_model,
+                instructions=SUMMARY_SYSTEM_PROMPT,
+                input=[{"role": "user", "content": user_message}],
+                prompt_cache_key=f"{self.settings.prompt_cache_key_prefix}-summary",
+                max_output_tokens=600,
+                reasoning={"effort": "minimal"}
+            )
+            record_usage("summarizer", self.settings.summary_model, response,
+                         duration=time.perf_counter() - call_start)
+
+            summary = (response.output_text or "").strip()
+            if not summary:
+                logger.warning(f"Empty summary for session {session_id}, keeping full history")
+                return
+
+            self.session_manager.set_summary(session_id, summary, end)
+            logger.info(
+                f"Session {session_id}: folded {end - start} messages into summary "
+                f"({count_tokens(summary)} tokens)"
+            )
+
+        except Exception as e:
+            logger.error(f"Error summarizing session {session_id}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(session_id)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
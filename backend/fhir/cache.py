@@ -0,0 +1,133 @@
+"""In-memory TTL cache for FHIR Patient search results."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import record_cache, record_cache_saved
+
+CASE_INSENSITIVE_PARAMETERS = {'name', 'family', 'given'}
+
+
+def search_cache_key(params: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    """Normalised, order-independent key for processed search parameters."""
+    items = []
+    for key, value in params.items():
+        # Repeated parameters are ANDed, so their order does not matter either
+        value = '&'.join(sorted(str(v).strip() for v in value)) if isinstance(value, list) else str(value).strip()
+        if key in CASE_INSENSITIVE_PARAMETERS:
+            value = value.casefold()
+        items.append((key, value))
+    return tuple(sorted(items))
+
+
+class CachedSearch:
+    """Formatted patients of one search plus what is needed to revalidate them."""
+
+    __slots__ = ('patients', 'total', 'etag', 'validated_at', 'stored_at', 'fetch_seconds')
+
+    def __init__(self, patients: List[Dict[str, Any]], etag: Optional[str], validated_at: Optional[str],
+                 fetch_seconds: float, total: Optional[int] = None):
+        self.patients = patients
+        self.total = total  # All matches on the server, when known
+        self.etag = etag
+        self.validated_at = validated_at  # Server time of the response, for _lastUpdated checks
+        self.stored_at = time.monotonic()
+        self.fetch_seconds = fetch_seconds
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class FHIRSearchCache:
+    """
+    LRU cache of Patient search results with a freshness TTL.
+
+    Entries younger than `ttl` are served directly. Older entries, up to
+    `max_stale`, are only served after the caller revalidated them with the
+    server. Size is bounded by entry count and by the total number of cached
+    patients. Contents live in process memory only and are never logged.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_stale: float = 600.0, max_entries: int = 256,
+                 max_patients: int = 20000):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.max_patients = max_patients
+        self._entries: "OrderedDict[Tuple, CachedSearch]" = OrderedDict()
+        self._patient_count = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'saved_seconds': 0.0}
+
+    def get(self, key: Tuple) -> Tuple[Optional[CachedSearch], bool]:
+        """Return (entry, fresh); expired entries are dropped."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            age = entry.age()
+            if age > self.max_stale:
+                self._remove(key)
+                return None, False
+            self._entries.move_to_end(key)
+            return entry, age <= self.ttl
+
+    def put(self, key: Tuple, entry: CachedSearch):
+        if len(entry.patients) > self.max_patients:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._patient_count += len(entry.patients)
+            while len(self._entries) > self.max_entries or self._patient_count > self.max_patients:
+                self._remove(next(iter(self._entries)))
+
+    def refresh(self, key: Tuple, validated_at: Optional[str] = None):
+        """Mark a revalidated entry fresh again."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+                if validated_at:
+                    entry.validated_at = validated_at
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self._patient_count -= len(entry.patients)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._patient_count = 0
+
+    def record_hit(self, entry: CachedSearch, revalidated: bool = False, spent_seconds: float = 0.0):
+        """Count a hit; saved latency is the original fetch time minus any revalidation request."""
+        saved = max(0.0, entry.fetch_seconds - spent_seconds)
+        with self._lock:
+            self._stats['hits'] += 1
+            if revalidated:
+                self._stats['revalidated'] += 1
+            self._stats['saved_seconds'] += saved
+        record_cache("fhir_search", True)
+        record_cache_saved("fhir_search", saved)
+
+    def record_miss(self):
+        with self._lock:
+            self._stats['misses'] += 1
+        record_cache("fhir_search", False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'patients': self._patient_count,
+                'hits': self._stats['hits'],
+                'revalidated': self._stats['revalidated'],
+                'misses': self._stats['misses'],
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+                'saved_seconds': round(self._stats['saved_seconds'], 3)
+            }
@@ -2,12 +2,29 @@
 
 import requests
 import logging
-from typing import Dict, List, Optional, Any
+import time
+from contextlib import ExitStack, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from urllib.parse import urljoin, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
 from config import Settings
+from fhir.cache import CachedSearch, FHIRSearchCache, search_cache_key
+from fhir.circuit_breaker import CircuitBreaker, CircuitOpenError
+from fhir.formatting import GENDER_CZECH, czech_date, summarize_resource
+from fhir.patient_index import PatientIndex
+from fhir.query import InvalidSearchError, SearchParameters, build_search_parameters
+from fhir.streaming import iter_bundle, iter_bundle_dict, streaming_available
+from metrics import record_error, timed
+from tracing import span, url_attributes
 
 logger = logging.getLogger(__name__)
 
+# Parameters that shape the returned page rather than select patients
+RESULT_PARAMETERS = {'_count', '_elements', '_total', '_summary'}
+
 
 class FHIRClient:
     """Client for FHIR Patient endpoint interactions."""
@@ -16,140 +33,450 @@ class FHIRClient:
         self.settings = settings
         self.base_url = settings.fhir_base_url
         self.patient_endpoint = settings.fhir_patient_endpoint
-        self.timeout = settings.fhir_timeout
+        self.timeout = (settings.fhir_connect_timeout, settings.fhir_timeout)
         self.max_results = settings.fhir_max_results
+        self.session = self._create_session(settings)
+        self.breaker = CircuitBreaker(
+            "fhir",
+            failure_threshold=settings.fhir_breaker_failure_threshold,
+            reset_timeout=settings.fhir_breaker_reset_timeout
+        )
+        self.index = None
+        if settings.fhir_index_enabled:
+            self.index = PatientIndex(
+                self,
+                path=settings.fhir_index_path,
+                sync_interval=settings.fhir_index_sync_interval,
+                full_sync_interval=settings.fhir_index_full_sync_interval,
+                max_staleness=settings.fhir_index_max_staleness,
+                page_size=settings.fhir_index_page_size
+            )
+        self.cache = None
+        if settings.fhir_cache_enabled:
+            self.cache = FHIRSearchCache(
+                ttl=settings.fhir_cache_ttl,
+                max_stale=settings.fhir_cache_max_stale,
+                max_entries=settings.fhir_cache_max_entries,
+                max_patients=settings.fhir_cache_max_patients
+            )
+
+    @staticmethod
+    def _create_session(settings: Settings) -> requests.Session:
+        """Keep-alive session with a bounded connection pool and retries for idempotent requests."""
+        # No read retries: a server that did not answer within fhir_timeout is unlikely to
+        # on the next attempt, and each retry would add another full read timeout
+        retry = Retry(
+            total=settings.fhir_retries,
+            connect=settings.fhir_retries,
+            read=False,
+            status=settings.fhir_retries,
+            backoff_factor=settings.fhir_retry_backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.fhir_pool_size,
+            pool_block=True,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.headers['Accept'] = 'application/fhir+json, application/json'
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        if self.index:
+            self.index.close()
+        self.session.close()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage per FHIR host."""
+        stats = {}
+        adapter = self.session.get_adapter(self.base_url)
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            stats[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                'max_size': pool.pool.maxsize,
+                'idle_connections': sum(1 for conn in list(pool.pool.queue) if conn is not None),
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests
+            }
+        return stats
+
+    def health(self) -> Dict[str, Any]:
+        """Circuit breaker and connection pool state for /health."""
+        return {
+            'circuit': self.breaker.snapshot(),
+            'pool': self.pool_stats(),
+            'cache': self.cache.stats() if self.cache else None,
+            'index': self.index.stats() if self.index else None
+        }
+
+    @contextmanager
+    def _get(self, url: str, params: Optional[Dict[str, str]], headers: Optional[Dict[str, str]] = None,
+             stream: bool = False) -> Iterator[requests.Response]:
+        """
+        GET through the circuit breaker, as a context for reading the response.
+
+        Connection errors, timeouts and 5xx responses (after retries) count
+        as failures; any other response means the server is up. With
+        `stream` the body is read inside the block, so the fhir stage, the
+        http span and the breaker outcome are recorded when it exits, and
+        a body that times out or breaks off counts as a failure too.
+        """
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            logger.warning("FHIR circuit open, failing fast")
+            record_error("fhir")
+            raise FHIRUnavailableError("FHIR server is temporarily unavailable")
+
+        success = False
+        try:
+            with timed("fhir"), span("http", method="GET", **url_attributes(url, params)) as http_span:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+                success = response.status_code < 500
+                try:
+                    yield response
+                except (FHIRTimeoutError, FHIRConnectionError):
+                    success = False
+                    raise
+                finally:
+                    # Bytes read from the wire; a streamed body may be left unread after the limit
+                    size = response.raw.tell() if stream else len(response.content)
+                    http_span.set_attributes(status=response.status_code, bytes=size)
+                    response.close()
+        finally:
+            if success:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
 
-    def search_patients(self, search_params: Dict[str, str]) -> List[Dict[str, Any]]:
+    def search_patients(self, search_params: Dict[str, str], limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Search for patients using FHIR Patient endpoint.
 
         Args:
             search_params: Dictionary of FHIR search parameters
+            limit: Maximum number of patients to return (default fhir_max_results)
 
         Returns:
             List of patient data dictionaries
         """
-        try:
-            # Build the full URL
-            full_url = urljoin(self.base_url, self.patient_endpoint.lstrip('/'))
-
-            # Process and clean search parameters
-            params = self._process_search_parameters(search_params)
+        return self.search_patients_with_total(search_params, limit)[0]
 
-            # Add _count parameter to limit results
-            if '_count' not in params:
-                params['_count'] = str(self.max_results)
-
-            logger.info(f"Making FHIR Patient search request to {full_url} with params: {params}")
-
-            # Make the HTTP request
-            response = requests.get(
-                full_url,
-                params=params,
-                timeout=self.timeout,
-                headers={'Accept': 'application/json'}
-            )
-
-            # Log the full URL for debugging
-            logger.info(f"Full request URL: {response.url}")
-
-            # Check for HTTP errors
-            response.raise_for_status()
-
-            # Parse JSON response
-            data = response.json()
+    def search_patients_with_total(self, search_params: Dict[str, str],
+                                   limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Search for patients and report how many match in total.
 
-            # Extract patient entries from FHIR Bundle
-            patients = self._extract_patients_from_bundle(data)
+        Only the pages needed for `limit` patients are downloaded. The total
+        comes from the server (`_total`) and is None when it reports none and
+        the results were cut off at the limit.
 
-            logger.info(f"FHIR search returned {len(patients)} patients")
-            return patients
+        Returns:
+            Tuple of (patients, total)
+        """
+        limit = limit or self.max_results
+
+        # Demographic searches are answered by the synced local index while it is fresh
+        if self.index:
+            indexed = self.index.search(self._process_search_parameters(search_params), limit)
+            if indexed is not None:
+                patients, total = indexed
+                logger.info("FHIR search served from patient index (%s of %s patients)", len(patients), total)
+                return patients, total
+
+        full_url = self._patient_url()
+        params = self._search_query(search_params, limit)
+
+        # Serve repeated searches from the cache, revalidating entries past their TTL
+        key = search_cache_key({**params, '_limit': str(limit)})
+        cached, fresh = self.cache.get(key) if self.cache else (None, False)
+        if cached is not None:
+            if fresh:
+                self.cache.record_hit(cached)
+                logger.info("FHIR search served from cache (%s patients)", len(cached.patients))
+                return list(cached.patients), cached.total
+            if not cached.etag and self._unchanged_since(cached, full_url, params, key):
+                return list(cached.patients), cached.total
+
+        logger.debug("Making FHIR Patient search request to %s with params: %s", full_url, params)
+
+        # A cached ETag turns the first page into a conditional request
+        headers = {'If-None-Match': cached.etag} if cached is not None and cached.etag else None
+        pages = PatientPages(self, full_url, params, limit, headers)
+        start = time.perf_counter()
+        patients = list(pages)
+        elapsed = time.perf_counter() - start
+
+        if pages.not_modified and cached is not None:
+            self.cache.refresh(key, pages.server_time)
+            self.cache.record_hit(cached, revalidated=True, spent_seconds=elapsed)
+            logger.info("FHIR search revalidated with ETag (%s patients)", len(cached.patients))
+            return list(cached.patients), cached.total
+
+        total = pages.total
+        if total is None and not pages.has_more:
+            total = len(patients)
+
+        if self.cache:
+            # A page's ETag only covers that page, so multi-page results revalidate via _lastUpdated
+            etag = pages.etag if pages.pages == 1 else None
+            self.cache.record_miss()
+            self.cache.put(key, CachedSearch(patients, etag, pages.server_time, elapsed, total))
+
+        logger.info("FHIR search returned %s of %s patients in %s page(s)", len(patients), total, pages.pages)
+        return patients, total
+
+    def iter_patients(self, search_params: Dict[str, str], limit: Optional[int] = None) -> "PatientPages":
+        """
+        Iterate lazily over all matching patients, bypassing the cache.
 
-        except requests.exceptions.Timeout:
-            logger.error("FHIR request timed out")
-            raise FHIRTimeoutError("FHIR server request timed out")
+        Pages are requested only as iteration reaches them. Without a limit
+        the iteration runs until the last page or fhir_max_pages.
+        """
+        return PatientPages(self, self._patient_url(), self._search_query(search_params, limit), limit)
+
+    def count_patients(self, search_params: Dict[str, str]) -> Optional[int]:
+        """Number of matching patients via _summary=count, without downloading any of them."""
+        params = self._process_search_parameters(search_params)
+        if self.index:
+            indexed = self.index.search(params, 0)
+            if indexed is not None:
+                return indexed[1]
+        params['_summary'] = 'count'
+        with self._request(self._patient_url(), params) as response:
+            total = self._parse_bundle(response).get('total')
+        logger.info("FHIR count returned %s patients", total)
+        return total
+
+    def search_resources(self, resource_type: str, search_params: Dict[str, str], limit: Optional[int] = None,
+                         include: Optional[List[str]] = None, revinclude: Optional[List[str]] = None
+                         ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[int]]:
+        """
+        Search any resource type, fetching related resources in the same request.
 
-        except requests.exceptions.ConnectionError:
-            logger.error("Failed to connect to FHIR server")
-            raise FHIRConnectionError("Cannot connect to FHIR server")
+        Args:
+            resource_type: FHIR resource type, e.g. 'Observation'
+            search_params: Dictionary of FHIR search parameters
+            limit: Maximum number of matches (default fhir_max_results)
+            include: _include values, e.g. ['Observation:patient']
+            revinclude: _revinclude values, e.g. ['Condition:patient'] for Patient searches
 
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"FHIR HTTP error: {e}")
-            if e.response.status_code == 400:
-                raise FHIRBadRequestError("Invalid search parameters")
-            elif e.response.status_code == 404:
-                raise FHIRNotFoundError("FHIR endpoint not found")
-            else:
-                raise FHIRServerError(f"FHIR server error: {e}")
+        Returns:
+            Tuple of (matching resources, included resources, total)
+        """
+        limit = limit or self.max_results
+        params = self._search_query(search_params, limit, elements=False)
+        if include:
+            params['_include'] = list(include)
+        if revinclude:
+            params['_revinclude'] = list(revinclude)
+
+        logger.debug("Making FHIR %s search request with params: %s", resource_type, params)
+        pages = SearchPages(self, self._resource_url(resource_type), params, limit)
+        matches, included = [], []
+        for mode, resource in pages:
+            (matches if mode == 'match' else included).append(resource)
+
+        total = pages.total
+        if total is None and not pages.has_more:
+            total = len(matches)
+        logger.info("FHIR %s search returned %s of %s matches and %s included resources in %s page(s)",
+                    resource_type, len(matches), total, len(included), pages.pages)
+        return matches, included, total
+
+    def search_patients_with_related(self, search_params: Dict[str, str], resource_types: List[str],
+                                     limit: Optional[int] = None
+                                     ) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]], Optional[int]]:
+        """
+        Search patients together with their Observations/Conditions/Encounters via _revinclude.
 
-        except Exception as e:
-            logger.error(f"Unexpected FHIR error: {e}")
-            raise FHIRError(f"Unexpected error: {e}")
+        Returns:
+            Tuple of (patients, related resources by patient id, total)
+        """
+        matches, included, total = self.search_resources(
+            'Patient', search_params, limit, revinclude=[f"{resource_type}:patient" for resource_type in resource_types]
+        )
+        related: Dict[str, List[Dict[str, Any]]] = {}
+        for resource in included:
+            patient_id = resource.get('subject', {}).get('reference', '').split('/')[-1]
+            related.setdefault(patient_id, []).append(resource)
+        patients = [self._format_patient_data(resource) for resource in matches]
+        return patients, related, total
+
+    def search_pages(self, resource_type: str, params: Dict[str, Any], max_pages: Optional[int] = -1) -> "SearchPages":
+        """Lazy (mode, resource) iteration over a search with the given parameters, used as is."""
+        return SearchPages(self, self._resource_url(resource_type), params, max_pages=max_pages)
+
+    def _patient_url(self) -> str:
+        return urljoin(self.base_url, self.patient_endpoint.lstrip('/'))
+
+    def _resource_url(self, resource_type: str) -> str:
+        """Endpoint of another resource type on the same FHIR base as the Patient endpoint."""
+        fhir_base = self.patient_endpoint.strip('/').rsplit('/', 1)[0]
+        return urljoin(self.base_url, f"{fhir_base}/{resource_type}")
+
+    def _search_query(self, search_params: Dict[str, str], limit: Optional[int],
+                      elements: bool = True) -> Dict[str, Any]:
+        """Processed search parameters plus page size, _elements (Patient only) and _total."""
+        params = self._process_search_parameters(search_params)
+        page_size = min(limit, self.settings.fhir_page_size) if limit else self.settings.fhir_page_size
+        params.setdefault('_count', str(page_size))
+        if elements and self.settings.fhir_search_elements:
+            params.setdefault('_elements', self.settings.fhir_search_elements)
+        if self.settings.fhir_search_total:
+            params.setdefault('_total', self.settings.fhir_search_total)
+        return params
+
+    @contextmanager
+    def _request(self, url: str, params: Optional[Dict[str, str]], headers: Optional[Dict[str, str]] = None,
+                 stream: bool = False) -> Iterator[requests.Response]:
+        """
+        GET that maps transport and HTTP failures to FHIR errors; 304 is yielded as is.
 
-    def _process_search_parameters(self, search_params: Dict[str, str]) -> Dict[str, str]:
-        """Process and format FHIR search parameters."""
-        processed_params = {}
+        Only sending the request is mapped here; errors while reading a
+        streamed body are raised by _bundle_events.
+        """
+        with ExitStack() as stack:
+            try:
+                response = stack.enter_context(self._get(url, params, headers, stream))
+                logger.debug("Full request URL: %s", response.url)
+                response.raise_for_status()
+
+            except FHIRError:
+                raise
+
+            except requests.exceptions.Timeout:
+                logger.error("FHIR request timed out")
+                record_error("fhir")
+                raise FHIRTimeoutError("FHIR server request timed out")
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.RetryError):
+                logger.error("Failed to connect to FHIR server")
+                record_error("fhir")
+                raise FHIRConnectionError("Cannot connect to FHIR server")
+
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"FHIR HTTP error: {e}")
+                record_error("fhir")
+                if e.response.status_code == 400:
+                    raise FHIRBadRequestError("Invalid search parameters")
+                elif e.response.status_code == 404:
+                    raise FHIRNotFoundError("FHIR endpoint not found")
+                else:
+                    raise FHIRServerError(f"FHIR server error: {e}")
 
-        for key, value in search_params.items():
-            if not value or value.strip() == "":
-                continue  # Skip empty parameters
+            except Exception as e:
+                logger.error(f"Unexpected FHIR error: {e}")
+                record_error("fhir")
+                raise FHIRError(f"Unexpected error: {e}")
 
-            if key == 'birthdate':
-                # Handle date range formatting for FHIR R4
-                processed_value = self._format_birthdate_parameter(value)
-                if processed_value:
-                    processed_params[key] = processed_value
-            else:
-                processed_params[key] = value.strip()
+            # The caller reads the body inside _get's timing and breaker bookkeeping
+            yield response
 
-        return processed_params
+    @staticmethod
+    def _parse_bundle(response: requests.Response) -> Dict[str, Any]:
+        try:
+            return response.json()
+        except ValueError:
+            record_error("fhir")
+            raise FHIRServerError("FHIR server returned invalid JSON")
 
-    def _format_birthdate_parameter(self, birthdate_value: str) -> Optional[str]:
+    def _bundle_events(self, response: requests.Response) -> Iterator[Tuple[str, Any]]:
         """
-        Format birthdate parameter for FHIR R4 compatibility.
-
-        Handles ranges like:
-        - 'ge2022-01-01&le2025-12-31' (for years 2022-2025)
-        - 'le2000-01-01' (before 2000)
-        - 'ge1990-01-01' (after 1990)
-        - '1980' (specific year)
-        - '1980-05-15' (specific date)
+        Events of a streamed Bundle response (see fhir.streaming).
+
+        With ijson installed and fhir_stream_parsing on, entries are parsed
+        as the body arrives; otherwise the body is parsed whole.
         """
-        if not birthdate_value:
+        if not (self.settings.fhir_stream_parsing and streaming_available()):
+            try:
+                bundle = self._parse_bundle(response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                logger.error("FHIR response body interrupted: %s", e)
+                record_error("fhir")
+                raise FHIRConnectionError("Connection to FHIR server was interrupted")
+            yield from iter_bundle_dict(bundle)
+            return
+
+        response.raw.decode_content = True
+        try:
+            yield from iter_bundle(response.raw)
+        except ValueError as e:
+            logger.error("FHIR Bundle parsing failed: %s", e)
+            record_error("fhir")
+            raise FHIRServerError("FHIR server returned invalid JSON")
+        except ReadTimeoutError:
+            logger.error("FHIR response body timed out")
+            record_error("fhir")
+            raise FHIRTimeoutError("FHIR server request timed out")
+        except (ProtocolError, OSError) as e:
+            logger.error("FHIR response body interrupted: %s", e)
+            record_error("fhir")
+            raise FHIRConnectionError("Connection to FHIR server was interrupted")
+
+    @staticmethod
+    def _server_time(response: requests.Response) -> Optional[str]:
+        """Server time of a response as a FHIR instant, from the Date header."""
+        date_header = response.headers.get('Date')
+        if not date_header:
+            return None
+        try:
+            return parsedate_to_datetime(date_header).strftime('%Y-%m-%dT%H:%M:%SZ')
+        except (TypeError, ValueError):
             return None
 
-        # Clean the value
-        value = birthdate_value.strip()
-
-        # Handle range formats like 'ge2022-01-01&le2025-12-31'
-        if '&' in value:
-            # Split range and return as-is (already formatted)
-            return value
-
-        # Handle prefixed ranges like 'ge2022-01-01' or 'le2000-01-01'
-        if value.startswith(('ge', 'le', 'gt', 'lt', 'eq', 'ne')):
-            return value
-
-        # Handle year-only format like '1980' or '2022'
-        if len(value) == 4 and value.isdigit():
-            year = int(value)
-            # For a specific year, search from Jan 1 to Dec 31
-            return f"ge{year}-01-01&le{year}-12-31"
+    def _unchanged_since(self, cached: CachedSearch, url: str, params: Dict[str, str], key) -> bool:
+        """
+        Revalidate a stale entry without ETag by counting matches updated since it was fetched.
 
-        # Handle full date format like '1980-05-15'
-        if len(value) == 10 and value.count('-') == 2:
-            # For specific date, search for exact date
-            return f"eq{value}"
+        A zero count means no matching patient changed. Deletions and patients
+        that stop matching are not detected, which max_stale bounds.
+        """
+        if not self.settings.fhir_cache_last_updated_check or not cached.validated_at:
+            return False
 
-        # Return original value if no special formatting needed
-        return value
+        probe = {k: v for k, v in params.items() if k not in RESULT_PARAMETERS}
+        probe['_lastUpdated'] = f"ge{cached.validated_at}"
+        probe['_summary'] = 'count'
+        start = time.perf_counter()
+        try:
+            with self._get(url, probe) as response:
+                changed = response.json().get('total') if response.status_code == 200 else None
+        except (FHIRError, requests.exceptions.RequestException, ValueError) as e:
+            logger.debug("FHIR _lastUpdated revalidation failed: %s", e)
+            return False
+        elapsed = time.perf_counter() - start
+        if changed != 0:
+            return False
+
+        self.cache.refresh(key, self._server_time(response))
+        self.cache.record_hit(cached, revalidated=True, spent_seconds=elapsed)
+        logger.info("FHIR search revalidated with _lastUpdated (%s patients)", len(cached.patients))
+        return True
+
+    def _process_search_parameters(self, search_params: Dict[str, Any]) -> SearchParameters:
+        """Validated FHIR search parameters; raises FHIRBadRequestError before any request when invalid."""
+        try:
+            return build_search_parameters(search_params)
+        except InvalidSearchError as e:
+            logger.warning("Rejected FHIR search parameters: %s", e)
+            raise FHIRBadRequestError(f"Invalid search parameters: {e}") from e
 
     def _extract_patients_from_bundle(self, bundle: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract patient data from FHIR Bundle response."""
         patients = []
 
         if bundle.get('resourceType') != 'Bundle':
-            logger.warning(f"Expected Bundle, got {bundle.get('resourceType')}")
+            logger.warning("Expected Bundle, got %s", bundle.get('resourceType'))
             return patients
 
         entries = bundle.get('entry', [])
@@ -219,40 +546,39 @@ class FHIRClient:
                     ids.append(value)
         return ids
 
-    def format_patients_for_czech_response(self, patients: List[Dict[str, Any]]) -> str:
-        """Format patient list as natural Czech language text."""
+    def format_patients_for_czech_response(self, patients: List[Dict[str, Any]], total: Optional[int] = None,
+                                           related: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> str:
+        """
+        Format patient list as natural Czech language text.
+
+        `total` marks a truncated result; `related` adds the Observations,
+        Conditions and Encounters fetched with the patients, by patient id.
+        """
         if not patients:
             return "Nebyli nalezeni žádní pacienti odpovídající zadaným kritériím."
 
-        result_lines = [f"Nalezeno {len(patients)} pacientů:"]
+        truncated = total is not None and total > len(patients)
+        if truncated:
+            result_lines = [f"Nalezeno {total} pacientů, zobrazeno prvních {len(patients)}:"]
+        else:
+            result_lines = [f"Nalezeno {len(patients)} pacientů:"]
         result_lines.append("")
 
         for i, patient in enumerate(patients, 1):
             name = patient.get('name', 'Neznámé jméno')
             result_lines.append(f"{i}. {name}")
+            if patient.get('id'):
+                result_lines.append(f"   • ID záznamu: {patient['id']}")
 
-            # Add birth date if available
+            # Add birth date if available, in Czech format
             birthdate = patient.get('birthdate', '')
             if birthdate:
-                try:
-                    # Format date from YYYY-MM-DD to Czech format
-                    from datetime import datetime
-                    dt = datetime.strptime(birthdate, '%Y-%m-%d')
-                    formatted_date = dt.strftime('%d.%m.%Y')
-                    result_lines.append(f"   • Datum narození: {formatted_date}")
-                except:
-                    result_lines.append(f"   • Datum narození: {birthdate}")
+                result_lines.append(f"   • Datum narození: {czech_date(birthdate)}")
 
             # Add gender if available
             gender = patient.get('gender', '')
             if gender:
-                gender_czech = {
-                    'male': 'muž',
-                    'female': 'žena',
-                    'other': 'jiné',
-                    'unknown': 'neznámé'
-                }.get(gender.lower(), gender)
-                result_lines.append(f"   • Pohlaví: {gender_czech}")
+                result_lines.append(f"   • Pohlaví: {GENDER_CZECH.get(gender.lower(), gender)}")
 
             # Add identifiers if available
             identifiers = patient.get('identifier', [])
@@ -264,13 +590,105 @@ class FHIRClient:
             for contact in telecom:
                 result_lines.append(f"   • Kontakt: {contact}")
 
+            # Add related clinical records if requested
+            for resource in (related or {}).get(patient.get('id'), []):
+                result_lines.append(f"   • {summarize_resource(resource)}")
+
             result_lines.append("")  # Empty line between patients
 
-        result_lines.append(f"Celkem nalezeno: {len(patients)} pacientů")
+        if truncated:
+            result_lines.append(f"Celkem nalezeno: {total} pacientů (zobrazeno {len(patients)})")
+        else:
+            result_lines.append(f"Celkem nalezeno: {len(patients)} pacientů")
 
         return '\n'.join(result_lines)
 
 
+class SearchPages:
+    """
+    Lazy iteration over the entries of a search, page by page.
+
+    Yields (mode, resource) pairs, mode being 'match' or 'include'. The next
+    page is requested only when iteration reaches it, following the Bundle's
+    next link, and iteration stops after `limit` matches; with _include or
+    _revinclude the rest of that page is still read for its included
+    resources. Total, ETag and server time of the first page and the number
+    of pages fetched are filled in as iteration proceeds.
+    """
+
+    def __init__(self, client: "FHIRClient", url: str, params: Dict[str, Any], limit: Optional[int] = None,
+                 headers: Optional[Dict[str, str]] = None, max_pages: Optional[int] = -1):
+        self.client = client
+        self.url = url
+        self.params = params
+        self.limit = limit
+        self.headers = headers
+        # -1 means fhir_max_pages, None means no bound
+        self.max_pages = client.settings.fhir_max_pages if max_pages == -1 else max_pages
+        self.total: Optional[int] = None
+        self.etag: Optional[str] = None
+        self.server_time: Optional[str] = None
+        self.pages = 0
+        self.has_more = False  # Matches left unread because of the limit or fhir_max_pages
+        self.not_modified = False  # First page answered 304 to If-None-Match
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        url, params, headers = self.url, self.params, self.headers
+        includes = '_include' in params or '_revinclude' in params
+        matched = 0
+        while url:
+            if self.max_pages is not None and self.pages >= self.max_pages:
+                logger.warning("FHIR search stopped after %s pages", self.pages)
+                self.has_more = True
+                return
+
+            # Entries are handed out one at a time as the page is parsed
+            next_url = None
+            with self.client._request(url, params, headers, stream=True) as response:
+                self.pages += 1
+                if self.pages == 1:
+                    self.etag = response.headers.get('ETag')
+                    self.server_time = self.client._server_time(response)
+                    if response.status_code == 304:
+                        self.not_modified = True
+                        return
+
+                for kind, value in self.client._bundle_events(response):
+                    if kind == 'resourceType' and value != 'Bundle':
+                        logger.warning("Expected Bundle, got %s", value)
+                        return
+                    elif kind == 'total' and self.pages == 1:
+                        self.total = value
+                    elif kind == 'link' and value.get('relation') == 'next':
+                        next_url = value.get('url')
+                    elif kind == 'entry' and 'resource' in value:
+                        mode = value.get('search', {}).get('mode', 'match')
+                        if mode != 'match':
+                            yield mode, value['resource']
+                        elif self.limit is not None and matched >= self.limit:
+                            self.has_more = True
+                            if not includes:
+                                return
+                        else:
+                            yield mode, value['resource']
+                            matched += 1
+
+            if self.limit is not None and matched >= self.limit:
+                self.has_more = self.has_more or next_url is not None
+                return
+            # Next links carry the full query, including the server's paging state
+            url, params, headers = next_url, None, None
+
+
+class PatientPages(SearchPages):
+    """Lazy iteration over the formatted patients matching a Patient search."""
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for mode, resource in super().__iter__():
+            if mode == 'match' and resource.get('resourceType') == 'Patient':
+                yield self.client._format_patient_data(resource)
+
+
 # FHIR-specific exceptions
 class FHIRError(Exception):
     """Base FHIR error."""
@@ -294,4 +712,8 @@ class FHIRNotFoundError(FHIRError):
 
 class FHIRServerError(FHIRError):
     """FHIR server error."""
+    pass
+
+class FHIRUnavailableError(FHIRError):
+    """FHIR circuit breaker is open; the call was not attempted."""
     pass
\ No newline at end of file
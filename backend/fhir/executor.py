@@ -2,8 +2,12 @@
 
 import json
 import logging
-from typing import Dict, Any, List
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from fhir.client import FHIRClient, FHIRError
+from fhir.formatting import format_patients_compact, format_resources_for_czech_response
+from fhir.tools import RESOURCE_SEARCH_TOOLS
 from config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -14,6 +18,11 @@ class FHIRToolExecutor:
 
     def __init__(self, fhir_client: FHIRClient):
         self.fhir_client = fhir_client
+        self.settings = get_settings()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.fhir_tool_concurrency,
+            thread_name_prefix="fhir-tools"
+        )
 
     def execute_tool_call(self, tool_call: Any) -> str:
         """
@@ -30,10 +39,12 @@ class FHIRToolExecutor:
         try:
             # Parse arguments from the tool call
             arguments = json.loads(tool_call.function.arguments)
-            logger.info(f"Executing FHIR tool: {function_name} with arguments: {arguments}")
+            logger.info("Executing FHIR tool: %s", function_name)
 
             if function_name == "search_fhir_patients":
-                return self._execute_patient_search(arguments)
+                return self.execute_patient_search(arguments)
+            elif function_name in RESOURCE_SEARCH_TOOLS:
+                return self.execute_resource_search(function_name, arguments)
             else:
                 logger.error(f"Unknown FHIR tool function: {function_name}")
                 return f"Chyba: Neznámá funkce '{function_name}'"
@@ -50,31 +61,106 @@ class FHIRToolExecutor:
             logger.error(f"Unexpected error during tool execution: {e}")
             return "Došlo k neočekávané chybě při vyhledávání pacientů"
 
-    def _execute_patient_search(self, arguments: Dict[str, Any]) -> str:
+    def execute_patient_search(self, arguments: Dict[str, Any]) -> str:
         """
         Execute FHIR patient search.
 
         Args:
-            arguments: Search parameters from tool call
+            arguments: Search parameters from tool call, optionally with
+                count_only, limit and include
 
         Returns:
             Formatted Czech response with patient data
         """
-        # Remove empty/None values from search parameters
-        search_params = {k: v for k, v in arguments.items() if v is not None and v != ""}
+        count_only = bool(arguments.get('count_only'))
+        limit = self._limit(arguments.get('limit'))
+        include = [name for name in arguments.get('include') or [] if name in ('Observation', 'Condition', 'Encounter')]
+
+        # Remove empty/None values and tool-only options from search parameters
+        search_params = {
+            k: v for k, v in arguments.items()
+            if v is not None and v != "" and k not in ('count_only', 'limit', 'include')
+        }
+
+        logger.debug("Searching FHIR patients with parameters: %s", search_params)
+
+        if count_only:
+            total = self.fhir_client.count_patients(search_params)
+            logger.info("FHIR count completed, %s patients match", total)
+            if total is None:
+                return "Počet pacientů se nepodařilo zjistit."
+            return f"Počet pacientů odpovídajících zadaným kritériím: {total}"
+
+        if include:
+            # Patients and their related records in one request (_revinclude)
+            patients, related, total = self.fhir_client.search_patients_with_related(search_params, include, limit)
+            formatted_response = self._format_patients(patients, total, related)
+            logger.info("FHIR search completed, found %s of %s patients with %s related records",
+                        len(patients), total, sum(len(resources) for resources in related.values()))
+            return formatted_response
+
+        # Execute search via FHIR client; only the pages needed for the limit are fetched
+        patients, total = self.fhir_client.search_patients_with_total(search_params, limit)
 
-        logger.info(f"Searching FHIR patients with parameters: {search_params}")
+        # Format results for Czech response
+        formatted_response = self._format_patients(patients, total)
 
-        # Execute search via FHIR client
-        patients = self.fhir_client.search_patients(search_params)
+        logger.info("FHIR search completed, found %s of %s patients", len(patients), total)
 
-        # Format results for Czech response
-        formatted_response = self.fhir_client.format_patients_for_czech_response(patients)
+        return formatted_response
+
+    def execute_resource_search(self, function_name: str, arguments: Dict[str, Any]) -> str:
+        """
+        Execute an Observation, Condition or Encounter search.
+
+        The patients of the matches are fetched in the same request
+        (_include), so results carry patient names without further calls.
+
+        Args:
+            function_name: Tool name from RESOURCE_SEARCH_TOOLS
+            arguments: Search parameters from tool call, optionally with limit
 
-        logger.info(f"FHIR search completed, found {len(patients)} patients")
+        Returns:
+            Formatted Czech response grouped by patient
+        """
+        resource_type, renames = RESOURCE_SEARCH_TOOLS[function_name]
+        limit = self._limit(arguments.get('limit'))
+        search_params = {
+            renames.get(k, k): str(v) for k, v in arguments.items()
+            if v is not None and v != "" and k != 'limit'
+        }
+
+        logger.debug("Searching FHIR %s with parameters: %s", resource_type, search_params)
+
+        resources, included, total = self.fhir_client.search_resources(
+            resource_type, search_params, limit, include=[f"{resource_type}:patient"]
+        )
+        patient_names = {
+            patient.get('id'): self.fhir_client._format_patient_data(patient)['name']
+            for patient in included if patient.get('resourceType') == 'Patient'
+        }
+        formatted_response = format_resources_for_czech_response(resource_type, resources, patient_names, total)
+
+        logger.info("FHIR %s search completed, found %s of %s records", resource_type, len(resources), total)
 
         return formatted_response
 
+    def _format_patients(self, patients: List[Dict[str, Any]], total: Optional[int],
+                         related: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> str:
+        """Patients as a compact table (default) or verbose blocks, per fhir_result_format."""
+        if self.settings.fhir_result_format == "compact":
+            return format_patients_compact(patients, total, related, self.settings.fhir_compact_max_rows)
+        return self.fhir_client.format_patients_for_czech_response(patients, total, related)
+
+    def _limit(self, value: Any) -> int:
+        """Tool-provided limit, capped at fhir_max_results to keep the model context bounded."""
+        max_results = self.fhir_client.max_results
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            return max_results
+        return max_results if limit <= 0 else min(limit, max_results)
+
     def execute_tool_calls(self, tool_calls: List[Any]) -> List[str]:
         """
         Execute multiple FHIR tool calls.
@@ -85,9 +171,66 @@ class FHIRToolExecutor:
         Returns:
             List of formatted results
         """
-        results = []
-        for tool_call in tool_calls:
-            result = self.execute_tool_call(tool_call)
-            results.append(result)
+        return self._run_concurrently(self.execute_tool_call, tool_calls)
+
+    def function_call_output(self, function_call: Any) -> Dict[str, str]:
+        """
+        Execute one Responses API function call.
+
+        Args:
+            function_call: function_call output item (name, arguments, call_id)
+
+        Returns:
+            function_call_output input item for the follow-up request
+        """
+        try:
+            if function_call.name in RESOURCE_SEARCH_TOOLS:
+                arguments = json.loads(function_call.arguments)
+                formatted_results = self.execute_resource_search(function_call.name, arguments)
+                logger.info("FHIR search result formatted (%d chars)", len(formatted_results))
+                output = {"results": formatted_results}
+            elif function_call.name != "search_fhir_patients":
+                logger.error(f"Unknown FHIR tool function: {function_call.name}")
+                output = {"error": f"Neznámá funkce '{function_call.name}'"}
+            else:
+                search_params = json.loads(function_call.arguments)
+                logger.debug("Executing FHIR search with params: %s", search_params)
+
+                formatted_results = self.execute_patient_search(search_params)
+
+                # Patient data is never logged, only its size
+                logger.info("FHIR search result formatted (%d chars)", len(formatted_results))
+                output = {"patient_results": formatted_results}
+
+        except FHIRError as e:
+            # Includes parameters rejected before any request; the model can correct them
+            logger.warning("FHIR search failed: %s", e)
+            output = {"error": f"Chyba při vyhledávání v FHIR databázi: {str(e)}"}
+
+        except Exception as e:
+            logger.exception("Error executing FHIR search: %s", e)
+            output = {"error": f"Chyba při vyhledávání v FHIR databázi: {str(e)}"}
+
+        return {
+            "type": "function_call_output",
+            "call_id": function_call.call_id,
+            # Unescaped Czech text takes far fewer prompt tokens than \u escapes
+            "output": json.dumps(output, ensure_ascii=False)
+        }
+
+    def function_call_outputs(self, function_calls: List[Any]) -> List[Dict[str, str]]:
+        """
+        Execute all function calls of one model turn.
 
-        return results
\ No newline at end of file
+        Calls run concurrently, up to fhir_tool_concurrency at a time, and
+        each output carries the call_id of its call. Outputs are returned in
+        call order.
+        """
+        return self._run_concurrently(self.function_call_output, function_calls)
+
+    def _run_concurrently(self, function, items: List[Any]) -> List[Any]:
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        # Copy the context so request-scoped usage, timings and spans reach the worker threads
+        futures = [self._executor.submit(contextvars.copy_context().run, function, item) for item in items]
+        return [future.result() for future in futures]
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Rule-based extraction of search_fhir_patients arguments from Czech queries.
+
+Covers the common simple lookups (a name, gender, birth year or range, an
+identifier, "kolik") so they can be searched without the tool-selection
+LLM call. Every word of the query has to be understood; anything else
+(clinical terms, follow-ups, lowercase or ambiguous names) returns None and
+the caller falls back to LLM tool calling.
+"""
+
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from fhir.patient_index import fold
+
+# Folded words that carry no search parameter
+FILLER_WORDS = {
+    'najdi', 'najdete', 'najit', 'vyhledej', 'vyhledejte', 'vyhledat', 'hledej', 'hledejte', 'hledam', 'hledame',
+    'dohledej', 'dohledejte', 'zobraz', 'zobrazte', 'zobrazit', 'ukaz', 'ukazte', 'vypis', 'vypiste', 'dej',
+    'potrebuji', 'potrebuju', 'chci', 'mi', 'nam', 'prosim', 'je', 'jsou', 'mame', 'mate', 'evidujeme', 'ma',
+    'mezi', 'v', 've', 'databazi', 'systemu', 'fhir', 'vsechny', 'vsechna', 'vsech', 'vsichni', 'ktere', 'kteri',
+    'ktery', 'ktera', 's', 'se', 'a', 'o', 'informace', 'udaje', 'zaznam', 'zaznamy', 'pacient', 'pacienta',
+    'pacientu', 'pacienty', 'pacienti', 'pacientovi', 'osoby', 'osobu', 'jmenem', 'prijmenim', 'nebo',
+}
+# Between two names these mean two people, which needs one search per person
+CONJUNCTIONS = {'a', 'nebo'}
+# Words that make the query a lookup; without one the query may depend on the conversation
+ANCHOR_WORDS = {
+    'najdi', 'najdete', 'najit', 'vyhledej', 'vyhledejte', 'vyhledat', 'hledej', 'hledejte', 'hledam', 'hledame',
+    'dohledej', 'dohledejte', 'zobraz', 'zobrazte', 'zobrazit', 'ukaz', 'ukazte', 'vypis', 'vypiste', 'kolik',
+    'pocet', 'pacient', 'pacienta', 'pacientu', 'pacienty', 'pacienti', 'pacientku', 'pacientka', 'pacientky',
+    'pacientek',
+}
+GENDER_WORDS = {
+    **dict.fromkeys(('zena', 'zeny', 'zen', 'zenu', 'zenach', 'pacientku', 'pacientka', 'pacientky', 'pacientek'),
+                    'female'),
+    **dict.fromkeys(('muz', 'muze', 'muzi', 'muzu', 'muzich', 'muzum'), 'male'),
+}
+COUNT_WORDS = {'kolik', 'pocet'}
+IDENTIFIER_CUES = {'identifikator', 'identifikatorem', 'id', 'cislo', 'cislem', 'rodne', 'rodnym', 'rc', 'mrn'}
+BIRTH_WORDS = {'narozen', 'narozena', 'narozeny', 'narozene', 'narozeni', 'narozenych', 'narozenou', 'narozenym'}
+
+_BIRTH = r"\b(?:(?:narozen\w*|rocnik\w*)\s+)?"
+# (pattern, builder of the birthdate argument from the matched groups), tried in order on folded text
+BIRTHDATE_PATTERNS = [
+    (re.compile(_BIRTH + r"(?:mezi\s+lety|v\s+letech|od\s+roku)\s+(\d{4})\s*(?:a|-|–|do(?:\s+roku)?)\s*(\d{4})\b"),
+     lambda a, b: f"ge{a}-01-01&le{b}-12-31" if a <= b else None),
+    (re.compile(_BIRTH + r"pred\s+rokem\s+(\d{4})\b"), lambda a: f"lt{a}-01-01"),
+    (re.compile(_BIRTH + r"po\s+roce\s+(\d{4})\b"), lambda a: f"gt{a}-12-31"),
+    (re.compile(_BIRTH + r"od\s+roku\s+(\d{4})\b"), lambda a: f"ge{a}-01-01"),
+    (re.compile(_BIRTH + r"do\s+roku\s+(\d{4})\b"), lambda a: f"le{a}-12-31"),
+    (re.compile(r"\bnarozen\w*\s+(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})\b"), lambda d, m, y: f"{y}-{int(m):02d}-{int(d):02d}"),
+    # A year without prefix covers the whole year (fhir/query.py)
+    (re.compile(_BIRTH + r"(?:v\s+roce|roku|z\s+roku)\s+(\d{4})\b"), lambda a: a),
+    (re.compile(r"\b(?:narozen\w*|rocnik\w*)\s+(\d{4})\b"), lambda a: a),
+]
+LIMIT_PATTERN = re.compile(r"\bprvni(?:ch)?\s+(\d{1,3})\b")
+WORD_PATTERN = re.compile(r"[\w./-]+", re.UNICODE)
+# Punctuation allowed between words; anything else (O'Brien, D’Artagnan) may be part of a name
+SEPARATORS = set(' \t,;:()"„“')
+
+# Declined adjectival surname endings and their nominative (Novákovou -> Nováková, Černého -> Černý)
+ADJECTIVE_ENDINGS = (
+    ('ovou', 'ová'), ('ové', 'ová'), ('skou', 'ská'), ('ské', 'ská'), ('ckou', 'cká'), ('cké', 'cká'),
+    ('ého', 'ý'), ('ému', 'ý'), ('ým', 'ý'), ('ího', 'í'), ('ímu', 'í'), ('ím', 'í'),
+)
+# Further adjectival endings of female surnames (Malou -> Malá); given names in -ou are nouns (Evou)
+SURNAME_ENDINGS = (('ou', 'á'), ('é', 'á'))
+# Case endings of nouns; the remaining stem is searched as a prefix (Nováka -> Novák, Petra -> Petr)
+NOUN_ENDINGS = ('ovi', 'ou', 'em', 'a', 'u', 'e', 'ě', 'y', 'i')
+# Shorter stems match too many unrelated names (Evu -> Ev, Janu -> Jan)
+MIN_STEM_LENGTH = 4
+VOWELS = set('aeiouyáéěíóúůý')
+MAX_YEAR_AGE = 130
+
+
+def name_search_form(word: str, surname: bool = False) -> Optional[str]:
+    """
+    Nominative or prefix stem of a declined Czech name, or None when the
+    stem is ambiguous: a fleeting e (Pavla -> Pavel, Havlíčka -> Havlíček,
+    but Procházku -> Procházka) or a stem too short to search by.
+    """
+    lower = word.lower()
+    endings = ADJECTIVE_ENDINGS + SURNAME_ENDINGS if surname else ADJECTIVE_ENDINGS
+    for ending, nominative in endings:
+        if lower.endswith(ending) and len(lower) > len(ending) + 1:
+            return word[:-len(ending)] + nominative
+    if lower.endswith(('ová', 'ská', 'cká', 'á', 'ý', 'í')):
+        return word
+    for ending in NOUN_ENDINGS:
+        if lower.endswith(ending):
+            stem = lower[:-len(ending)]
+            if len(stem) < MIN_STEM_LENGTH:
+                return None
+            if stem[-1] in 'kl' and stem[-2] not in VOWELS and stem[-3] in VOWELS:
+                return None
+            return word[:-len(ending)]
+    return word
+
+
+def _birthdate(folded: str) -> Tuple[Optional[str], str, bool]:
+    """(birthdate argument, text without the matched phrase, valid)."""
+    for pattern, build in BIRTHDATE_PATTERNS:
+        match = pattern.search(folded)
+        if match:
+            years = [int(group) for group in match.groups() if len(group) == 4]
+            if any(year < date.today().year - MAX_YEAR_AGE or year > date.today().year for year in years):
+                return None, folded, False
+            value = build(*match.groups())
+            if value and len(value) == 10:
+                try:
+                    date.fromisoformat(value)
+                except ValueError:
+                    return None, folded, False
+            return value, folded[:match.start()] + ' ' + folded[match.end():], value is not None
+    return None, folded, True
+
+
+def extract_patient_search(query: str) -> Optional[Dict[str, Any]]:
+    """
+    search_fhir_patients arguments for a simple Czech lookup, or None.
+
+    Examples: "Najdi pacienta Jan Novák" -> name [Jan, Novák];
+    "ženy narozené před rokem 2000" -> gender female, birthdate lt2000-01-01;
+    "pacient s identifikátorem 12345" -> identifier 12345.
+    """
+    text = query.strip().rstrip('?!.').strip()
+    if not text or len(text) > 200:
+        return None
+
+    # Characters the tokenizer would skip could belong to a name
+    if any(ch not in SEPARATORS for ch in WORD_PATTERN.sub('', text)):
+        return None
+
+    # Dates and limits are matched on folded text; names keep their original spelling
+    words = WORD_PATTERN.findall(text)
+    folded_words = [fold(word) for word in words]
+    folded = ' '.join(folded_words)
+    arguments: Dict[str, Any] = {}
+
+    birthdate, rest, valid = _birthdate(folded)
+    if not valid:
+        return None
+    if birthdate:
+        arguments['birthdate'] = birthdate
+    match = LIMIT_PATTERN.search(rest)
+    if match:
+        arguments['limit'] = int(match.group(1))
+        rest = rest[:match.start()] + ' ' + rest[match.end():]
+
+    # Re-align the remaining folded words with their original spelling and position
+    remaining: List[Tuple[int, str, str]] = []
+    position = 0
+    for folded_word in rest.split():
+        while position < len(words) and folded_words[position] != folded_word:
+            position += 1
+        if position == len(words):
+            return None
+        remaining.append((position, words[position], folded_word))
+        position += 1
+
+    remaining_words = {folded_word for _, _, folded_word in remaining}
+    if not (ANCHOR_WORDS & remaining_words or birthdate and BIRTH_WORDS & set(folded_words)):
+        return None
+
+    names: List[Tuple[int, str]] = []
+    conjunctions: List[int] = []
+    family_cue = False
+    identifier_cue = False
+    for position, word, folded_word in remaining:
+        if folded_word in GENDER_WORDS:
+            if arguments.get('gender', GENDER_WORDS[folded_word]) != GENDER_WORDS[folded_word]:
+                return None
+            arguments['gender'] = GENDER_WORDS[folded_word]
+        elif folded_word in COUNT_WORDS:
+            arguments['count_only'] = True
+        elif folded_word in IDENTIFIER_CUES:
+            identifier_cue = True
+        elif folded_word in BIRTH_WORDS:
+            if not birthdate:
+                return None
+        elif folded_word in FILLER_WORDS:
+            family_cue = family_cue or folded_word == 'prijmenim'
+            if folded_word in CONJUNCTIONS:
+                conjunctions.append(position)
+        elif any(ch.isdigit() for ch in word):
+            # Numbers only count as identifiers after a cue or when mixed with letters (MRN000123)
+            if 'identifier' in arguments or not (identifier_cue or any(ch.isalpha() for ch in word)):
+                return None
+            arguments['identifier'] = word
+        elif position > 0 and word[0].isupper() and word.isalpha():
+            names.append((position, word))
+        else:
+            return None
+
+    if identifier_cue and 'identifier' not in arguments:
+        return None
+    if names:
+        # Given name and surname are adjacent; "Novákovou a Svobodovou" are two patients
+        if len(names) > 2 or len(names) == 2 and names[1][0] - names[0][0] != 1:
+            return None
+        if any(names[0][0] < position < names[-1][0] for position in conjunctions):
+            return None
+        if len(names) == 2:
+            # Czech records put the surname first as often as last, so both are searched as name
+            # terms; a word whose search form depends on being a surname (Malou, Evou) is ambiguous
+            forms = [name_search_form(name) for _, name in names]
+            if None in forms or forms != [name_search_form(name, surname=True) for _, name in names]:
+                return None
+            arguments['name'] = forms
+        else:
+            form = name_search_form(names[0][1], surname=True)
+            if form is None:
+                return None
+            arguments['family' if family_cue else 'name'] = form
+
+    if not set(arguments) - {'limit', 'count_only'} and 'count_only' not in arguments:
+        return None
+    if 'limit' in arguments and 'count_only' in arguments:
+        del arguments['limit']
+    return arguments
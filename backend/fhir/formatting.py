@@ -0,0 +1,205 @@
+"""Czech summaries of Observation, Condition and Encounter resources and compact patient tables."""
+
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Resource type -> (label of one record, genitive plural for counts)
+RESOURCE_LABELS = {
+    'Observation': ('Vyšetření', 'vyšetření'),
+    'Condition': ('Diagnóza', 'diagnóz'),
+    'Encounter': ('Návštěva', 'návštěv'),
+}
+
+GENDER_CZECH = {
+    'male': 'muž',
+    'female': 'žena',
+    'other': 'jiné',
+    'unknown': 'neznámé'
+}
+
+# Column header of compact patient tables; values are separated the same way
+COMPACT_PATIENT_COLUMNS = "#|ID|jméno|nar.|pohl.|identifikátory|kontakty"
+
+CLINICAL_STATUS_CZECH = {
+    'active': 'aktivní',
+    'recurrence': 'recidiva',
+    'relapse': 'relaps',
+    'inactive': 'neaktivní',
+    'remission': 'remise',
+    'resolved': 'vyřešená',
+}
+
+
+def czech_date(value: str) -> str:
+    """YYYY-MM-DD (or the date part of a dateTime) as DD.MM.YYYY."""
+    if not value:
+        return ''
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').strftime('%d.%m.%Y')
+    except ValueError:
+        return value
+
+
+def _concept_text(concept: Dict[str, Any]) -> str:
+    if concept.get('text'):
+        return concept['text']
+    for coding in concept.get('coding', []):
+        if coding.get('display') or coding.get('code'):
+            return coding.get('display') or coding['code']
+    return ''
+
+
+def _concept_code(concept: Dict[str, Any]) -> str:
+    for coding in concept.get('coding', []):
+        if coding.get('code'):
+            return coding['code']
+    return ''
+
+
+def _quantity(observation: Dict[str, Any]) -> str:
+    if 'valueQuantity' in observation:
+        quantity = observation['valueQuantity']
+        return f"{quantity.get('value', '')} {quantity.get('unit') or quantity.get('code', '')}".strip()
+    if 'valueCodeableConcept' in observation:
+        return _concept_text(observation['valueCodeableConcept'])
+    if 'valueString' in observation:
+        return observation['valueString']
+    return ''
+
+
+def summarize_observation(observation: Dict[str, Any]) -> str:
+    date = czech_date(observation.get('effectiveDateTime', ''))
+    text = _concept_text(observation.get('code', {}))
+    value = _quantity(observation)
+    if value:
+        text = f"{text}: {value}"
+    return f"{date} {text}".strip()
+
+
+def summarize_condition(condition: Dict[str, Any]) -> str:
+    code = condition.get('code', {})
+    text = _concept_text(code)
+    if _concept_code(code):
+        text += f" ({_concept_code(code)})"
+    status = _concept_code(condition.get('clinicalStatus', {}))
+    details = [CLINICAL_STATUS_CZECH.get(status, status)] if status else []
+    if condition.get('onsetDateTime'):
+        details.append(f"od {czech_date(condition['onsetDateTime'])}")
+    return f"{text}, {', '.join(details)}" if details else text
+
+
+def summarize_encounter(encounter: Dict[str, Any]) -> str:
+    period = encounter.get('period', {})
+    start, end = czech_date(period.get('start', '')), czech_date(period.get('end', ''))
+    dates = f"{start}–{end}" if end and end != start else start
+    encounter_class = encounter.get('class', {})
+    kind = encounter_class.get('display') or encounter_class.get('code', '')
+    departments = ', '.join(_concept_text(concept) for concept in encounter.get('type', []) if _concept_text(concept))
+    return ', '.join(part for part in (dates, kind, departments) if part)
+
+
+SUMMARIZERS = {
+    'Observation': summarize_observation,
+    'Condition': summarize_condition,
+    'Encounter': summarize_encounter,
+}
+
+
+def summarize_resource(resource: Dict[str, Any]) -> str:
+    """One-line Czech summary, prefixed with the kind of record."""
+    resource_type = resource.get('resourceType', '')
+    summarizer = SUMMARIZERS.get(resource_type)
+    if summarizer is None:
+        return f"{resource_type}/{resource.get('id', '')}"
+    return f"{RESOURCE_LABELS[resource_type][0]}: {summarizer(resource)}"
+
+
+def format_resources_for_czech_response(resource_type: str, resources: List[Dict[str, Any]],
+                                        patient_names: Dict[str, str], total: Optional[int] = None) -> str:
+    """
+    Format clinical search results grouped by patient.
+
+    Args:
+        resource_type: Searched resource type
+        resources: Matching resources
+        patient_names: Names of the patients included with the search (_include), by id
+        total: All matches on the server, when known
+    """
+    plural = RESOURCE_LABELS.get(resource_type, (resource_type, resource_type))[1]
+    if not resources:
+        return f"Nebyly nalezeny žádné záznamy typu {plural} odpovídající zadaným kritériím."
+
+    by_patient: "OrderedDict[str, List[str]]" = OrderedDict()
+    summarizer = SUMMARIZERS.get(resource_type, summarize_resource)
+    for resource in resources:
+        patient_id = resource.get('subject', {}).get('reference', '').split('/')[-1]
+        by_patient.setdefault(patient_id, []).append(summarizer(resource))
+
+    if total is not None and total > len(resources):
+        result_lines = [f"Nalezeno {total} záznamů ({plural}), zobrazeno prvních {len(resources)}:"]
+    else:
+        result_lines = [f"Nalezeno {len(resources)} záznamů ({plural}):"]
+    result_lines.append("")
+
+    for patient_id, lines in by_patient.items():
+        result_lines.append(f"Pacient {patient_names.get(patient_id) or 'neznámého jména'} (ID záznamu: {patient_id}):")
+        for line in lines:
+            result_lines.append(f"   • {line}")
+        result_lines.append("")
+
+    return '\n'.join(result_lines).rstrip()
+
+
+def _cell(value: str) -> str:
+    return value.replace('|', '/').replace('\n', ' ')
+
+
+def _patient_summary(patients: List[Dict[str, Any]]) -> str:
+    """Counts by gender and birth decade, e.g. "žena 12, muž 8; 1950–59: 3, 1960–69: 5"."""
+    genders = Counter(GENDER_CZECH.get((patient.get('gender') or 'unknown').lower(), patient.get('gender'))
+                      for patient in patients)
+    decades = Counter(patient['birthdate'][:3] for patient in patients if len(patient.get('birthdate') or '') >= 4)
+    parts = [', '.join(f"{gender} {count}" for gender, count in genders.most_common())]
+    if decades:
+        parts.append(', '.join(f"{decade}0–{decade[-1]}9: {decades[decade]}" for decade in sorted(decades)))
+    return '; '.join(parts)
+
+
+def format_patients_compact(patients: List[Dict[str, Any]], total: Optional[int] = None,
+                            related: Optional[Dict[str, List[Dict[str, Any]]]] = None, max_rows: int = 20) -> str:
+    """
+    Format formatted patients as a table with one row per patient, for tool outputs.
+
+    At most `max_rows` rows are listed. When more patients match, a summary
+    by gender and birth decade of the fetched patients precedes the rows.
+    Related records follow their patient's row, one per line.
+    """
+    if not patients:
+        return "Nebyli nalezeni žádní pacienti odpovídající zadaným kritériím."
+
+    matched = max(total or 0, len(patients))
+    shown = patients[:max_rows]
+    if matched > len(shown):
+        result_lines = [f"Nalezeno {matched} pacientů, zobrazeno prvních {len(shown)}."]
+        scope = "" if len(patients) == matched else f" {len(patients)} načtených"
+        result_lines.append(f"Souhrn{scope}: {_patient_summary(patients)}")
+    else:
+        result_lines = [f"Nalezeno {matched} pacientů."]
+
+    result_lines.append(COMPACT_PATIENT_COLUMNS)
+    for i, patient in enumerate(shown, 1):
+        gender = patient.get('gender') or ''
+        result_lines.append('|'.join(_cell(value) for value in (
+            str(i),
+            patient.get('id') or '',
+            patient.get('name') or '',
+            czech_date(patient.get('birthdate') or ''),
+            GENDER_CZECH.get(gender.lower(), gender),
+            '; '.join(patient.get('identifier') or []),
+            '; '.join(patient.get('telecom') or [])
+        )))
+        for resource in (related or {}).get(patient.get('id'), []):
+            result_lines.append(f"  - {summarize_resource(resource)}")
+
+    return '\n'.join(result_lines)
@@ -0,0 +1,321 @@
+"""Local SQLite projection of Patient demographics, kept in sync via _lastUpdated."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import record_cache, record_error
+
+logger = logging.getLogger(__name__)
+
+# Search parameters the index can answer; anything else goes to the FHIR server
+INDEXED_PARAMETERS = {'name', 'family', 'given', 'gender', 'birthdate', 'identifier'}
+DATE_PREFIXES = ('eq', 'ne', 'ge', 'gt', 'le', 'lt')
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id TEXT PRIMARY KEY,
+    family TEXT NOT NULL,
+    given TEXT NOT NULL,
+    gender TEXT,
+    birthdate TEXT,
+    last_updated TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS {table}_identifiers (
+    patient_id TEXT NOT NULL,
+    system TEXT,
+    value TEXT NOT NULL
+);
+"""
+
+# Created on the live tables only, after a full load has been swapped in
+INDEXES = """
+CREATE INDEX IF NOT EXISTS patients_family ON patients (family);
+CREATE INDEX IF NOT EXISTS patients_gender_birthdate ON patients (gender, birthdate);
+CREATE INDEX IF NOT EXISTS patients_birthdate ON patients (birthdate);
+CREATE INDEX IF NOT EXISTS patients_identifiers_value ON patients_identifiers (value);
+CREATE INDEX IF NOT EXISTS patients_identifiers_patient ON patients_identifiers (patient_id);
+"""
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form used for FHIR string matching."""
+    normalized = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(ch for ch in normalized if not unicodedata.combining(ch))
+
+
+def _tokens(values: List[str]) -> str:
+    """Folded name parts as '|part|part|', so prefix matches become LIKE '%|prefix%'."""
+    parts = [fold(part) for value in values for part in value.split() if part]
+    return '|' + '|'.join(parts) + '|'
+
+
+def _like_token_prefix(value: str) -> str:
+    escaped = fold(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%|{escaped}%"
+
+
+def _date_bounds(value: str) -> Tuple[str, date, date]:
+    """Prefix and the first/last day covered by a FHIR date of year, month or day precision."""
+    prefix = 'eq'
+    if value[:2] in DATE_PREFIXES:
+        prefix, value = value[:2], value[2:]
+    parts = [int(part) for part in value.split('-')]
+    if len(parts) == 1:
+        return prefix, date(parts[0], 1, 1), date(parts[0], 12, 31)
+    if len(parts) == 2:
+        next_month = date(parts[0] + parts[1] // 12, parts[1] % 12 + 1, 1)
+        return prefix, date(parts[0], parts[1], 1), date.fromordinal(next_month.toordinal() - 1)
+    day = date(parts[0], parts[1], parts[2])
+    return prefix, day, day
+
+
+def _date_condition(value: str) -> Tuple[str, List[str]]:
+    prefix, low, high = _date_bounds(value)
+    low, high = low.isoformat(), high.isoformat()
+    return {
+        'eq': ("birthdate BETWEEN ? AND ?", [low, high]),
+        'ne': ("birthdate NOT BETWEEN ? AND ?", [low, high]),
+        'ge': ("birthdate >= ?", [low]),
+        'gt': ("birthdate > ?", [high]),
+        'le': ("birthdate <= ?", [high]),
+        'lt': ("birthdate < ?", [low]),
+    }[prefix]
+
+
+class PatientIndex:
+    """
+    Indexed Patient projection for demographic searches.
+
+    A background thread loads all patients once and then applies
+    `_lastUpdated` deltas every `sync_interval` seconds; a periodic full
+    reload also drops deleted patients. Searches are answered locally while
+    the last successful sync is younger than `max_staleness`; otherwise,
+    and for parameters the index does not cover, callers fall back to REST.
+
+    With an empty path the index lives in memory only, so no patient data
+    is written to disk.
+    """
+
+    def __init__(self, client, path: str = "", sync_interval: float = 60.0, full_sync_interval: float = 86400.0,
+                 max_staleness: float = 300.0, page_size: int = 500):
+        self.client = client
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+        self.max_staleness = max_staleness
+        self.page_size = page_size
+        self._conn = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self._conn.executescript(TABLES.format(table='patients') + INDEXES)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._high_water: Optional[str] = None  # Server time the last sync started at
+        self._synced_at: Optional[float] = None
+        self._full_synced_at: Optional[float] = None
+        self._stats = {'syncs': 0, 'failed_syncs': 0, 'served': 0, 'fallbacks': 0}
+
+    # ----- sync -----
+
+    def start(self):
+        """Run the initial load and periodic syncs on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fhir-patient-index", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.sync_interval)
+
+    def sync(self) -> bool:
+        """Full load when due, otherwise a _lastUpdated delta. Returns False on failure."""
+        full = self._full_synced_at is None or time.monotonic() - self._full_synced_at >= self.full_sync_interval
+        start = time.perf_counter()
+        try:
+            count = self._full_sync() if full else self._delta_sync()
+        except Exception as e:
+            logger.warning("Patient index %s sync failed: %s", "full" if full else "delta", e)
+            record_error("fhir_index")
+            with self._lock:
+                self._stats['failed_syncs'] += 1
+            return False
+        with self._lock:
+            self._stats['syncs'] += 1
+        logger.info("Patient index %s sync: %d patients in %.2fs", "full" if full else "delta", count,
+                    time.perf_counter() - start)
+        return True
+
+    def _pages(self, params: Dict[str, str]):
+        params = {**params, '_count': str(self.page_size)}
+        if self.client.settings.fhir_search_elements:
+            params['_elements'] = self.client.settings.fhir_search_elements
+        return self.client.search_pages('Patient', params, max_pages=None)
+
+    def _full_sync(self) -> int:
+        pages = self._pages({})
+        table = 'patients_loading'
+        with self._lock:
+            self._conn.executescript(
+                f"DROP TABLE IF EXISTS {table}; DROP TABLE IF EXISTS {table}_identifiers;"
+                + TABLES.format(table=table)
+            )
+        count = self._load(pages, table)
+
+        # Swap the new projection in; searches wait on the lock, so they never see a partial state
+        with self._lock, self._conn:
+            self._conn.execute("DROP TABLE patients")
+            self._conn.execute("DROP TABLE patients_identifiers")
+            self._conn.execute(f"ALTER TABLE {table} RENAME TO patients")
+            self._conn.execute(f"ALTER TABLE {table}_identifiers RENAME TO patients_identifiers")
+            for statement in INDEXES.strip().split(';'):
+                if statement.strip():
+                    self._conn.execute(statement)
+            self._high_water = pages.server_time or self._high_water
+            self._synced_at = self._full_synced_at = time.monotonic()
+        return count
+
+    def _delta_sync(self) -> int:
+        if not self._high_water:
+            raise RuntimeError("No high-water mark for a delta sync")
+        # ge overlaps the previous sync by design; upserts make re-applied changes harmless
+        pages = self._pages({'_lastUpdated': f"ge{self._high_water}"})
+        count = self._load(pages, 'patients')
+        with self._lock:
+            self._high_water = pages.server_time or self._high_water
+            self._synced_at = time.monotonic()
+        return count
+
+    def _load(self, pages, table: str) -> int:
+        """Upsert matches page by page, holding the lock only per batch."""
+        batch, count = [], 0
+        for mode, resource in pages:
+            if mode == 'match' and resource.get('resourceType') == 'Patient':
+                batch.append(resource)
+            if len(batch) >= self.page_size:
+                self._upsert(batch, table)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._upsert(batch, table)
+            count += len(batch)
+        return count
+
+    def _upsert(self, resources: List[Dict[str, Any]], table: str):
+        rows, identifiers = [], []
+        for resource in resources:
+            names = resource.get('name') or [{}]
+            family = names[0].get('family', '')
+            family = ' '.join(family) if isinstance(family, list) else family
+            rows.append((
+                resource['id'],
+                fold(family),
+                _tokens(names[0].get('given', [])),
+                resource.get('gender'),
+                resource.get('birthDate'),
+                resource.get('meta', {}).get('lastUpdated'),
+                json.dumps(self.client._format_patient_data(resource), ensure_ascii=False)
+            ))
+            for identifier in resource.get('identifier', []):
+                if identifier.get('value'):
+                    identifiers.append((resource['id'], identifier.get('system'), identifier['value']))
+
+        with self._lock, self._conn:
+            self._conn.executemany(f"DELETE FROM {table}_identifiers WHERE patient_id = ?", [(row[0],) for row in rows])
+            self._conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(f"INSERT INTO {table}_identifiers VALUES (?, ?, ?)", identifiers)
+
+    # ----- search -----
+
+    def is_fresh(self) -> bool:
+        return self._synced_at is not None and time.monotonic() - self._synced_at <= self.max_staleness
+
+    def search(self, params: Dict[str, Any], limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        (patients, total) for processed search parameters, or None when the
+        index is stale or cannot express the query.
+        """
+        where = self._where(params) if self.is_fresh() else None
+        if where is None:
+            with self._lock:
+                self._stats['fallbacks'] += 1
+            record_cache("fhir_index", False)
+            return None
+
+        clause, args = where
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM patients WHERE {clause}", args).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT data FROM patients WHERE {clause} ORDER BY rowid LIMIT ?", args + [limit]
+            ).fetchall()
+            self._stats['served'] += 1
+        record_cache("fhir_index", True)
+        return [json.loads(row[0]) for row in rows], total
+
+    def _where(self, params: Dict[str, Any]) -> Optional[Tuple[str, List[Any]]]:
+        """SQL condition equivalent to the FHIR search, or None if unsupported."""
+        if set(params) - INDEXED_PARAMETERS:
+            return None
+        conditions, args = ["1 = 1"], []
+        try:
+            for key, values in params.items():
+                # Repeated parameters are ANDed; commas within a value are alternatives (OR)
+                for value in values if isinstance(values, list) else [values]:
+                    alternatives = [self._condition(key, part) for part in value.split(',') if part]
+                    conditions.append('(' + ' OR '.join(f"({clause})" for clause, _ in alternatives) + ')')
+                    args.extend(arg for _, alternative_args in alternatives for arg in alternative_args)
+        except (ValueError, KeyError):
+            return None
+        return ' AND '.join(conditions), args
+
+    @staticmethod
+    def _condition(key: str, value: str) -> Tuple[str, List[Any]]:
+        value = value.strip()
+        if key == 'family':
+            # Starts-with as an index range
+            prefix = fold(value)
+            return "family >= ? AND family < ?", [prefix, prefix + '\uffff']
+        if key == 'given':
+            return "given LIKE ? ESCAPE '\\'", [_like_token_prefix(value)]
+        if key == 'name':
+            prefix = fold(value)
+            return "((family >= ? AND family < ?) OR given LIKE ? ESCAPE '\\')", [
+                prefix, prefix + '\uffff', _like_token_prefix(value)
+            ]
+        if key == 'gender':
+            return "gender = ?", [value]
+        if key == 'birthdate':
+            return _date_condition(value)
+        if key == 'identifier':
+            system, _, identifier = value.rpartition('|')
+            clause = "id IN (SELECT patient_id FROM patients_identifiers WHERE value = ?"
+            if system:
+                return clause + " AND system = ?)", [identifier, system]
+            return clause + ")", [identifier]
+        raise KeyError(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            patients = self._conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+            return {
+                'patients': patients,
+                'fresh': self.is_fresh(),
+                'last_sync_age_seconds': round(time.monotonic() - self._synced_at, 1) if self._synced_at else None,
+                'high_water': self._high_water,
+                **self._stats
+            }
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,158 @@
+"""
+Validated FHIR search parameters.
+
+Tool arguments are turned into request parameters here, before any HTTP
+call. Date parameters are normalised to full dates with explicit prefixes
+and several conditions on one parameter become repeated parameters
+(birthdate=ge1980-01-01&birthdate=le1989-12-31), which is how FHIR ANDs
+them. Malformed values and queries that cannot match anything raise
+InvalidSearchError.
+"""
+
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+DATE_PARAMETERS = {'birthdate', 'date', 'onset-date'}
+# Dates that cannot lie in the future, so a lower bound after today matches nothing
+PAST_DATE_PARAMETERS = {'birthdate'}
+TOKEN_VALUES = {
+    'gender': {'male', 'female', 'other', 'unknown'},
+}
+# sa, eb and ap are valid FHIR but not supported by the servers this backend talks to
+DATE_PREFIXES = ('eq', 'ne', 'gt', 'lt', 'ge', 'le')
+DATE_VALUE = re.compile(r"^(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?$")
+
+SearchParameters = Dict[str, Union[str, List[str]]]
+
+
+class InvalidSearchError(ValueError):
+    """Search parameters that are malformed or cannot match anything."""
+
+
+def _date_range(value: str, name: str) -> Tuple[date, date]:
+    """First and last day covered by a date of year, month or day precision."""
+    match = DATE_VALUE.match(value)
+    if not match:
+        raise InvalidSearchError(f"Invalid date '{value}' for {name}, expected YYYY, YYYY-MM or YYYY-MM-DD")
+    year, month, day = (int(part) if part else None for part in match.groups())
+    try:
+        if month is None:
+            return date(year, 1, 1), date(year, 12, 31)
+        if day is None:
+            first = date(year, month, 1)
+            return first, date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        exact = date(year, month, day)
+        return exact, exact
+    except ValueError:
+        raise InvalidSearchError(f"Invalid date '{value}' for {name}")
+
+
+def _date_conditions(value: str, name: str) -> List[str]:
+    """
+    One condition as full-date FHIR values that are ANDed.
+
+    A date without prefix covers its whole year, month or day. ne keeps
+    the date as given, since excluding a year or month cannot be written
+    as ANDed full dates. Other prefixes use the first or last day of a
+    partial date, whichever keeps the meaning.
+    """
+    prefix, original = 'eq', value
+    if value[:2] in DATE_PREFIXES:
+        prefix, value = value[:2], value[2:]
+    if value[:1].isalpha():
+        raise InvalidSearchError(f"Unknown prefix in '{original}' for {name}, use one of {', '.join(DATE_PREFIXES)}")
+    first, last = _date_range(value, name)
+    if prefix == 'eq':
+        return [f"eq{first}"] if first == last else [f"ge{first}", f"le{last}"]
+    if prefix == 'ne':
+        return [f"ne{value}"]
+    if prefix in ('ge', 'lt'):
+        return [f"{prefix}{first}"]
+    return [f"{prefix}{last}"]
+
+
+def _bounds(conditions: List[str]) -> Tuple[Optional[date], Optional[date]]:
+    """Interval allowed by ANDed full-date conditions; alternatives and ne are not narrowed."""
+    low, high = None, None
+    for condition in conditions:
+        if ',' in condition or condition.startswith('ne'):
+            continue
+        prefix, value = condition[:2], date.fromisoformat(condition[2:])
+        if prefix in ('ge', 'eq'):
+            low = max(low, value) if low else value
+        if prefix == 'gt':
+            value += timedelta(days=1)
+            low = max(low, value) if low else value
+        if prefix in ('le', 'eq'):
+            high = min(high, value) if high else value
+        if prefix == 'lt':
+            value -= timedelta(days=1)
+            high = min(high, value) if high else value
+    return low, high
+
+
+def date_parameter(name: str, value: Union[str, List[str]]) -> List[str]:
+    """
+    Validated values of a date parameter, one per repeated parameter.
+
+    Accepts a list of conditions or a string with conditions joined by '&'
+    (the tool argument format). Commas separate alternatives within one
+    condition, as in FHIR.
+    """
+    parts = value if isinstance(value, list) else str(value).split('&')
+    conditions = []
+    for part in (str(part).strip().replace(' ', '') for part in parts):
+        if not part:
+            continue
+        alternatives = [_date_conditions(alternative, name) for alternative in part.split(',') if alternative]
+        if len(alternatives) == 1:
+            conditions.extend(alternatives[0])
+        elif any(len(alternative) > 1 for alternative in alternatives):
+            raise InvalidSearchError(f"Alternatives in {name} must be single full dates with a prefix")
+        else:
+            conditions.append(','.join(alternative[0] for alternative in alternatives))
+
+    low, high = _bounds(conditions)
+    if low and high and low > high:
+        raise InvalidSearchError(f"{name} range {low} to {high} is empty")
+    if name in PAST_DATE_PARAMETERS and low and low > date.today():
+        raise InvalidSearchError(f"{name} from {low} is in the future")
+    return conditions
+
+
+def token_parameter(name: str, value: str) -> str:
+    values = [part.strip().lower() for part in str(value).split(',') if part.strip()]
+    unknown = [part for part in values if part not in TOKEN_VALUES[name]]
+    if unknown:
+        raise InvalidSearchError(
+            f"Invalid {name} '{', '.join(unknown)}', use one of {', '.join(sorted(TOKEN_VALUES[name]))}"
+        )
+    return ','.join(values)
+
+
+def build_search_parameters(search_params: Dict[str, Any]) -> SearchParameters:
+    """
+    Request parameters for a search, validated locally.
+
+    Empty values are dropped. Parameters with several ANDed conditions map
+    to a list, which requests sends as repeated parameters.
+
+    Raises:
+        InvalidSearchError: malformed values or a query that cannot match
+    """
+    params: SearchParameters = {}
+    for key, value in search_params.items():
+        if value is None or (isinstance(value, str) and not value.strip()) or value == []:
+            continue
+        if key in DATE_PARAMETERS:
+            conditions = date_parameter(key, value)
+            if conditions:
+                params[key] = conditions[0] if len(conditions) == 1 else conditions
+        elif key in TOKEN_VALUES:
+            params[key] = token_parameter(key, value)
+        elif isinstance(value, list):
+            params[key] = [str(item).strip() for item in value]
+        else:
+            params[key] = str(value).strip()
+    return params
@@ -0,0 +1,61 @@
+"""Incremental parsing of FHIR searchset Bundles."""
+
+import json
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+
+try:
+    import ijson
+except ImportError:  # Optional: without it Bundles are parsed whole
+    ijson = None
+
+# Prefixes of the Bundle parts that are built into objects; everything else is skipped
+_OBJECT_PREFIXES = {'link.item': 'link', 'entry.item': 'entry'}
+
+
+def streaming_available() -> bool:
+    return ijson is not None
+
+
+def iter_bundle(stream: BinaryIO) -> Iterator[Tuple[str, Any]]:
+    """
+    Parse a Bundle from a binary stream while it is read.
+
+    Yields ('resourceType', str), ('total', int), ('link', dict) and
+    ('entry', dict) in document order. Only one entry is held in memory at
+    a time, so memory stays flat however large the Bundle is.
+    Raises ValueError on malformed JSON.
+    """
+    if ijson is None:
+        yield from iter_bundle_dict(json.load(stream))
+        return
+
+    builder = None
+    building = None
+    try:
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == building and event == 'end_map':
+                    yield _OBJECT_PREFIXES[building], builder.value
+                    builder = building = None
+            elif event == 'start_map' and prefix in _OBJECT_PREFIXES:
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                building = prefix
+            elif prefix == 'resourceType' and event == 'string':
+                yield 'resourceType', value
+            elif prefix == 'total' and event == 'number':
+                yield 'total', int(value)
+    except ijson.JSONError as e:
+        raise ValueError(f"Malformed Bundle JSON: {e}") from e
+
+
+def iter_bundle_dict(bundle: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """The same events for an already parsed Bundle."""
+    yield 'resourceType', bundle.get('resourceType')
+    if bundle.get('total') is not None:
+        yield 'total', bundle['total']
+    for link in bundle.get('link', []):
+        yield 'link', link
+    for entry in bundle.get('entry', []):
+        yield 'entry', entry
@@ -22,7 +22,7 @@ FHIR_PATIENT_SEARCH_TOOL = {
             },
             "birthdate": {
                 "type": "string",
-                "description": "Birth date in YYYY-MM-DD format or date range (e.g., 'ge2022-01-01&le2025-12-31' for years 2022-2025, 'le2000-01-01' for before 2000, 'ge1990-01-01' for after 1990, '1980' for specific year)"
+                "description": "Birth date in YYYY-MM-DD format, a year or month ('1980' for the whole year 1980, '1980-05'), or a range with prefixes ge/gt/le/lt and conditions joined by '&' (e.g. 'ge2022-01-01&le2025-12-31' for years 2022-2025, 'lt2000-01-01' for before 2000, 'gt1990-12-31' for after 1990)"
             },
             "gender": {
                 "type": "string",
@@ -32,12 +32,122 @@ FHIR_PATIENT_SEARCH_TOOL = {
             "identifier": {
                 "type": "string",
                 "description": "Patient identifier or medical record number"
+            },
+            "count_only": {
+                "type": "boolean",
+                "description": "Return only the number of matching patients (for questions like 'kolik pacientů...'), without their details"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Maximum number of patients to list when fewer are needed (e.g. 'prvních 5'); larger results report the total count"
+            },
+            "include": {
+                "type": "array",
+                "items": {"type": "string", "enum": ["Observation", "Condition", "Encounter"]},
+                "description": "Related records to fetch together with the patients in the same request: Observation (vyšetření, měření, laboratoř), Condition (diagnózy), Encounter (návštěvy, hospitalizace)"
             }
         },
         "required": []
     }
 }
 
+PATIENT_REFERENCE_PROPERTY = {
+    "type": "string",
+    "description": "Comma-separated patient IDs (ID záznamu) from search_fhir_patients results"
+}
+
+DATE_PROPERTY_DESCRIPTION = "Date or range with prefixes ge/le/gt/lt (e.g. 'ge2024-01-01', '2023' for a year)"
+
+FHIR_OBSERVATION_SEARCH_TOOL = {
+    "type": "function",
+    "name": "search_fhir_observations",
+    "description": "Search patients' observations (vital signs, measurements, laboratory results) in the FHIR database. Results are grouped by patient with patient names.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "patient": PATIENT_REFERENCE_PROPERTY,
+            "code": {
+                "type": "string",
+                "description": "LOINC code (e.g. '8480-6' systolic blood pressure, '718-7' hemoglobin)"
+            },
+            "code_text": {
+                "type": "string",
+                "description": "Text of the observation name when the code is not known (e.g. 'hemoglobin', 'tlak')"
+            },
+            "category": {
+                "type": "string",
+                "enum": ["vital-signs", "laboratory"],
+                "description": "vital-signs = vitální funkce a měření, laboratory = laboratorní výsledky"
+            },
+            "date": {"type": "string", "description": DATE_PROPERTY_DESCRIPTION},
+            "limit": {"type": "integer", "description": "Maximum number of records to list"}
+        },
+        "required": []
+    }
+}
+
+FHIR_CONDITION_SEARCH_TOOL = {
+    "type": "function",
+    "name": "search_fhir_conditions",
+    "description": "Search patients' conditions (diagnózy) in the FHIR database. Results are grouped by patient with patient names.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "patient": PATIENT_REFERENCE_PROPERTY,
+            "code": {
+                "type": "string",
+                "description": "ICD-10 code (e.g. 'E11' diabetes mellitus 2. typu, 'I10' hypertenze)"
+            },
+            "code_text": {
+                "type": "string",
+                "description": "Text of the diagnosis when the code is not known (e.g. 'diabetes')"
+            },
+            "clinical_status": {
+                "type": "string",
+                "enum": ["active", "resolved", "inactive"],
+                "description": "active = aktivní, resolved = vyřešená"
+            },
+            "onset_date": {"type": "string", "description": DATE_PROPERTY_DESCRIPTION},
+            "limit": {"type": "integer", "description": "Maximum number of records to list"}
+        },
+        "required": []
+    }
+}
+
+FHIR_ENCOUNTER_SEARCH_TOOL = {
+    "type": "function",
+    "name": "search_fhir_encounters",
+    "description": "Search patients' encounters (návštěvy, hospitalizace) in the FHIR database. Results are grouped by patient with patient names.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "patient": PATIENT_REFERENCE_PROPERTY,
+            "class": {
+                "type": "string",
+                "enum": ["AMB", "IMP", "EMER"],
+                "description": "AMB = ambulantní návštěva, IMP = hospitalizace, EMER = urgentní příjem"
+            },
+            "date": {"type": "string", "description": DATE_PROPERTY_DESCRIPTION},
+            "limit": {"type": "integer", "description": "Maximum number of records to list"}
+        },
+        "required": []
+    }
+}
+
+# Clinical search tools: name -> (resource type, tool argument -> FHIR search parameter renames)
+RESOURCE_SEARCH_TOOLS = {
+    "search_fhir_observations": ("Observation", {"code_text": "code:text"}),
+    "search_fhir_conditions": ("Condition", {
+        "code_text": "code:text", "clinical_status": "clinical-status", "onset_date": "onset-date"
+    }),
+    "search_fhir_encounters": ("Encounter", {}),
+}
+
 def get_fhir_tools():
     """Return list of available FHIR tools for OpenAI tool calling."""
-    return [FHIR_PATIENT_SEARCH_TOOL]
\ No newline at end of file
+    return [
+        FHIR_PATIENT_SEARCH_TOOL,
+        FHIR_OBSERVATION_SEARCH_TOOL,
+        FHIR_CONDITION_SEARCH_TOOL,
+        FHIR_ENCOUNTER_SEARCH_TOOL
+    ]
\ No newline at end of file
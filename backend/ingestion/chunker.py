@@ -1,6 +1,7 @@
 from typing import List, Dict
 import re
 import logging
+from ingestion.tokens import count_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +102,7 @@ class TextChunker:
                 'document_type': doc_type,
                 'chunk_text': chunk_text,
                 'chunk_index': idx,
+                'token_count': count_tokens(chunk_text),
                 'department': department,
                 'process_owner': process_owner,
                 'metadata': metadata
@@ -144,6 +146,7 @@ class TextChunker:
                     'document_type': 'xlsx',
                     'chunk_text': row_text,
                     'chunk_index': idx,
+                    'token_count': count_tokens(row_text),
                     'department': metadata.get('department', ''),
                     'process_owner': metadata.get('process_owner', ''),
                     'metadata': metadata
@@ -3,6 +3,7 @@ from typing import List
 import numpy as np
 import logging
 from config import get_settings
+from tracing import span
 from tqdm import tqdm
 
 logger = logging.getLogger(__name__)
@@ -13,7 +14,7 @@ class EmbeddingGenerator:
 
     def __init__(self):
         self.settings = get_settings()
-        self.client = OpenAI(api_key=self.settings.openai_api_key)
+        self.client = OpenAI(api_key=self.settings.openai_api_key, base_url=self.settings.openai_base_url)
         logger.info(f"Using embedding model: {self.settings.embedding_model}")
 
     def generate_embedding(self, text: str) -> np.ndarray:
@@ -27,10 +28,12 @@ class EmbeddingGenerator:
             Numpy array of embeddings
         """
         try:
-            response = self.client.embeddings.create(
-                model=self.settings.embedding_model,
-                input=text
-            )
+            with span("llm", call_site="embedding", model=self.settings.embedding_model) as llm_span:
+                response = self.client.embeddings.create(
+                    model=self.settings.embedding_model,
+                    input=text
+                )
+                llm_span.set_attribute("input_tokens", getattr(response.usage, 'prompt_tokens', None))
             embedding = np.array(response.data[0].embedding)
             return embedding
         except Exception as e:
@@ -86,3 +89,40 @@ class EmbeddingGenerator:
             chunk['embedding'] = embedding
 
         return chunks
+
+
+def compute_document_vectors(chunks: List[dict]) -> List[dict]:
+    """
+    Build one centroid vector per document from embedded chunks.
+
+    Args:
+        chunks: Chunk dictionaries with 'embedding' (as produced by
+                add_embeddings_to_chunks on create_chunks_with_metadata output)
+
+    Returns:
+        List of document dicts with keys: document_name, document_type,
+        department, chunk_count, embedding (L2-normalised centroid)
+    """
+    documents = {}
+    for chunk in chunks:
+        doc = documents.get(chunk['document_name'])
+        if doc is None:
+            doc = documents[chunk['document_name']] = {
+                'document_name': chunk['document_name'],
+                'document_type': chunk.get('document_type', ''),
+                'department': chunk.get('department', '') or '',
+                'chunk_count': 0,
+                'embedding': np.zeros(len(chunk['embedding']), dtype=np.float64)
+            }
+        vector = np.asarray(chunk['embedding'], dtype=np.float64)
+        norm = np.linalg.norm(vector)
+        doc['embedding'] += vector / norm if norm > 0 else vector
+        doc['chunk_count'] += 1
+
+    for doc in documents.values():
+        norm = np.linalg.norm(doc['embedding'])
+        if norm > 0:
+            doc['embedding'] = doc['embedding'] / norm
+
+    logger.info(f"Computed {len(documents)} document vectors from {len(chunks)} chunks")
+    return list(documents.values())
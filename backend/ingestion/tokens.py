@@ -0,0 +1,87 @@
+"""
+Token counting for chunks and prompts.
+
+Uses tiktoken when it is installed and its encoding is available locally;
+otherwise falls back to a character-based estimate tuned for Czech text.
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_ENCODING = "o200k_base"
+# Czech text with diacritics averages roughly 3 characters per token
+FALLBACK_CHARS_PER_TOKEN = 3.0
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable ({e}), using character-based token estimate")
+        return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Return the number of tokens in text."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most max_tokens, ending at a sentence or line boundary.
+
+    When not even the first sentence or line fits (e.g. a flattened table
+    row), the text is cut after max_tokens tokens at the last word
+    boundary instead. Returns an empty string only for max_tokens <= 0.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    kept = []
+    used = 0
+    position = 0
+    for match in SENTENCE_END.finditer(text):
+        sentence = text[position:match.end()]
+        sentence_tokens = count_tokens(sentence)
+        if used + sentence_tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += sentence_tokens
+        position = match.end()
+
+    truncated = "".join(kept).rstrip()
+    return truncated or _hard_cut(text, max_tokens)
+
+
+def _hard_cut(text: str, max_tokens: int) -> str:
+    """Prefix of text within max_tokens, ending at a word boundary when there is one."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        # Decoding a token prefix can split a multi-byte character at the end
+        cut = encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens]).rstrip("\ufffd")
+    else:
+        cut = text[:int(max_tokens * FALLBACK_CHARS_PER_TOKEN)]
+    if len(cut) < len(text) and not text[len(cut)].isspace():
+        word_start = cut.rfind(' ')
+        if word_start > len(cut) // 2:
+            cut = cut[:word_start]
+    cut = cut.rstrip()
+    while cut and count_tokens(cut) > max_tokens:
+        cut = cut[:-1]
+    return cut
@@ -1,7 +1,11 @@
 import iris
-from typing import List, Tuple, Optional
+import numpy as np
+from typing import Dict, Iterator, List, Tuple, Optional
 import logging
 from config import get_settings
+from vector_snapshot import parse_vector_string
+from metrics import record_error
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,7 @@ class IRISVectorDB:
             logger.info("Successfully connected to InterSystems IRIS")
         except Exception as e:
             logger.error(f"Failed to connect to IRIS: {e}")
+            record_error("iris")
             raise
 
     def disconnect(self):
@@ -47,6 +52,7 @@ class IRISVectorDB:
             ChunkIndex INTEGER,
             Department VARCHAR(200),
             ProcessOwner VARCHAR(200),
+            TokenCount INTEGER,
             ChunkVector VECTOR(DOUBLE, {self.settings.embedding_dimension})
         )
         """
@@ -59,6 +65,17 @@ class IRISVectorDB:
             logger.error(f"Error creating vector table: {e}")
             raise
 
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        """Add columns introduced after the table was first created."""
+        try:
+            self.cursor.execute("ALTER TABLE FNBrno.DocumentChunks ADD COLUMN TokenCount INTEGER")
+            self.conn.commit()
+            logger.info("Added TokenCount column to vector table")
+        except:
+            pass  # Column already exists
+
     def create_vector_index(self):
         """Create HNSW index for efficient vector search."""
         # IRIS doesn't support IF NOT EXISTS for indexes, so we try to drop first
@@ -82,18 +99,96 @@ class IRISVectorDB:
             logger.error(f"Error creating index: {e}")
             raise
 
+    def create_document_table(self):
+        """Create the document-level table holding one centroid vector per document."""
+        create_table_sql = f"""
+        CREATE TABLE IF NOT EXISTS FNBrno.Documents (
+            ID INTEGER PRIMARY KEY AUTO_INCREMENT,
+            DocumentName VARCHAR(500),
+            DocumentType VARCHAR(50),
+            Department VARCHAR(200),
+            ChunkCount INTEGER,
+            DocumentVector VECTOR(DOUBLE, {self.settings.embedding_dimension})
+        )
+        """
+
+        try:
+            self.cursor.execute(create_table_sql)
+            self.conn.commit()
+            logger.info("Document table created successfully")
+        except Exception as e:
+            logger.error(f"Error creating document table: {e}")
+            raise
+
+    def create_document_index(self):
+        """Create HNSW index over document centroid vectors."""
+        try:
+            self.cursor.execute("DROP INDEX DocHNSWIndex ON FNBrno.Documents")
+            self.conn.commit()
+        except:
+            pass  # Index doesn't exist, that's fine
+
+        create_index_sql = """
+        CREATE INDEX DocHNSWIndex
+        ON FNBrno.Documents (DocumentVector)
+        AS HNSW(Distance='Cosine')
+        """
+
+        try:
+            self.cursor.execute(create_index_sql)
+            self.conn.commit()
+            logger.info("Document HNSW index created successfully")
+        except Exception as e:
+            logger.error(f"Error creating document index: {e}")
+            raise
+
+    def insert_documents(self, documents: List[dict]):
+        """
+        Replace document-level rows for the given documents.
+
+        Args:
+            documents: List of dicts with keys: document_name, document_type,
+                       department, chunk_count, embedding
+        """
+        delete_sql = "DELETE FROM FNBrno.Documents WHERE DocumentName = ?"
+        insert_sql = """
+        INSERT INTO FNBrno.Documents
+        (DocumentName, DocumentType, Department, ChunkCount, DocumentVector)
+        VALUES (?, ?, ?, ?, TO_VECTOR(?))
+        """
+
+        try:
+            self.cursor.executemany(delete_sql, [(doc['document_name'],) for doc in documents])
+            rows = [
+                (
+                    doc['document_name'],
+                    doc['document_type'],
+                    doc.get('department', ''),
+                    doc['chunk_count'],
+                    str(doc['embedding'].tolist())
+                )
+                for doc in documents
+            ]
+            self.cursor.executemany(insert_sql, rows)
+            self.conn.commit()
+            logger.info(f"Inserted {len(documents)} document vectors successfully")
+        except Exception as e:
+            logger.error(f"Error inserting document vectors: {e}")
+            raise
+
     def insert_chunks(self, chunks: List[dict]):
         """
         Insert document chunks with embeddings into the database.
 
         Args:
             chunks: List of dicts with keys: document_name, document_type,
-                    chunk_text, chunk_index, department, process_owner, embedding
+                    chunk_text, chunk_index, department, process_owner,
+                    token_count, embedding
         """
         insert_sql = """
         INSERT INTO FNBrno.DocumentChunks
-        (DocumentName, DocumentType, ChunkText, ChunkIndex, Department, ProcessOwner, ChunkVector)
-        VALUES (?, ?, ?, ?, ?, ?, TO_VECTOR(?))
+        (DocumentName, DocumentType, ChunkText, ChunkIndex, Department, ProcessOwner, TokenCount, ChunkVector)
+        VALUES (?, ?, ?, ?, ?, ?, ?, TO_VECTOR(?))
         """
 
         try:
@@ -105,6 +200,7 @@ class IRISVectorDB:
                     chunk['chunk_index'],
                     chunk.get('department', ''),
                     chunk.get('process_owner', ''),
+                    chunk.get('token_count'),
                     str(chunk['embedding'].tolist())
                 )
                 for chunk in chunks
@@ -121,7 +217,8 @@ class IRISVectorDB:
         self,
         query_vector: List[float],
         top_k: int = 5,
-        min_score: float = 0.0
+        min_score: float = 0.0,
+        document_names: Optional[List[str]] = None
     ) -> List[Tuple]:
         """
         Perform vector similarity search.
@@ -130,11 +227,21 @@ class IRISVectorDB:
             query_vector: Embedding vector of the query
             top_k: Number of top results to return
             min_score: Minimum relevance score threshold
+            document_names: Restrict the search to chunks of these documents
 
         Returns:
             List of tuples: (id, document_name, chunk_text, department,
-                           process_owner, relevance_score)
+                           process_owner, relevance_score, chunk_index,
+                           token_count)
         """
+        if document_names is not None and not document_names:
+            return []
+
+        document_filter = ""
+        if document_names:
+            placeholders = ", ".join("?" for _ in document_names)
+            document_filter = f"AND DocumentName IN ({placeholders})"
+
         # Use IRIS vector search syntax: TO_VECTOR(?, double) with lowercase double
         search_sql = f"""
         SELECT TOP {top_k}
@@ -143,20 +250,133 @@ class IRISVectorDB:
             ChunkText,
             Department,
             ProcessOwner,
-            VECTOR_COSINE(ChunkVector, TO_VECTOR(?, double)) AS RelevanceScore
+            VECTOR_COSINE(ChunkVector, TO_VECTOR(?, double)) AS RelevanceScore,
+            ChunkIndex,
+            TokenCount
         FROM FNBrno.DocumentChunks
         WHERE VECTOR_COSINE(ChunkVector, TO_VECTOR(?, double)) >= ?
+        {document_filter}
         ORDER BY RelevanceScore DESC
         """
 
         try:
             vector_str = str(query_vector)
-            self.cursor.execute(search_sql, [vector_str, vector_str, min_score])
-            results = self.cursor.fetchall()
-            logger.info(f"Vector search returned {len(results)} results")
+            params = [vector_str, vector_str, min_score] + list(document_names or [])
+            with span("sql", statement="vector_search", top_k=top_k) as sql_span:
+                self.cursor.execute(search_sql, params)
+                results = self.cursor.fetchall()
+                sql_span.set_attribute("rows", len(results))
+            logger.info("Vector search returned %s results", len(results))
             return results
         except Exception as e:
             logger.error(f"Error performing vector search: {e}")
+            record_error("iris")
+            raise
+
+    def document_search(
+        self,
+        query_vector: List[float],
+        top_n: int = 8,
+        allowed_files: Optional[List[str]] = None
+    ) -> List[Tuple]:
+        """
+        Select the documents whose centroid vectors are closest to the query.
+
+        Args:
+            query_vector: Embedding vector of the query
+            top_n: Number of documents to return
+            allowed_files: Restrict to documents the user may see
+
+        Returns:
+            List of tuples: (document_name, relevance_score)
+        """
+        if allowed_files is not None and not allowed_files:
+            return []
+
+        document_filter = ""
+        if allowed_files:
+            placeholders = ", ".join("?" for _ in allowed_files)
+            document_filter = f"WHERE DocumentName IN ({placeholders})"
+
+        search_sql = f"""
+        SELECT TOP {top_n}
+            DocumentName,
+            VECTOR_COSINE(DocumentVector, TO_VECTOR(?, double)) AS RelevanceScore
+        FROM FNBrno.Documents
+        {document_filter}
+        ORDER BY RelevanceScore DESC
+        """
+
+        try:
+            params = [str(query_vector)] + list(allowed_files or [])
+            with span("sql", statement="document_search", top_n=top_n) as sql_span:
+                self.cursor.execute(search_sql, params)
+                results = self.cursor.fetchall()
+                sql_span.set_attribute("rows", len(results))
+            logger.info("Document search returned %s documents", len(results))
+            return results
+        except Exception as e:
+            logger.error(f"Error performing document search: {e}")
+            record_error("iris")
+            raise
+
+    def get_chunk_vectors(self, chunk_ids: List[int]) -> Dict[int, np.ndarray]:
+        """
+        Fetch stored embeddings for the given chunk IDs.
+
+        Args:
+            chunk_ids: Chunk primary keys
+
+        Returns:
+            Dict mapping chunk ID to float32 vector
+        """
+        if not chunk_ids:
+            return {}
+
+        placeholders = ", ".join("?" for _ in chunk_ids)
+        select_sql = f"SELECT ID, ChunkVector FROM FNBrno.DocumentChunks WHERE ID IN ({placeholders})"
+
+        try:
+            with span("sql", statement="get_chunk_vectors") as sql_span:
+                self.cursor.execute(select_sql, list(chunk_ids))
+                rows = self.cursor.fetchall()
+                sql_span.set_attribute("rows", len(rows))
+            return {row[0]: parse_vector_string(row[1]) for row in rows}
+        except Exception as e:
+            logger.error(f"Error fetching chunk vectors: {e}")
+            record_error("iris")
+            raise
+
+    def iter_chunks(self, batch_size: int = 500, include_vectors: bool = True) -> Iterator[Tuple]:
+        """
+        Stream all stored chunks ordered by ID.
+
+        Args:
+            batch_size: Number of rows fetched per round trip
+            include_vectors: Whether to include the embedding column
+
+        Yields:
+            Tuples: (id, document_name, document_type, chunk_text, chunk_index,
+                     department, process_owner[, vector_string])
+        """
+        vector_column = ", ChunkVector" if include_vectors else ""
+        select_sql = f"""
+        SELECT ID, DocumentName, DocumentType, ChunkText, ChunkIndex,
+               Department, ProcessOwner{vector_column}
+        FROM FNBrno.DocumentChunks
+        ORDER BY ID
+        """
+
+        try:
+            self.cursor.execute(select_sql)
+            while True:
+                rows = self.cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        except Exception as e:
+            logger.error(f"Error reading chunks: {e}")
             raise
 
     def get_chunk_count(self) -> int:
@@ -167,6 +387,7 @@ class IRISVectorDB:
             return count
         except Exception as e:
             logger.error(f"Error getting chunk count: {e}")
+            record_error("iris")
             return 0
 
     def clear_all_data(self):
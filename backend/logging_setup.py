@@ -0,0 +1,156 @@
+"""
+Logging configuration for the backend.
+
+Records are handed to a bounded in-memory queue and written by a
+QueueListener thread, so formatting, redaction and I/O never run on the
+request path. Messages use lazy %-style arguments and are only rendered in
+the listener. Prompt dumps go through log_prompt(), which samples them per
+intent category and caps their size; the handler filter redacts patient
+identifiers (FHIR search parameters, birth numbers, dates of birth,
+contacts) from every message.
+"""
+
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from config import get_settings
+from metrics import record_error
+from redaction import redact_phi
+from tracing import current_trace_id
+
+logger = logging.getLogger(__name__)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cap text at max_chars, noting how much was cut."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [+{len(text) - max_chars} chars]"
+
+
+class RedactionFilter(logging.Filter):
+    """Renders the message once, then caps its size and redacts PHI."""
+
+    def __init__(self, max_chars: int, redact: bool = True):
+        super().__init__()
+        self.max_chars = max_chars
+        self.redact = redact
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = truncate(record.getMessage(), self.max_chars)
+        if self.redact:
+            message = redact_phi(message)
+        record.msg = message
+        record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with trace id when available."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        trace_id = getattr(record, 'trace_id', None)
+        if trace_id:
+            entry['trace_id'] = trace_id
+        if record.exc_text or record.exc_info:
+            entry['exception'] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueues records without formatting them and drops them when full.
+
+    The stock QueueHandler renders the message in the calling thread;
+    here that is left to the listener. Exception info is rendered eagerly
+    because the traceback must be captured while it exists.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.trace_id = current_trace_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            record_error("logging")
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(settings) -> None:
+    """
+    Route all logging through a background queue listener.
+
+    Args:
+        settings: Application settings (log_level, log_format, log_queue_size,
+                  log_max_chars, log_redact_phi)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    output.addFilter(RedactionFilter(settings.log_max_chars, settings.log_redact_phi))
+
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_prompt(log: logging.Logger, category: str, label: str, text: Any) -> None:
+    """
+    Log a prompt or model output, sampled per category.
+
+    Nothing is formatted unless the sample is taken; the rate comes from
+    Settings.prompt_log_sample_rates (missing categories use "default").
+
+    Args:
+        log: Logger to write to
+        category: Intent category value or call site ("router", ...)
+        label: What is being logged, e.g. "User Message"
+        text: Prompt or output (rendered with str())
+    """
+    if not log.isEnabledFor(logging.INFO):
+        return
+    rates: Dict[str, float] = get_settings().prompt_log_sample_rates
+    rate = rates.get(category, rates.get("default", 0.0))
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return
+    log.info("%s [%s]:\n%s", label, category, text)
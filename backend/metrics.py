@@ -0,0 +1,256 @@
+"""
+In-process metrics exposed in Prometheus text format.
+
+Stage latencies are recorded with ``timed(stage)``; each observation also
+goes into the current request's Server-Timing entries. Recording is a
+bisect plus a dict update under a lock, so it is cheap enough for the hot
+path and needs no external client library.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from tracing import span
+
+# Seconds; covers in-memory lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+            for labels, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative histogram with optional labels."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last = +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labelvalues] = series
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, [list(series[0]), series[1], series[2]])
+                           for labels, series in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "fnbrno_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "fnbrno_stage_duration_seconds", "Latency of request processing stages", ("stage",)
+))
+LLM_CALLS = REGISTRY.register(Counter(
+    "fnbrno_llm_calls_total", "LLM API calls", ("model", "call_site")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "fnbrno_llm_tokens_total", "LLM tokens by type (input, cached, output)", ("model", "call_site", "type")
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "fnbrno_cache_requests_total", "Cache lookups by result (hit, miss)", ("cache", "result")
+))
+CACHE_SAVED_SECONDS = REGISTRY.register(Counter(
+    "fnbrno_cache_saved_seconds_total", "Estimated upstream latency avoided by cache hits", ("cache",)
+))
+ERRORS = REGISTRY.register(Counter(
+    "fnbrno_errors_total", "Errors by component", ("component",)
+))
+FHIR_EXTRACTIONS = REGISTRY.register(Counter(
+    "fnbrno_fhir_parameter_extraction_total", "FHIR lookups by how search parameters were extracted (rules, llm)",
+    ("path",)
+))
+
+
+def record_llm_usage(call_site: str, model: str, input_tokens: int, output_tokens: int, cached_tokens: int) -> None:
+    """Count one LLM call; the prompt cache ratio is cached / input tokens."""
+    LLM_CALLS.inc(model, call_site)
+    LLM_TOKENS.inc(model, call_site, "input", amount=input_tokens)
+    LLM_TOKENS.inc(model, call_site, "output", amount=output_tokens)
+    LLM_TOKENS.inc(model, call_site, "cached", amount=cached_tokens)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def record_cache_saved(cache: str, seconds: float) -> None:
+    CACHE_SAVED_SECONDS.inc(cache, amount=seconds)
+
+
+def record_error(component: str) -> None:
+    ERRORS.inc(component)
+
+
+def record_fhir_extraction(path: str) -> None:
+    FHIR_EXTRACTIONS.inc(path)
+
+
+# ----- Per-request stage timings (Server-Timing) -----
+
+_server_timing: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timing", default=None)
+
+
+def start_server_timing() -> List[Tuple[str, float]]:
+    """Open a fresh list of stage timings for the current request."""
+    entries: List[Tuple[str, float]] = []
+    _server_timing.set(entries)
+    return entries
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage)
+    entries = _server_timing.get()
+    if entries is not None:
+        entries.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Measure a block as a processing stage (also traced as a span)."""
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def server_timing_header(entries: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Format stage timings as a Server-Timing header value (milliseconds)."""
+    durations: Dict[str, float] = {}
+    for stage, seconds in entries:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and adding Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        entries = start_server_timing()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                value = server_timing_header(entries, time.perf_counter() - start)
+                headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope.get("method", ""),
+                getattr(route, "path", "unmatched"),
+                str(status["code"])
+            )
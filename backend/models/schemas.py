@@ -121,6 +121,8 @@ class ChatResponse(BaseModel):
     sources: List[SourceReference]  # Empty if used_rag=False
     processing_time: float
     action_type: Optional[ActionType] = None  # Optional action to trigger in frontend
+    prompt_tokens: Optional[int] = None  # Input tokens across all LLM calls for this request
+    trace_id: Optional[str] = None  # Trace of this request (see scripts/trace_waterfall.py)
 
 
 # Authentication models
@@ -0,0 +1,120 @@
+"""
+Token-budgeted assembly of retrieved chunks into LLM context.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+from ingestion.tokens import count_tokens, truncate_to_tokens
+from models.schemas import IntentCategory
+
+logger = logging.getLogger(__name__)
+
+NO_CONTEXT_MESSAGE = "Nebyly nalezeny žádné relevantní dokumenty."
+CHUNK_SEPARATOR = "\n\n"
+
+
+def format_chunk_header(idx: int, chunk: Dict) -> str:
+    """Header placed before each chunk in the LLM context."""
+    header = f"--- Dokument {idx}: {chunk['document_name']} ---\n"
+
+    if chunk.get('department'):
+        header += f"Oddělení: {chunk['department']}\n"
+
+    if chunk.get('process_owner'):
+        header += f"Vlastník procesu: {chunk['process_owner']}\n"
+
+    header += f"Relevance: {chunk['relevance_score']:.2f}\n\n"
+    return header
+
+
+class ContextPacker:
+    """Fills a per-category token budget with chunks in relevance order."""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    def budget_for(self, category: Optional[IntentCategory]) -> int:
+        if category is not None:
+            budget = self.settings.context_token_budgets.get(category.value)
+            if budget is not None:
+                return budget
+        return self.settings.context_token_budget
+
+    def pack(self, chunks: List[Dict], category: Optional[IntentCategory] = None) -> Tuple[str, Dict]:
+        """
+        Build the context string within the category's token budget.
+
+        Chunks are taken in the given (relevance) order. A chunk that does
+        not fit is truncated (see truncate_to_tokens) when at least
+        context_min_chunk_tokens remain, otherwise dropped; later, shorter
+        chunks are still added while they fit.
+
+        Args:
+            chunks: Ranked chunks; 'token_count' is used when present
+            category: Intent category selecting the budget
+
+        Returns:
+            Tuple of (context string, stats dict with context_tokens, budget,
+            chunks_used, chunks_truncated, chunks_dropped, packed_chunks)
+        """
+        budget = self.budget_for(category)
+        stats = {
+            'budget': budget,
+            'context_tokens': 0,
+            'chunks_used': 0,
+            'chunks_truncated': 0,
+            'chunks_dropped': 0,
+            'packed_chunks': []
+        }
+
+        if not chunks:
+            stats['context_tokens'] = count_tokens(NO_CONTEXT_MESSAGE)
+            return NO_CONTEXT_MESSAGE, stats
+
+        separator_tokens = count_tokens(CHUNK_SEPARATOR)
+        parts = []
+        used = 0
+
+        for chunk in chunks:
+            text = chunk['chunk_text']
+            text_tokens = chunk.get('token_count') or count_tokens(text)
+            free = budget - used
+            if text_tokens >= free and free < self.settings.context_min_chunk_tokens:
+                # Neither fits whole nor leaves room to truncate, whatever its header
+                stats['chunks_dropped'] += 1
+                continue
+
+            header = format_chunk_header(len(parts) + 1, chunk)
+            header_tokens = count_tokens(header) + (separator_tokens if parts else 0)
+            remaining = free - header_tokens
+
+            if text_tokens <= remaining:
+                parts.append(header + text)
+                used += header_tokens + text_tokens
+                stats['packed_chunks'].append(chunk)
+                continue
+
+            truncated = ""
+            if remaining >= self.settings.context_min_chunk_tokens:
+                truncated = truncate_to_tokens(text, remaining)
+            if truncated:
+                parts.append(header + truncated)
+                used += header_tokens + count_tokens(truncated)
+                stats['chunks_truncated'] += 1
+                stats['packed_chunks'].append({**chunk, 'chunk_text': truncated})
+            else:
+                stats['chunks_dropped'] += 1
+
+        stats['chunks_used'] = len(parts)
+        stats['context_tokens'] = used
+
+        if not parts:
+            return NO_CONTEXT_MESSAGE, stats
+
+        logger.info(
+            f"Packed {stats['chunks_used']} chunks into {used}/{budget} context tokens "
+            f"({stats['chunks_truncated']} truncated, {stats['chunks_dropped']} dropped)"
+        )
+        return CHUNK_SEPARATOR.join(parts), stats
@@ -0,0 +1,126 @@
+"""
+Post-retrieval diversification and de-duplication.
+
+TextChunker produces overlapping chunks, so neighbouring chunks of one
+document often fill the top results with near-identical text. Maximal
+marginal relevance picks a diverse subset, and consecutive chunks of the
+same document are merged into a single span with the overlap removed.
+"""
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Length of the chunk prefix used to locate the overlap in the previous chunk
+OVERLAP_PROBE_CHARS = 40
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    top_k: int,
+    lambda_mult: float = 0.7
+) -> List[int]:
+    """
+    Select candidates by maximal marginal relevance.
+
+    Args:
+        query_vector: Query embedding (dimension,)
+        candidate_vectors: Candidate embeddings (n, dimension)
+        top_k: Number of candidates to select
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Indices into candidate_vectors in selection order
+    """
+    n = candidate_vectors.shape[0]
+    if n == 0:
+        return []
+    top_k = min(top_k, n)
+
+    candidates = candidate_vectors / np.maximum(np.linalg.norm(candidate_vectors, axis=1, keepdims=True), 1e-12)
+    query = query_vector / max(np.linalg.norm(query_vector), 1e-12)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything already selected
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < top_k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return selected
+
+
+def _merge_texts(first: str, second: str, max_overlap: int) -> str:
+    """Concatenate two consecutive chunk texts, dropping the shared overlap."""
+    probe = second[:OVERLAP_PROBE_CHARS]
+    if probe:
+        window_start = max(0, len(first) - max_overlap * 2)
+        position = first.find(probe, window_start)
+        while position != -1:
+            tail = first[position:]
+            if second.startswith(tail):
+                return first[:position] + second
+            position = first.find(probe, position + 1)
+    return first + "\n" + second
+
+
+def merge_adjacent_chunks(chunks: List[Dict], max_overlap: int = 100) -> List[Dict]:
+    """
+    Merge hits with consecutive chunk_index values from the same document.
+
+    The merged span takes the rank of its best member and the highest
+    relevance score; ``chunk_indices`` lists the merged chunk indices.
+
+    Args:
+        chunks: Ranked chunk dicts (need 'document_name' and 'chunk_index')
+        max_overlap: Overlap used by the chunker, in characters
+
+    Returns:
+        Ranked list of chunk dicts with adjacent spans merged
+    """
+    groups: Dict[tuple, List[Dict]] = {}
+    spans: List[Dict] = []
+
+    for rank, chunk in enumerate(chunks):
+        if chunk.get('chunk_index') is None:
+            spans.append({**chunk, '_rank': rank})
+            continue
+        groups.setdefault(chunk['document_name'], []).append({**chunk, '_rank': rank})
+
+    for members in groups.values():
+        members.sort(key=lambda chunk: chunk['chunk_index'])
+        current = None
+        for chunk in members:
+            if current is not None and chunk['chunk_index'] == current['chunk_indices'][-1] + 1:
+                current['chunk_text'] = _merge_texts(current['chunk_text'], chunk['chunk_text'], max_overlap)
+                current.pop('token_count', None)  # Recounted for the merged span
+                current['chunk_indices'].append(chunk['chunk_index'])
+                current['relevance_score'] = max(current.get('relevance_score', 0.0), chunk.get('relevance_score', 0.0))
+                if chunk.get('retrieval') != 'lexical':
+                    current.pop('retrieval', None)  # The span was also found by vector search
+                current['_rank'] = min(current['_rank'], chunk['_rank'])
+            else:
+                current = {**chunk, 'chunk_indices': [chunk['chunk_index']]}
+                spans.append(current)
+
+    spans.sort(key=lambda chunk: chunk['_rank'])
+    for span in spans:
+        del span['_rank']
+
+    if len(spans) < len(chunks):
+        logger.info("Merged %s chunks into %s spans", len(chunks), len(spans))
+    return spans
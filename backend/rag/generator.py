@@ -1,11 +1,20 @@
 from openai import OpenAI
+from openai.types.responses import ResponseFunctionToolCall
 from typing import List, Dict, Optional
+import json
 import logging
+import time
+import uuid
 from config import get_settings
 from models.schemas import Message, IntentCategory
-from rag.prompts import get_system_prompt, get_user_message
+from rag.prompts import get_system_prompt, build_prompt_input
 from fhir.tools import get_fhir_tools
 from fhir.executor import FHIRToolExecutor
+from fhir.extraction import extract_patient_search
+from metrics import record_fhir_extraction
+from usage import record_usage
+from tracing import span
+from logging_setup import log_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +24,7 @@ class ResponseGenerator:
 
     def __init__(self, fhir_tool_executor: Optional[FHIRToolExecutor] = None):
         self.settings = get_settings()
-        self.client = OpenAI(api_key=self.settings.openai_api_key)
+        self.client = OpenAI(api_key=self.settings.openai_api_key, base_url=self.settings.openai_base_url)
         self.fhir_tool_executor = fhir_tool_executor
 
     def generate_response(
@@ -24,7 +33,8 @@ class ResponseGenerator:
         context: Optional[str] = None,
         history: Optional[List[Message]] = None,
         category: IntentCategory = IntentCategory.GENERAL_RAG,
-        user_system_prompt: Optional[str] = None
+        user_system_prompt: Optional[str] = None,
+        history_summary: Optional[str] = None
     ) -> str:
         """
         Generate response using retrieved context, query, and conversation history.
@@ -33,69 +43,58 @@ class ResponseGenerator:
             query: User query
             context: Retrieved context from vector search (None if RAG not used)
             history: Conversation history (None for first message)
+            history_summary: Rolling summary of turns older than history
 
         Returns:
             Generated response
         """
         try:
-            # Format conversation history
-            formatted_history = self._format_history(history) if history else None
-            has_history = bool(formatted_history)
-            has_context = bool(context)
-
-            # Generate prompts using the prompts module
-            system_prompt = get_system_prompt(
-                has_context=has_context,
-                has_history=has_history,
-                formatted_history=formatted_history or "",
-                category=category,
-                user_system_prompt=user_system_prompt
-            )
-
-            user_message = get_user_message(
+            # Static instructions first, then user/role data, history, context and query
+            system_prompt = get_system_prompt(category)
+            input_items = build_prompt_input(
                 query=query,
                 context=context,
-                has_history=has_history,
+                history_items=self._history_items(history) if history else None,
+                user_system_prompt=user_system_prompt,
+                history_summary=history_summary
             )
+            cache_key = self._prompt_cache_key(category)
 
-            # Log the prompts being sent
-            logger.info("=" * 80)
-            logger.info("GENERATING RESPONSE")
-            logger.info("=" * 80)
-            logger.info(f"System Prompt:\n{system_prompt}")
-            logger.info("-" * 80)
-            logger.info(f"User Message:\n{user_message}")
-            logger.info("-" * 80)
+            # Log the prompts being sent (sampled per category)
+            logger.info("Generating %s response from %d input items", category.value, len(input_items))
+            log_prompt(logger, category.value, "Prompt input", input_items)
 
             # Handle FHIR tool calling for patient lookup
             if category == IntentCategory.FHIR_PATIENT_LOOKUP and self.fhir_tool_executor:
                 return self._generate_response_with_fhir_tools(
-                    system_prompt, user_message
+                    system_prompt, input_items, cache_key, query=query
                 )
 
             # Standard response generation (existing flow)
-            response = self.client.responses.create(
-                model=self.settings.openai_model,
-                instructions=system_prompt,
-                input=[
-                    {"role": "user", "content": user_message}
-                ],
-                max_output_tokens=1000,
-                reasoning={"effort": "minimal"}
-            )
+            with span("llm", call_site=f"generator.{category.value}", model=self.settings.openai_model):
+                start = time.perf_counter()
+                response = self.client.responses.create(
+                    model=self.settings.openai_model,
+                    instructions=system_prompt,
+                    input=input_items,
+                    prompt_cache_key=cache_key,
+                    max_output_tokens=1000,
+                    reasoning={"effort": "minimal"}
+                )
+                record_usage(f"generator.{category.value}", self.settings.openai_model, response,
+                             duration=time.perf_counter() - start)
 
             # Extract answer from the new response structure
             # The Responses API returns output_text directly
             answer = response.output_text
 
             # Log the response
-            logger.info(f"Generated Response:\n{answer}")
-            logger.info("=" * 80)
+            log_prompt(logger, category.value, "Generated Response", answer)
 
             return answer
 
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
+            logger.error("Error generating response: %s", e)
             raise
 
     def generate_response_with_sources(
@@ -130,7 +129,8 @@ class ResponseGenerator:
                 'relevance_score': chunk['relevance_score'],
                 'metadata': {
                     'department': chunk.get('department'),
-                    'process_owner': chunk.get('process_owner')
+                    'process_owner': chunk.get('process_owner'),
+                    'retrieval': chunk.get('retrieval')
                 }
             }
             for chunk in retrieved_chunks
@@ -141,18 +141,18 @@ class ResponseGenerator:
             'sources': sources
         }
 
-    def _format_history(self, messages: List[Message]) -> str:
+    def _history_items(self, messages: List[Message]) -> List[Dict[str, str]]:
         """
-        Format conversation history for inclusion in prompts.
+        Convert conversation history into Responses API input items.
 
         Args:
             messages: List of conversation messages
 
         Returns:
-            Formatted history string in Czech
+            Last max_history_messages messages as {"role", "content"} items
         """
         if not messages:
-            return ""
+            return []
 
         settings = get_settings()
         max_messages = settings.max_history_messages
@@ -160,21 +160,41 @@ class ResponseGenerator:
         # Take last N messages to manage token limits
         recent_messages = messages[-max_messages:]
 
-        formatted = []
-        for msg in recent_messages:
-            role = "Uživatel" if msg.role == "user" else "Asistent"
-            formatted.append(f"[{role}]: {msg.content}")
+        return [
+            {"role": "user" if msg.role == "user" else "assistant", "content": msg.content}
+            for msg in recent_messages
+        ]
 
-        return "\n".join(formatted)
+    def _prompt_cache_key(self, category: IntentCategory) -> str:
+        """Cache routing key shared by all requests with the same static prefix."""
+        return f"{self.settings.prompt_cache_key_prefix}-{category.value}"
 
-    def _generate_response_with_fhir_tools(self, system_prompt: str, user_message: str) -> str:
+    def _generate_response_with_fhir_tools(
+        self,
+        system_prompt: str,
+        input_items: List[Dict[str, str]],
+        cache_key: Optional[str] = None,
+        query: Optional[str] = None
+    ) -> str:
         """
         Generate response using FHIR tool calling with Responses API.
         Implementation based on official OpenAI documentation.
 
+        The model may call tools over several steps (e.g. find a patient,
+        then their conditions). All calls of one step run concurrently.
+        After fhir_tool_max_steps steps with tool calls the model has to
+        answer with what it has.
+
+        Simple lookups whose parameters the rules in fhir/extraction.py
+        understand are searched before the first LLM call; the search is
+        added to the input as if the model had called the tool, so that
+        call is skipped.
+
         Args:
-            system_prompt: System prompt for the LLM
-            user_message: User message
+            system_prompt: Static system prompt for the LLM
+            input_items: Prompt input items (role data, history, query)
+            cache_key: Prompt cache routing key
+            query: User query, for rule-based parameter extraction
 
         Returns:
             Generated response with FHIR data
@@ -183,110 +203,70 @@ class ResponseGenerator:
             logger.info("Generating response with FHIR tool calling using Responses API")
 
             # Create input list for conversation
-            input_list = [
-                {"role": "user", "content": user_message}
-            ]
-
-            # First call: LLM with tools to extract parameters and call FHIR
-            response = self.client.responses.create(
-                model=self.settings.openai_model,
-                instructions=system_prompt,
-                input=input_list,
-                tools=get_fhir_tools(),
-                max_output_tokens=1000,
-                reasoning={"effort": "minimal"}
-            )
-
-            # Debug logging
-            logger.info(f"Response output: {response.output}")
-            logger.info(f"Response output type: {type(response.output)}")
-            logger.info(f"Response output length: {len(response.output) if hasattr(response.output, '__len__') else 'N/A'}")
-
-            # Detailed debug of each item in output
-            for i, item in enumerate(response.output):
-                logger.info(f"Output item {i}: {type(item)} - {item}")
-                if hasattr(item, 'type'):
-                    logger.info(f"  Item type: {item.type}")
-                if hasattr(item, '__dict__'):
-                    logger.info(f"  Item attributes: {item.__dict__}")
-
-            # Save function call outputs for subsequent requests
-            input_list += response.output
-
-            # Check for function calls in response.output
-            function_calls_made = False
-            for item in response.output:
-                if hasattr(item, 'type') and item.type == "function_call":
-                    function_calls_made = True
-                    logger.info(f"Function call detected: {item.name} with arguments: {item.arguments}")
-
-                    if item.name == "search_fhir_patients":
-                        # Execute the FHIR search
-                        import json
-                        try:
-                            search_params = json.loads(item.arguments)
-                            logger.info(f"Executing FHIR search with params: {search_params}")
-
-                            # Handle special date formatting for Czech queries
-                            if 'birthdate' in search_params:
-                                birthdate = search_params['birthdate']
-                                # Handle Czech year format like "2022" for years 2022-2025
-                                if birthdate and birthdate.isdigit() and len(birthdate) == 4:
-                                    year = int(birthdate)
-                                    # For year range queries from user context
-                                    search_params['birthdate'] = f"ge{year}-01-01&le2025-12-31"
-                                    logger.info(f"Converted birthdate to range: {search_params['birthdate']}")
-
-                            # Execute search via FHIR client
-                            patients = self.fhir_tool_executor.fhir_client.search_patients(search_params)
-                            formatted_results = self.fhir_tool_executor.fhir_client.format_patients_for_czech_response(patients)
-
-                            logger.info(f"FHIR search results:\n{formatted_results}")
-
-                            # Provide function call results to the model
-                            input_list.append({
-                                "type": "function_call_output",
-                                "call_id": item.call_id,
-                                "output": json.dumps({
-                                    "patient_results": formatted_results
-                                })
-                            })
-
-                        except Exception as e:
-                            logger.error(f"Error executing FHIR search: {e}")
-                            import traceback
-                            logger.error(f"Full traceback: {traceback.format_exc()}")
-                            input_list.append({
-                                "type": "function_call_output",
-                                "call_id": item.call_id,
-                                "output": json.dumps({
-                                    "error": f"Chyba při vyhledávání pacientů: {str(e)}"
-                                })
-                            })
-
-            if function_calls_made:
-                # Second call: LLM with tool results to generate final response
-                logger.info("Making second call with function results")
-                final_response = self.client.responses.create(
-                    model=self.settings.openai_model,
-                    instructions=system_prompt,
-                    input=input_list,
-                    tools=get_fhir_tools(),
-                    max_output_tokens=1000,
-                    reasoning={"effort": "minimal"}
+            input_list = list(input_items)
+            max_steps = self.settings.fhir_tool_max_steps
+            first_step = 0
+
+            arguments = extract_patient_search(query) if query and self.settings.fhir_rule_extraction else None
+            record_fhir_extraction("rules" if arguments is not None else "llm")
+            if arguments is not None:
+                logger.info("FHIR search parameters extracted by rules (%s), skipping the tool-selection call",
+                            ", ".join(sorted(arguments)))
+                function_call = ResponseFunctionToolCall(
+                    type="function_call",
+                    call_id=f"call_rules_{uuid.uuid4().hex[:16]}",
+                    name="search_fhir_patients",
+                    arguments=json.dumps(arguments, ensure_ascii=False)
                 )
-
-                answer = final_response.output_text
-                logger.info(f"Final FHIR response:\n{answer}")
-                return answer
-            else:
+                input_list += [function_call] + self.fhir_tool_executor.function_call_outputs([function_call])
+                first_step = 1
+            last_step = max(max_steps, first_step)
+
+            for step in range(first_step, last_step + 1):
+                # First call extracts parameters; later calls see the tool results so far
+                call_site = "generator.fhir_tools" if step == 0 else "generator.fhir_final"
+                with span("llm", call_site=call_site, model=self.settings.openai_model, step=step):
+                    start = time.perf_counter()
+                    response = self.client.responses.create(
+                        model=self.settings.openai_model,
+                        instructions=system_prompt,
+                        input=input_list,
+                        tools=get_fhir_tools(),
+                        tool_choice="none" if step == last_step else "auto",
+                        prompt_cache_key=cache_key,
+                        max_output_tokens=1000,
+                        reasoning={"effort": "minimal"}
+                    )
+                    record_usage(call_site, self.settings.openai_model, response,
+                                 duration=time.perf_counter() - start)
+
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Response output item types: %s", [getattr(item, 'type', None) for item in response.output])
+
+                # Save function call outputs for subsequent requests
+                input_list += response.output
+
+                # Check for function calls in response.output
+                function_calls = [item for item in response.output if getattr(item, 'type', None) == "function_call"]
+                if not function_calls:
+                    break
+
+                for item in function_calls:
+                    logger.info("Function call detected: %s (step %d)", item.name, step + 1)
+
+                # Execute all calls of this step concurrently and provide the results to the model
+                input_list += self.fhir_tool_executor.function_call_outputs(function_calls)
+
+            if step == 0:
                 # No tools called, return direct response
                 logger.info("No function calls detected, returning direct response")
                 return response.output_text or "Nepodařilo se zpracovat dotaz."
 
+            answer = response.output_text
+            log_prompt(logger, IntentCategory.FHIR_PATIENT_LOOKUP.value, "Final FHIR response", answer)
+            return answer or "Nepodařilo se zpracovat dotaz."
+
         except Exception as e:
-            logger.error(f"Error in FHIR tool calling: {e}")
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            logger.exception("Error in FHIR tool calling: %s", e)
             # Fallback to error message
             return "Omlouváme se, při vyhledávání pacientů došlo k chybě. Zkuste prosím dotaz zformulovat jinak nebo kontaktujte technickou podporu."
@@ -0,0 +1,211 @@
+"""
+BM25 lexical retrieval over chunk texts with Czech-aware normalisation.
+
+Complements cosine search for exact hits on department acronyms (OIAK, OHTS,
+ÚVV), form names and person names, which embeddings tend to blur.
+"""
+
+import math
+import re
+import unicodedata
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Common Czech function words (diacritics already folded)
+CZECH_STOPWORDS = {
+    'a', 'aby', 'ale', 'ani', 'ano', 'asi', 'az', 'bez', 'bude', 'budou', 'by', 'byl',
+    'byla', 'byli', 'bylo', 'byt', 'co', 'do', 'i', 'jak', 'jake', 'jaky', 'jaka', 'je',
+    'jeho', 'jej', 'jen', 'jsem', 'jsou', 'k', 'kam', 'kde', 'kdo', 'kdy', 'ktera',
+    'ktere', 'kteri', 'ktery', 'ma', 'mam', 'me', 'mi', 'mit', 'mne', 'mohu', 'muj',
+    'muze', 'my', 'na', 'nad', 'nebo', 'neni', 'o', 'od', 'po', 'pod', 'pokud', 'pro',
+    'proc', 'pri', 's', 'se', 'si', 'sve', 'ta', 'tak', 'take', 'te', 'to', 'tu', 'u',
+    'uz', 'v', 've', 'vsak', 'z', 'za', 'ze'
+}
+
+# Inflectional endings, longest first; applied once to folded tokens
+CZECH_SUFFIXES = (
+    'atech', 'etem', 'atum', 'ovi', 'ami', 'emi', 'ach', 'ech', 'ich', 'ych', 'ymi',
+    'imi', 'ove', 'ovy', 'ova', 'eho', 'emu', 'ymu', 'imu', 'ou', 'em', 'om', 'am',
+    'ym', 'im', 'ho', 'mu', 'a', 'e', 'i', 'o', 'u', 'y'
+)
+MIN_STEM_LENGTH = 3
+
+
+def fold_diacritics(text: str) -> str:
+    """Lowercase and strip diacritics (ř -> r, ů -> u, ...)."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def czech_stem(token: str) -> str:
+    """
+    Light Czech stemmer: strip a single inflectional ending.
+
+    Tokens containing digits are returned unchanged.
+    """
+    if any(ch.isdigit() for ch in token):
+        return token
+    for suffix in CZECH_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalised index terms.
+
+    Short all-caps tokens (department acronyms like OIAK, ÚVV) are folded but
+    not stemmed, so they only match exactly.
+    """
+    terms = []
+    for raw in TOKEN_PATTERN.findall(text or ""):
+        folded = fold_diacritics(raw)
+        if folded in CZECH_STOPWORDS:
+            continue
+        if raw.isupper() and len(raw) <= 6:
+            terms.append(folded)
+        else:
+            terms.append(czech_stem(folded))
+    return terms
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks: List[Dict] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        self.avg_doc_length = 0.0
+        self.idf: Dict[str, float] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple], **kwargs) -> "BM25Index":
+        """
+        Build an index from vector store rows.
+
+        Args:
+            rows: Tuples as yielded by iter_chunks(include_vectors=False)
+        """
+        index = cls(**kwargs)
+        chunks = []
+        for row in rows:
+            chunk_id, doc_name, doc_type, chunk_text, chunk_index, department, process_owner = row[:7]
+            chunks.append({
+                'id': chunk_id,
+                'document_name': doc_name,
+                'chunk_text': chunk_text or '',
+                'chunk_index': chunk_index,
+                'department': department or '',
+                'process_owner': process_owner or ''
+            })
+        index.build(chunks)
+        return index
+
+    def build(self, chunks: List[Dict]):
+        """Index chunk dicts (document name and department are indexed with the text)."""
+        self.chunks = chunks
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+
+        for doc_idx, chunk in enumerate(chunks):
+            indexed_text = ' '.join([
+                chunk.get('document_name', ''),
+                chunk.get('department', ''),
+                chunk.get('chunk_text', '')
+            ])
+            terms = tokenize(indexed_text)
+            self.doc_lengths.append(len(terms))
+
+            term_freqs: Dict[str, int] = defaultdict(int)
+            for term in terms:
+                term_freqs[term] += 1
+            for term, tf in term_freqs.items():
+                self.postings[term].append((doc_idx, tf))
+
+        n_docs = len(chunks)
+        self.avg_doc_length = (sum(self.doc_lengths) / n_docs) if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        logger.info(f"Built BM25 index over {n_docs} chunks with {len(self.postings)} terms")
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed_files: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Score chunks against the query.
+
+        Args:
+            query: User query text
+            top_k: Number of results to return
+            allowed_files: Restrict results to these document names
+
+        Returns:
+            Chunk dicts with an added 'lexical_score', best first
+        """
+        if not self.chunks:
+            return []
+
+        allowed = set(allowed_files) if allowed_files is not None else None
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for doc_idx, tf in postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_idx] / self.avg_doc_length
+                scores[doc_idx] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+        results = []
+        for doc_idx, score in ranked:
+            chunk = self.chunks[doc_idx]
+            if allowed is not None and chunk['document_name'] not in allowed:
+                continue
+            results.append({**chunk, 'lexical_score': score})
+            if len(results) >= top_k:
+                break
+        return results
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60, top_k: int = 10) -> List[Dict]:
+    """
+    Merge ranked chunk lists with reciprocal rank fusion.
+
+    Chunks are matched by 'id'; fields from all lists are combined and the
+    fused score is stored as 'fusion_score'.
+
+    Args:
+        result_lists: Ranked lists of chunk dicts
+        k: RRF damping constant
+        top_k: Number of fused results to return
+
+    Returns:
+        Fused list of chunk dicts, best first
+    """
+    fused: Dict[int, Dict] = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, 1):
+            entry = fused.setdefault(chunk['id'], {**chunk, 'fusion_score': 0.0})
+            for key, value in chunk.items():
+                entry.setdefault(key, value)
+            entry['fusion_score'] += 1.0 / (k + rank)
+
+    ranked = sorted(fused.values(), key=lambda chunk: chunk['fusion_score'], reverse=True)
+    return ranked[:top_k]
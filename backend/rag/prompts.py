@@ -2,6 +2,8 @@
 Prompt templates for the FN Brno Virtual Assistant.
 """
 
+from typing import Dict, List
+
 from config import get_settings
 
 FORM_SUBMISSION_LINK = "https://docs.google.com/forms/d/e/1FAIpQLSeKlyskfuXlPit6OaQfiPoa7yIIkGNavCJIusXkmQvQDj6jMA/viewform?usp=publish-editor"
@@ -45,8 +47,8 @@ trip_expense (Vyúčtování cesty):
 PRAVIDLA PRO ROZPOZNÁNÍ VYHLEDÁVÁNÍ PACIENTA:
 
 fhir_patient_lookup (Hledání pacientů):
-- Klíčová slova: "najdi pacienta", "hledej pacienta", "vyhledej pacienty", "informace o pacientech", "pacienti s", "pacienty narozené", "ženy", "muži", "datum narození"
-- Kontext: Dotazy na konkrétní pacienty nebo skupiny pacientů podle demografických kritérií
+- Klíčová slova: "najdi pacienta", "hledej pacienta", "vyhledej pacienty", "informace o pacientech", "pacienti s", "pacienty narozené", "ženy", "muži", "datum narození", "diagnózy pacienta", "výsledky vyšetření", "hospitalizace"
+- Kontext: Dotazy na konkrétní pacienty nebo skupiny pacientů podle demografických kritérií a na jejich diagnózy, vyšetření a návštěvy
 - Příklady:
   * "Najdi pacienta jménem Jan Novák"
   * "Hledám informace o pacientce Marii Svobodové"
@@ -55,6 +57,8 @@ fhir_patient_lookup (Hledání pacientů):
   * "Pacienti narozené v roce 1985"
   * "Muži starší 40 let"
   * "Pacient s identifikátorem 12345"
+  * "Jaké diagnózy má pacient Jan Novák?"
+  * "Kteří pacienti mají diabetes?"
 
 UPOZORNĚNÍ:
 - Pokud se dotaz ptá "JAK to funguje?" nebo "CO musím udělat?" a nespadá do žádné z ostatních kategorií → general_rag (je to informační dotaz)
@@ -93,6 +97,41 @@ def get_routing_user_message(query: str, user_history: str = "") -> str:
         return ROUTING_USER_MESSAGE_NO_HISTORY.format(query=query)
 
 
+# ===== CONVERSATION SUMMARY PROMPTS =====
+
+SUMMARY_SYSTEM_PROMPT = """Shrnuješ konverzaci zaměstnance FN Brno s virtuálním asistentem.
+
+Vytvoř stručné průběžné shrnutí v češtině, které nahradí starší část konverzace:
+- Zachovej, na co se uživatel ptal, jeho záměr a důležitá fakta (jména, oddělení, data, čísla, odkazy)
+- Zachovej závěry a doporučené postupy z odpovědí asistenta, vynech formulace a opakování
+- Pokud existuje předchozí shrnutí, doplň ho o nové zprávy do jednoho celku
+- Nepřidávej nic, co v konverzaci nezaznělo
+- Maximálně 200 slov"""
+
+SUMMARY_USER_MESSAGE = """PŘEDCHOZÍ SHRNUTÍ:
+{previous_summary}
+
+NOVÉ ZPRÁVY:
+{messages}"""
+
+
+def get_summary_user_message(previous_summary: str, messages: str) -> str:
+    """
+    Generate user message for rolling conversation summarization.
+
+    Args:
+        previous_summary: Existing summary (may be empty)
+        messages: Formatted messages to fold into the summary
+
+    Returns:
+        Formatted summarization prompt
+    """
+    return SUMMARY_USER_MESSAGE.format(
+        previous_summary=previous_summary or "(žádné)",
+        messages=messages
+    )
+
+
 # ===== RESPONSE GENERATION PROMPTS =====
 
 BASE_SYSTEM_PROMPT = """Jsi virtuální asistent pro Fakultní nemocnici Brno (FN Brno).
@@ -139,35 +178,41 @@ KONTEXT: Uživatel chce VYÚČTOVAT pracovní cestu.
 - Neuvádej link na formulář - formulář se zobrazí automaticky"""
 
 FHIR_PATIENT_LOOKUP_EXTENSION = """
-KONTEXT: Uživatel chce vyhledat pacienty v FHIR databázi.
+KONTEXT: Uživatel chce vyhledat pacienty v FHIR databázi nebo jejich diagnózy, vyšetření a návštěvy.
 
 POVINNÉ KROKY:
-1. VŽDY NEJPRVE ZAVOLEJ nástroj search_fhir_patients
+1. VŽDY NEJPRVE ZAVOLEJ vyhledávací nástroj - pacienty hledej nástrojem search_fhir_patients
 2. Extrahuj vyhledávací parametry z českého dotazu:
    * jméno/příjmení (name, family, given)
    * datum narození (birthdate) - pro roky použij formát roku (např. "2022" pro rok 2022)
    * pohlaví (gender) - "male" pro muže, "female" pro ženy
    * identifikátor pacienta (identifier)
-3. Po získání výsledků ze search_fhir_patients prezentuj je v češtině
-4. Buď profesionální a respektuj citlivost pacientských dat
-5. Pokud vyhledávání nevrátí žádné výsledky, navrhni upresnění kritérií
-
-KRITICKY DŮLEŽITÉ: NIKDY neodpovídej bez volání search_fhir_patients!"""
-
-# Complete system prompt template
+3. Diagnózy, vyšetření a návštěvy:
+   * u konkrétních pacientů je načti spolu s pacienty parametrem include v search_fhir_patients (jeden dotaz)
+   * pro dotazy přes všechny pacienty (např. "kdo má diabetes") použij search_fhir_conditions, search_fhir_observations nebo search_fhir_encounters
+   * pokud už znáš ID záznamu pacientů, předej je v parametru patient (více ID oddělených čárkou v jednom volání)
+4. Nezávislá vyhledávání zavolej najednou v jednom kroku
+5. Po získání výsledků je prezentuj v češtině
+6. Buď profesionální a respektuj citlivost pacientských dat
+7. Pokud vyhledávání nevrátí žádné výsledky, navrhni upresnění kritérií
+
+KRITICKY DŮLEŽITÉ: NIKDY neodpovídej bez volání vyhledávacího nástroje!"""
+
+# Complete system prompt template (static per category so the provider can cache the prefix)
 SYSTEM_PROMPT_TEMPLATE = """{base_prompt}
-
-{user_system_prompt}{history_section}{extension}"""
+{extension}"""
 
 
-def get_system_prompt(has_context: bool, has_history: bool, formatted_history: str = "", category=None, user_system_prompt: str = None) -> str:
+def get_system_prompt(category=None) -> str:
     """
-    Generate system prompt for the FN Brno assistant.
+    Generate the static system prompt for the FN Brno assistant.
+
+    The result depends only on the category, so it forms a stable prompt
+    prefix that can hit the provider's prompt cache. Per-user data, history,
+    context and the query are sent as separate input items
+    (see build_prompt_input).
 
     Args:
-        has_context: Whether RAG context is provided
-        has_history: Whether conversation history is available
-        formatted_history: Formatted conversation history string
         category: IntentCategory for selecting appropriate prompt extension
 
     Returns:
@@ -175,11 +220,6 @@ def get_system_prompt(has_context: bool, has_history: bool, formatted_history: s
     """
     from models.schemas import IntentCategory
 
-    # Build history section
-    history_section = "HISTORIE KONVERZACE:\n{history}\n\n".format(
-        history=formatted_history
-    ) if has_history and formatted_history else ""
-
     # Default to GENERAL_RAG if no category specified
     if category is None:
         category = IntentCategory.GENERAL_RAG
@@ -196,16 +236,17 @@ def get_system_prompt(has_context: bool, has_history: bool, formatted_history: s
 
     return SYSTEM_PROMPT_TEMPLATE.format(
         base_prompt=BASE_SYSTEM_PROMPT,
-        history_section=history_section,
-        extension=extension,
-        user_system_prompt=user_system_prompt or ""
+        extension=extension
     )
 
 
-USER_MESSAGE_WITH_CONTEXT = """KONTEXT Z DOKUMENTŮ:
-{context}
+HISTORY_SUMMARY_MESSAGE = """SHRNUTÍ DŘÍVĚJŠÍ ČÁSTI KONVERZACE:
+{summary}"""
 
-OTÁZKA ZAMĚSTNANCE:
+CONTEXT_MESSAGE = """KONTEXT Z DOKUMENTŮ:
+{context}"""
+
+USER_MESSAGE_WITH_CONTEXT = """OTÁZKA ZAMĚSTNANCE:
 {query}
 
 Odpověz na otázku zaměstnance na základě výše uvedeného kontextu{history_note}."""
@@ -216,13 +257,13 @@ USER_MESSAGE_WITHOUT_CONTEXT = """OTÁZKA ZAMĚSTNANCE:
 Odpověz na otázku zaměstnance{basis}."""
 
 
-def get_user_message(query: str, context: str = None, has_history: bool = False) -> str:
+def get_user_message(query: str, has_context: bool = False, has_history: bool = False) -> str:
     """
-    Generate user message with optional context and history reference.
+    Generate the final user message with the query.
 
     Args:
         query: User's question
-        context: Retrieved RAG context (optional)
+        has_context: Whether a RAG context item precedes this message
         has_history: Whether conversation history exists
 
     Returns:
@@ -230,9 +271,8 @@ def get_user_message(query: str, context: str = None, has_history: bool = False)
     """
     history_note = " a historie konverzace" if has_history else ""
 
-    if context:
+    if has_context:
         return USER_MESSAGE_WITH_CONTEXT.format(
-            context=context,
             query=query,
             history_note=history_note
         )
@@ -242,3 +282,49 @@ def get_user_message(query: str, context: str = None, has_history: bool = False)
             query=query,
             basis=basis
         )
+
+
+def build_prompt_input(
+    query: str,
+    context: str = None,
+    history_items: List[Dict[str, str]] = None,
+    user_system_prompt: str = None,
+    history_summary: str = None
+) -> List[Dict[str, str]]:
+    """
+    Build Responses API input items ordered from most to least stable.
+
+    Order: user/role data, summary of older turns, recent conversation
+    history, retrieved context, query.
+    Together with the static instructions this keeps the longest possible
+    prefix identical between turns of the same user.
+
+    Args:
+        query: User's question
+        context: Retrieved RAG context (optional)
+        history_items: Previous turns as {"role", "content"} items
+        user_system_prompt: Per-user role description
+        history_summary: Rolling summary of turns no longer sent verbatim
+
+    Returns:
+        List of input items
+    """
+    items = []
+
+    if user_system_prompt:
+        items.append({"role": "developer", "content": user_system_prompt})
+
+    if history_summary:
+        items.append({"role": "developer", "content": HISTORY_SUMMARY_MESSAGE.format(summary=history_summary)})
+
+    if history_items:
+        items.extend(history_items)
+
+    if context:
+        items.append({"role": "user", "content": CONTEXT_MESSAGE.format(context=context)})
+
+    items.append({
+        "role": "user",
+        "content": get_user_message(query, has_context=bool(context), has_history=bool(history_items or history_summary))
+    })
+    return items
@@ -1,8 +1,15 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import logging
+import numpy as np
 from iris_db import IRISVectorDB
 from ingestion.embedder import EmbeddingGenerator
+from rag.lexical import BM25Index, reciprocal_rank_fusion
+from rag.diversity import mmr_select, merge_adjacent_chunks
+from rag.context import format_chunk_header, NO_CONTEXT_MESSAGE, CHUNK_SEPARATOR
 from config import get_settings
+from metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -10,19 +17,30 @@ logger = logging.getLogger(__name__)
 class VectorRetriever:
     """Handles vector search and retrieval from IRIS database."""
 
-    def __init__(self, db: IRISVectorDB, embedder: EmbeddingGenerator):
+    def __init__(self, db: IRISVectorDB, embedder: EmbeddingGenerator, lexical_index: Optional[BM25Index] = None):
         self.db = db
         self.embedder = embedder
+        self.lexical_index = lexical_index
         self.settings = get_settings()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retriever")
 
     def retrieve(self, query: str, top_k: int = None, min_score: float = None, allowed_files: List[str] = None) -> List[Dict]:
         """
         Retrieve relevant document chunks for a query.
 
+        With hybrid search enabled, vector and BM25 search run in parallel and
+        their rankings are merged with reciprocal rank fusion. Chunks found
+        only by BM25 are scored by the cosine similarity of their stored
+        vector, so min_score applies to them as well and their relevance is
+        comparable to vector hits; they are marked retrieval='lexical'. The
+        candidate pool is then diversified with MMR and consecutive chunks of the same
+        document are merged into single spans.
+
         Args:
             query: User query text
             top_k: Number of results to return (default from settings)
             min_score: Minimum relevance score (default from settings)
+            allowed_files: Document names the user may see (None = no restriction)
 
         Returns:
             List of retrieved chunks with metadata
@@ -33,43 +51,155 @@ class VectorRetriever:
         if min_score is None:
             min_score = self.settings.min_relevance_score
 
-        try:
-            # Generate query embedding
-            logger.info(f"Generating embedding for query: {query[:100]}...")
-            query_embedding = self.embedder.generate_embedding(query)
-
-            # Perform vector search
-            logger.info(f"Searching for top {top_k} results with min score {min_score}")
-            results = self.db.vector_search(
-                query_vector=query_embedding.tolist(),
-                top_k=top_k,
-                min_score=min_score
-            )
+        pool_size = max(top_k, self.settings.mmr_candidates) if self.settings.mmr_enabled else top_k
 
-            # Format results
-            retrieved_chunks = []
-            for result in results:
-                chunk = {
-                    'id': result[0],
-                    'document_name': result[1],
-                    'chunk_text': result[2],
-                    'department': result[3],
-                    'process_owner': result[4],
-                    'relevance_score': float(result[5])
-                }
-                if allowed_files is not None:
-                    if chunk['document_name'] in allowed_files:
-                        retrieved_chunks.append(chunk)
-
-            logger.info(f"Selected {len(retrieved_chunks)} out of {len(results)} results.")
-            logger.info(f"Filtering based on allowed files: {allowed_files}")
-            logger.info(f"Retrieved {len(retrieved_chunks)} relevant chunks")
+        try:
+            if self.lexical_index is None or not self.settings.hybrid_search:
+                query_embedding, candidates = self._embed_and_search(query, pool_size, min_score, allowed_files)
+            else:
+                hybrid_size = max(pool_size, self.settings.hybrid_candidates)
+                # Copy the context so request-scoped timings reach the worker thread
+                vector_future = self._executor.submit(
+                    contextvars.copy_context().run,
+                    self._embed_and_search, query, hybrid_size, min_score, allowed_files
+                )
+                with timed("lexical_search"):
+                    lexical_chunks = self.lexical_index.search(query, top_k=hybrid_size, allowed_files=allowed_files)
+                query_embedding, vector_chunks = vector_future.result()
+
+                candidates = reciprocal_rank_fusion(
+                    [vector_chunks, lexical_chunks],
+                    k=self.settings.rrf_k,
+                    top_k=pool_size
+                )
+                candidates = self._score_lexical_hits(query_embedding, candidates, min_score)
+
+                logger.info(
+                    f"Hybrid retrieval fused {len(vector_chunks)} vector and {len(lexical_chunks)} "
+                    f"lexical candidates into {len(candidates)} chunks"
+                )
+
+            with timed("mmr"):
+                retrieved_chunks = self._diversify(query_embedding, candidates, top_k)
+
+            if self.settings.merge_adjacent_chunks:
+                retrieved_chunks = merge_adjacent_chunks(retrieved_chunks, self.settings.chunk_overlap)
+
+            logger.info("Retrieved %s relevant chunks", len(retrieved_chunks))
             return retrieved_chunks
 
         except Exception as e:
             logger.error(f"Error during retrieval: {e}")
             raise
 
+    def _score_lexical_hits(self, query_embedding: List[float], candidates: List[Dict], min_score: float) -> List[Dict]:
+        """Give BM25-only candidates their cosine relevance and drop those below min_score."""
+        lexical_only = [chunk for chunk in candidates if 'relevance_score' not in chunk]
+        if not lexical_only:
+            return candidates
+
+        vectors = self.db.get_chunk_vectors([chunk['id'] for chunk in lexical_only])
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query)) or 1.0
+        scored = []
+        for chunk in candidates:
+            if 'relevance_score' not in chunk:
+                vector = vectors.get(chunk['id'])
+                if vector is None:
+                    continue
+                chunk['relevance_score'] = float(vector @ query) / ((float(np.linalg.norm(vector)) or 1.0) * query_norm)
+                chunk['retrieval'] = 'lexical'
+                if chunk['relevance_score'] < min_score:
+                    continue
+            scored.append(chunk)
+
+        logger.info("Scored %s lexical-only candidates, kept %s of %s",
+                    len(lexical_only), len(lexical_only) - len(candidates) + len(scored), len(lexical_only))
+        return scored
+
+    def _diversify(self, query_embedding: List[float], candidates: List[Dict], top_k: int) -> List[Dict]:
+        """Reduce the candidate pool to top_k chunks with maximal marginal relevance."""
+        if not self.settings.mmr_enabled or len(candidates) <= top_k:
+            return candidates[:top_k]
+
+        vectors = self.db.get_chunk_vectors([chunk['id'] for chunk in candidates])
+        with_vectors = [chunk for chunk in candidates if chunk['id'] in vectors]
+        if len(with_vectors) <= top_k:
+            return candidates[:top_k]
+
+        selected = mmr_select(
+            np.asarray(query_embedding, dtype=np.float32),
+            np.vstack([vectors[chunk['id']] for chunk in with_vectors]),
+            top_k=top_k,
+            lambda_mult=self.settings.mmr_lambda
+        )
+        logger.info("MMR selected %s of %s candidates", len(selected), len(with_vectors))
+        return [with_vectors[idx] for idx in selected]
+
+    def _vector_search(self, query: str, top_k: int, min_score: float, allowed_files: List[str] = None) -> List[Dict]:
+        """Embed the query and run cosine search restricted to allowed files."""
+        return self._embed_and_search(query, top_k, min_score, allowed_files)[1]
+
+    def _embed_and_search(
+        self,
+        query: str,
+        top_k: int,
+        min_score: float,
+        allowed_files: List[str] = None
+    ) -> Tuple[List[float], List[Dict]]:
+        """
+        Embed the query and run cosine search restricted to allowed files.
+
+        With two-stage retrieval enabled, the top documents by centroid
+        similarity are selected first and chunk search runs only within them.
+
+        Returns:
+            Tuple of (query embedding, retrieved chunks)
+        """
+        # Generate query embedding
+        logger.debug("Generating embedding for query: %.100s", query)
+        with timed("embedding"):
+            query_embedding = self.embedder.generate_embedding(query).tolist()
+
+        document_names = allowed_files
+        if self.settings.two_stage_retrieval:
+            with timed("document_prefilter"):
+                documents = self.db.document_search(
+                    query_vector=query_embedding,
+                    top_n=self.settings.prefilter_documents,
+                    allowed_files=allowed_files
+                )
+            document_names = [document[0] for document in documents]
+            logger.info("Prefiltered to %s documents: %s", len(document_names), document_names)
+
+        # Perform vector search
+        logger.info("Searching for top %s results with min score %s", top_k, min_score)
+        with timed("vector_search"):
+            results = self.db.vector_search(
+                query_vector=query_embedding,
+                top_k=top_k,
+                min_score=min_score,
+                document_names=document_names
+            )
+
+        # Format results
+        retrieved_chunks = []
+        for result in results:
+            chunk = {
+                'id': result[0],
+                'document_name': result[1],
+                'chunk_text': result[2],
+                'department': result[3],
+                'process_owner': result[4],
+                'relevance_score': float(result[5]),
+                'chunk_index': result[6],
+                'token_count': result[7]
+            }
+            retrieved_chunks.append(chunk)
+
+        logger.info("Vector search selected %s chunks", len(retrieved_chunks))
+        return query_embedding, retrieved_chunks
+
     def format_context_for_llm(self, chunks: List[Dict]) -> str:
         """
         Format retrieved chunks into context string for LLM.
@@ -81,22 +211,11 @@ class VectorRetriever:
             Formatted context string
         """
         if not chunks:
-            return "Nebyly nalezeny žádné relevantní dokumenty."
-
-        context_parts = []
-
-        for idx, chunk in enumerate(chunks, 1):
-            context_part = f"--- Dokument {idx}: {chunk['document_name']} ---\n"
-
-            if chunk.get('department'):
-                context_part += f"Oddělení: {chunk['department']}\n"
-
-            if chunk.get('process_owner'):
-                context_part += f"Vlastník procesu: {chunk['process_owner']}\n"
-
-            context_part += f"Relevance: {chunk['relevance_score']:.2f}\n\n"
-            context_part += chunk['chunk_text']
+            return NO_CONTEXT_MESSAGE
 
-            context_parts.append(context_part)
+        context_parts = [
+            format_chunk_header(idx, chunk) + chunk['chunk_text']
+            for idx, chunk in enumerate(chunks, 1)
+        ]
 
-        return "\n\n".join(context_parts)
+        return CHUNK_SEPARATOR.join(context_parts)
@@ -1,11 +1,16 @@
 import logging
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 from openai import OpenAI
 from pydantic import BaseModel, Field
 
 from models.schemas import Message, IntentCategory
 from config import get_settings
 from rag.prompts import ROUTING_SYSTEM_PROMPT, get_routing_user_message
+from rag.structured import ProcessTableStore
+from usage import record_usage
+from tracing import span
+from logging_setup import log_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +24,38 @@ class IntentClassification(BaseModel):
 class RAGRouter:
     """Routes queries to RAG retrieval or direct response based on LLM decision."""
 
-    def __init__(self):
-        """Initialize RAG router with OpenAI client."""
+    def __init__(self, process_tables: Optional[ProcessTableStore] = None):
+        """Initialize RAG router with OpenAI client and optional process table store."""
         settings = get_settings()
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
         self.model = settings.router_model
         self.reasoning_effort = settings.router_reasoning_effort
+        self.process_tables = process_tables
+        self.cache_key = f"{settings.prompt_cache_key_prefix}-router"
         logger.info(f"RAGRouter initialized with model: {self.model}")
 
+    def answer_structured(self, query: str, allowed_files: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Try to answer a process lookup/aggregate question from the XLSX tables.
+
+        Used for queries classified as GENERAL_RAG: a match skips vector
+        retrieval, and the returned rows become the context.
+
+        Args:
+            query: Current user query
+            allowed_files: Document names the user may see
+
+        Returns:
+            Structured result dict (see ProcessTableStore.answer) or None
+        """
+        if self.process_tables is None:
+            return None
+        try:
+            return self.process_tables.answer(query, allowed_files)
+        except Exception as e:
+            logger.error("Structured query error: %s, falling back to vector retrieval", e)
+            return None
+
     def should_use_rag(self, query: str, history: List[Message]) -> bool:
         """
         Decide whether RAG retrieval is needed for this query.
@@ -46,39 +75,33 @@ class RAGRouter:
             system_prompt = ROUTING_SYSTEM_PROMPT
             user_message = get_routing_user_message(query)
 
-            # Log the routing request
-            logger.info("=" * 80)
-            logger.info("RAG ROUTING DECISION")
-            logger.info("=" * 80)
-            logger.info(f"Query: {query}")
-            logger.info("-" * 80)
-            logger.info(f"Routing System Prompt:\n{system_prompt}")
-            logger.info("-" * 80)
-            logger.info(f"Routing User Message:\n{user_message}")
-            logger.info("-" * 80)
+            # Log the routing request (the static system prompt is never dumped)
+            log_prompt(logger, "router", "Routing User Message", user_message)
 
             # Call LLM for routing decision
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                max_completion_tokens=1000
-            )
+            with span("llm", call_site="router.should_use_rag", model=self.model):
+                start = time.perf_counter()
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_message}
+                    ],
+                    prompt_cache_key=self.cache_key,
+                    max_completion_tokens=1000
+                )
+                record_usage("router.should_use_rag", self.model, response,
+                             duration=time.perf_counter() - start)
 
             decision_text = response.choices[0].message.content.strip()
             needs_rag = "TRUE" in decision_text.upper()
 
-            # Log the routing decision
-            logger.info(f"LLM Decision: {decision_text}")
-            logger.info(f"Final Routing Decision: needs_rag={needs_rag}")
-            logger.info("=" * 80)
+            logger.info("Routing decision: needs_rag=%s (%s)", needs_rag, decision_text)
 
             return needs_rag
 
         except Exception as e:
-            logger.error(f"Error in routing decision: {e}")
+            logger.error("Error in routing decision: %s", e)
             # Default to TRUE (use RAG) on error as safe fallback
             logger.warning("Defaulting to RAG retrieval due to routing error")
             return True
@@ -102,37 +125,40 @@ class RAGRouter:
             user_message = get_routing_user_message(query, user_history)
 
             # Log routing request
-            logger.info("=" * 80)
-            logger.info("INTENT CLASSIFICATION")
-            logger.info("=" * 80)
-            logger.info(f"Query: {query}")
-            if user_history:
-                logger.info(f"User History: {user_history}")
-            logger.info("-" * 80)
-
-            # Use structured output with responses.parse()
-            response = self.client.responses.parse(
+            log_prompt(logger, "router", "Routing User Message", user_message)
+
+            # Use structured output with responses.parse(); the static routing
+            # prompt goes into instructions so it stays a cacheable prefix
+            request = dict(
                 model=self.model,
+                instructions=system_prompt,
                 input=[
-                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_message}
                 ],
+                prompt_cache_key=self.cache_key,
                 text_format=IntentClassification
             )
+            if self.reasoning_effort:
+                request["reasoning"] = {"effort": self.reasoning_effort}
+
+            with span("llm", call_site="router.classify", model=self.model):
+                start = time.perf_counter()
+                response = self.client.responses.parse(**request)
+                record_usage("router.classify", self.model, response,
+                             duration=time.perf_counter() - start)
 
             # Get structured output directly
             classification = response.output_parsed
             category = classification.category
 
-            logger.info(f"Classified as: {category.value}")
+            logger.info("Classified as: %s", category.value)
             if classification.confidence:
-                logger.info(f"Confidence: {classification.confidence}")
-            logger.info("=" * 80)
+                logger.debug("Classification confidence: %s", classification.confidence)
 
             return category
 
         except Exception as e:
-            logger.error(f"Classification error: {e}, defaulting to GENERAL_RAG")
+            logger.error("Classification error: %s, defaulting to GENERAL_RAG", e)
             return IntentCategory.GENERAL_RAG
 
     def _format_user_history(self, messages: List[Message], max_messages: int = 5) -> str:
@@ -0,0 +1,237 @@
+"""
+Columnar in-memory store for the process evaluation tables
+(``Zhodnocení procesů *.xlsx``).
+
+Lookup and aggregate questions ("kdo vlastní proces X", "jaké procesy má EO",
+"kolik procesů má OHTS") are answered directly from the table; the LLM only
+phrases the answer from the returned rows.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from ingestion.parsers import parse_document
+from rag.lexical import tokenize
+
+logger = logging.getLogger(__name__)
+
+PROCESS_FILE_PATTERN = "Zhodnocení procesů *.xlsx"
+OWNER_COLUMN = "Vlastník procesu"
+PROCESS_NAME_COLUMNS = ["Název procesu", "Proces", "Název", "Činnost"]
+
+# Query cues (already tokenized/stemmed via rag.lexical.tokenize)
+PROCESS_TERMS = {"proces"}
+OWNER_TERMS = {"vlastnik", "vlastn", "zodpovedn", "odpovid", "garant"}
+COUNT_TERMS = {"kolik", "pocet"}
+# Questions about the directive, form or regulation behind a process are answered from the documents
+DOCUMENT_TERMS = {"smernic", "formular", "predpis", "pokyn", "narizen", "zakon", "vyhlask"}
+# "řád" (organizational or operating rules) folds and stems to the same term as rada, rád and řada,
+# so it is matched as a whole word before folding
+RULES_DOCUMENT_PATTERN = re.compile(r"\břád(?:u|em|y|ů|ům|ech)?\b")
+
+MAX_CONTEXT_ROWS = 60
+
+
+def _terms(text: str) -> Set[str]:
+    return set(tokenize(str(text))) if text and str(text) != 'nan' else set()
+
+
+class ProcessTableStore:
+    """Process tables held in a pandas DataFrame with hash indexes on key columns."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame.reset_index(drop=True)
+        self.process_column = next((c for c in PROCESS_NAME_COLUMNS if c in self.frame.columns), None)
+
+        self.department_index: Dict[str, np.ndarray] = {}
+        self.process_index: Dict[str, np.ndarray] = {}
+        self.owner_index: Dict[str, np.ndarray] = {}
+        self._department_terms: Dict[str, Set[str]] = {}
+        self._process_terms: Dict[str, Set[str]] = {}
+        self._owner_terms: Dict[str, Set[str]] = {}
+
+        self._build_indexes()
+
+    @classmethod
+    def from_directory(cls, raw_data_dir: str) -> "ProcessTableStore":
+        """Parse all process XLSX files below raw_data_dir."""
+        frames = []
+        for path in sorted(Path(raw_data_dir).rglob(PROCESS_FILE_PATTERN)):
+            try:
+                parsed = parse_document(str(path))
+            except Exception as e:
+                logger.warning(f"Skipping process table {path.name}: {e}")
+                continue
+
+            frame = pd.DataFrame(parsed.get('structured_data', []))
+            if frame.empty:
+                continue
+            frame.insert(0, 'Oddělení', parsed['metadata'].get('department') or '')
+            frame.insert(0, 'Dokument', parsed['document_name'])
+            frames.append(frame)
+
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Dokument', 'Oddělení'])
+        store = cls(frame)
+        logger.info(
+            f"Loaded {len(store.frame)} process rows from {len(frames)} tables "
+            f"(process column: {store.process_column})"
+        )
+        return store
+
+    def _build_indexes(self):
+        """Group row positions by department, process name and owner."""
+        columns = [('Oddělení', self.department_index, self._department_terms)]
+        if self.process_column:
+            columns.append((self.process_column, self.process_index, self._process_terms))
+        if OWNER_COLUMN in self.frame.columns:
+            columns.append((OWNER_COLUMN, self.owner_index, self._owner_terms))
+
+        for column, index, terms in columns:
+            positions = defaultdict(list)
+            for position, value in enumerate(self.frame[column].tolist()):
+                if pd.isna(value) or not str(value).strip():
+                    continue
+                key = str(value).strip()
+                positions[key].append(position)
+            for key, rows in positions.items():
+                index[key] = np.asarray(rows, dtype=np.int64)
+                terms[key] = _terms(key)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    # ----- matching -----
+
+    @staticmethod
+    def _best_match(query_terms: Set[str], candidates: Dict[str, Set[str]], min_coverage: float) -> Optional[str]:
+        """Return the candidate whose terms are best covered by the query."""
+        best_key, best_score = None, 0.0
+        for key, terms in candidates.items():
+            if not terms:
+                continue
+            coverage = len(terms & query_terms) / len(terms)
+            # Prefer longer names on ties ("Kancelář ředitele" over "ředitel")
+            score = coverage + 0.01 * len(terms)
+            if coverage >= min_coverage and score > best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _rows(self, positions: np.ndarray, allowed_files: Optional[List[str]]) -> pd.DataFrame:
+        rows = self.frame.iloc[positions]
+        if allowed_files is not None:
+            rows = rows[rows['Dokument'].isin(allowed_files)]
+        return rows
+
+    def answer(self, query: str, allowed_files: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Answer a lookup/aggregate question from the tables.
+
+        Args:
+            query: User query text
+            allowed_files: Document names the user may see (None = no restriction)
+
+        Returns:
+            Dict with 'kind', 'rows' (DataFrame), 'context' and 'sources',
+            or None when the query is not a structured process question
+        """
+        if self.frame.empty:
+            return None
+
+        query_terms = _terms(query)
+        if not query_terms & (PROCESS_TERMS | OWNER_TERMS):
+            return None
+        if query_terms & DOCUMENT_TERMS or RULES_DOCUMENT_PATTERN.search(query.lower()):
+            return None
+
+        asks_owner = bool(query_terms & OWNER_TERMS) or bool(re.search(r"\bkdo\b", query.lower()))
+        asks_count = bool(query_terms & COUNT_TERMS)
+
+        department = self._best_match(query_terms, self._department_terms, min_coverage=1.0)
+        process = self._best_match(query_terms, self._process_terms, min_coverage=0.75)
+        owner = self._best_match(query_terms, self._owner_terms, min_coverage=0.6)
+
+        if process and asks_owner:
+            kind = 'process_owner'
+            rows = self._rows(self.process_index[process], allowed_files)
+        elif process:
+            kind = 'process_detail'
+            rows = self._rows(self.process_index[process], allowed_files)
+        elif department and asks_count:
+            kind = 'count_by_department'
+            rows = self._rows(self.department_index[department], allowed_files)
+        elif department:
+            kind = 'processes_by_department'
+            rows = self._rows(self.department_index[department], allowed_files)
+        elif owner and not asks_owner:
+            kind = 'processes_by_owner'
+            rows = self._rows(self.owner_index[owner], allowed_files)
+        elif asks_count and query_terms & PROCESS_TERMS:
+            kind = 'count_all'
+            rows = self._rows(np.arange(len(self.frame)), allowed_files)
+        else:
+            return None
+
+        if rows.empty:
+            return None
+
+        logger.info("Structured process query answered as %s with %s rows", kind, len(rows))
+        return {
+            'kind': kind,
+            'rows': rows,
+            'context': self._format_context(kind, rows),
+            'sources': self._format_sources(rows)
+        }
+
+    # ----- formatting -----
+
+    def _display_columns(self, kind: str, rows: pd.DataFrame) -> List[str]:
+        if kind in ('processes_by_department', 'processes_by_owner'):
+            preferred = ['Oddělení', self.process_column, OWNER_COLUMN]
+            return [c for c in preferred if c and c in rows.columns]
+        return [c for c in rows.columns if c != 'Dokument' and rows[c].notna().any()]
+
+    def _format_context(self, kind: str, rows: pd.DataFrame) -> str:
+        """Render matched rows as a compact table for the LLM."""
+        lines = [f"--- Tabulka procesů ({len(rows)} záznamů) ---"]
+
+        if kind in ('count_by_department', 'count_all'):
+            counts = rows.groupby('Oddělení').size().sort_values(ascending=False)
+            lines.append("Počet procesů podle oddělení:")
+            lines.extend(f"{department}: {count}" for department, count in counts.items())
+            lines.append(f"Celkem: {int(counts.sum())}")
+            return "\n".join(lines)
+
+        columns = self._display_columns(kind, rows)
+        lines.append(" | ".join(columns))
+        for _, row in rows.head(MAX_CONTEXT_ROWS).iterrows():
+            lines.append(" | ".join(
+                "" if pd.isna(row[c]) else str(row[c]).strip() for c in columns
+            ))
+        if len(rows) > MAX_CONTEXT_ROWS:
+            lines.append(f"... a dalších {len(rows) - MAX_CONTEXT_ROWS} záznamů")
+        return "\n".join(lines)
+
+    def _format_sources(self, rows: pd.DataFrame) -> List[Dict]:
+        """One source reference per matched document."""
+        sources = []
+        for document_name, group in rows.groupby('Dokument', sort=False):
+            first = group.iloc[0]
+            sources.append({
+                'document_name': document_name,
+                'chunk_text': ' | '.join(
+                    f"{c}: {first[c]}" for c in group.columns
+                    if c != 'Dokument' and pd.notna(first[c]) and str(first[c]).strip()
+                ),
+                'relevance_score': 1.0,
+                'metadata': {
+                    'department': first['Oddělení'],
+                    'process_owner': first.get(OWNER_COLUMN) if pd.notna(first.get(OWNER_COLUMN)) else None
+                }
+            })
+        return sources
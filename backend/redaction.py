@@ -0,0 +1,38 @@
+"""
+Masking of patient identifiers in free text.
+
+Shared by the log handlers and the trace exporter, so log lines and spans
+follow the same PHI rules.
+"""
+
+import re
+
+REDACTED = "[REDACTED]"
+
+# FHIR search parameters and patient fields that identify a person
+PHI_FIELDS = ("name", "family", "given", "identifier", "birthdate", "birthDate", "address",
+              "telecom", "phone", "email", "patient_results")
+_PHI_FIELD_PATTERN = "|".join(PHI_FIELDS)
+
+PHI_PATTERNS = [
+    # 'birthdate': ['ge1980-01-01', 'le1989-12-31'] for repeated parameters
+    (re.compile(rf"""(['"](?:{_PHI_FIELD_PATTERN})['"]\s*:\s*)\[[^\]]*\]"""), rf"\1'{REDACTED}'"),
+    # 'family': 'Novák' / "birthdate": "ge1980-01-01" in dict and JSON dumps
+    (re.compile(rf"""(['"](?:{_PHI_FIELD_PATTERN})['"]\s*:\s*)(['"])(?:\\.|(?!\2).)*\2"""), rf"\1\2{REDACTED}\2"),
+    # family=Novák&birthdate=... in URLs
+    (re.compile(rf"([?&](?:{_PHI_FIELD_PATTERN})=)[^&\s]*"), rf"\1{REDACTED}"),
+    # Czech birth number (rodné číslo)
+    (re.compile(r"\b\d{6}/?\d{3,4}\b"), REDACTED),
+    # Dates: 1980-05-15, 15.05.1980, 15. 5. 1980
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}\b"), REDACTED),
+    (re.compile(r"\b\d{1,2}\.\s?\d{1,2}\.\s?\d{4}\b"), REDACTED),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), REDACTED),
+    (re.compile(r"(?<!\d)(?:\+420\s?)?\d{3}\s?\d{3}\s?\d{3}(?!\d)"), REDACTED),
+]
+
+
+def redact_phi(text: str) -> str:
+    """Mask patient identifiers in text."""
+    for pattern, replacement in PHI_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
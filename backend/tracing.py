@@ -0,0 +1,244 @@
+"""
+Lightweight span-based request tracing.
+
+Each /chat request opens a trace; nested spans cover processing stages, LLM
+calls, SQL statements and FHIR HTTP calls. When the root span ends, all
+spans of the trace are handed to a bounded queue and appended to a JSONL
+file by a background thread, one span per line, using OpenTelemetry field
+names (traceId, spanId, parentSpanId, startTimeUnixNano, ...). Render a
+trace with scripts/trace_waterfall.py.
+
+Spans never carry query strings: URLs are recorded as scheme, host and
+path with a parameter count (see url_attributes()), and error messages are
+stripped of query strings and PHI-redacted before they are stored.
+
+Outside of a trace, span() is a no-op.
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from config import get_settings
+from redaction import redact_phi
+
+logger = logging.getLogger(__name__)
+
+# Query string of any URL embedded in an exception message
+_URL_QUERY = re.compile(r"((?:https?://|/)[^\s?'\"]*)\?[^\s'\"]*")
+
+
+def url_attributes(url: str, params: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Span attributes for a request URL without its query.
+
+    Search parameters identify patients (a Bundle next link carries the
+    whole search), so only scheme, host and path are kept, plus the number
+    of query parameters from the URL and `params` together.
+    """
+    parts = urlsplit(url)
+    count = len(parse_qsl(parts.query, keep_blank_values=True))
+    for value in (params or {}).values():
+        count += len(value) if isinstance(value, (list, tuple)) else 1
+    return {'url': f"{parts.scheme}://{parts.netloc}{parts.path}", 'query_params': count}
+
+
+def error_text(error: BaseException) -> str:
+    """Exception message safe to store in a span."""
+    return redact_phi(_URL_QUERY.sub(r"\1?[REDACTED]", f"{type(error).__name__}: {error}"))
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'status')
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id,
+            'name': self.name,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'attributes': self.attributes,
+            'status': self.status
+        }
+
+
+class _NoopSpan:
+    """Returned by span() when no trace is active."""
+
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans of one request."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished traces to a JSONL file on a background thread.
+
+    export() only enqueues the trace, so no file I/O runs on the request
+    path; traces arriving while the queue is full are dropped.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str, queue_size: int = 1000):
+        self.path = Path(path)
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace) -> None:
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        """Write the queued traces and stop the thread."""
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            trace = self.queue.get()
+            if trace is self._STOP:
+                return
+            self._write(trace)
+
+    def _write(self, trace: Trace) -> None:
+        lines = "".join(
+            json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+            for span in trace.spans
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Could not export trace {trace.trace_id}: {e}")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporter: Optional[JsonlSpanExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> Optional[JsonlSpanExporter]:
+    global _exporter
+    settings = get_settings()
+    if not settings.tracing_enabled:
+        return None
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = JsonlSpanExporter(settings.trace_file, settings.trace_queue_size)
+    return _exporter
+
+
+def shutdown_tracing() -> None:
+    """Flush queued traces and stop the exporter thread."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is not None:
+            _exporter.shutdown()
+            _exporter = None
+
+
+def current_span():
+    """Innermost active span, or a no-op span outside of a trace."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def current_trace_id() -> Optional[str]:
+    active = _current_span.get()
+    return active.trace.trace_id if active is not None else None
+
+
+@contextmanager
+def _run_span(active: Span) -> Iterator[Span]:
+    token = _current_span.set(active)
+    try:
+        yield active
+    except BaseException as e:
+        active.status = "ERROR"
+        active.attributes['error'] = error_text(e)
+        raise
+    finally:
+        active.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Any]:
+    """Open the root span of a new trace and export the trace when it ends."""
+    exporter = _get_exporter()
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+
+    trace = Trace()
+    root = Span(trace, name, None, attributes)
+    trace.spans.append(root)
+    try:
+        with _run_span(root):
+            yield root
+    finally:
+        exporter.export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Open a child span of the active span; no-op outside of a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    parent.trace.spans.append(child)
+    with _run_span(child):
+        yield child
@@ -0,0 +1,130 @@
+"""
+Per-request accounting of LLM token usage.
+
+Each /chat request opens a RequestUsage scope; router and generator calls
+record the usage block returned by the OpenAI API into it.
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from metrics import record_llm_usage
+from tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+
+class RequestUsage:
+    """Token usage of all LLM calls made while serving one request."""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self.context_tokens = 0
+
+    def add(self, call_site: str, model: str, input_tokens: int, output_tokens: int,
+            cached_tokens: int = 0, duration: Optional[float] = None):
+        self.calls.append({
+            'call_site': call_site,
+            'model': model,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'cached_tokens': cached_tokens,
+            'duration': duration
+        })
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(call['input_tokens'] for call in self.calls)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(call['output_tokens'] for call in self.calls)
+
+    @property
+    def cached_tokens(self) -> int:
+        return sum(call['cached_tokens'] for call in self.calls)
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider's prompt cache."""
+        return cached_ratio(self.cached_tokens, self.input_tokens)
+
+    @property
+    def llm_seconds(self) -> float:
+        return sum(call['duration'] or 0.0 for call in self.calls)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'llm_calls': len(self.calls),
+            'prompt_tokens': self.input_tokens,
+            'completion_tokens': self.output_tokens,
+            'cached_tokens': self.cached_tokens,
+            'cache_hit_rate': round(self.cache_hit_rate, 3),
+            'llm_seconds': round(self.llm_seconds, 3),
+            'context_tokens': self.context_tokens
+        }
+
+
+def cached_ratio(cached_tokens: int, input_tokens: int) -> float:
+    return cached_tokens / input_tokens if input_tokens else 0.0
+
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+def start_request_usage() -> RequestUsage:
+    """Open a fresh usage scope for the current request."""
+    usage = RequestUsage()
+    _current_usage.set(usage)
+    return usage
+
+
+def current_usage() -> Optional[RequestUsage]:
+    return _current_usage.get()
+
+
+def _read_usage(usage: Any) -> Dict[str, int]:
+    """Normalise usage from the Responses API or Chat Completions API."""
+    if usage is None:
+        return {'input_tokens': 0, 'output_tokens': 0, 'cached_tokens': 0}
+
+    input_tokens = getattr(usage, 'input_tokens', None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    output_tokens = getattr(usage, 'output_tokens', None)
+    if output_tokens is None:
+        output_tokens = getattr(usage, 'completion_tokens', 0) or 0
+
+    details = getattr(usage, 'input_tokens_details', None) or getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+
+    return {'input_tokens': input_tokens, 'output_tokens': output_tokens, 'cached_tokens': cached_tokens}
+
+
+def record_usage(call_site: str, model: str, response: Any, duration: Optional[float] = None) -> Dict[str, int]:
+    """
+    Record the usage of an OpenAI API response in the current request scope.
+
+    Args:
+        call_site: Logical caller, e.g. "router.classify" or "generator.fhir_final"
+        model: Model name used for the call
+        response: API response object exposing .usage
+        duration: Wall time of the call in seconds
+
+    Returns:
+        Normalised usage counts
+    """
+    counts = _read_usage(getattr(response, 'usage', None))
+    record_llm_usage(call_site, model, **counts)
+    current_span().set_attributes(**counts)
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(call_site, model, duration=duration, **counts)
+    logger.info(
+        "LLM usage [%s] %s: input=%d (cached=%d, %.0f%%) output=%d in %.2fs",
+        call_site, model, counts['input_tokens'], counts['cached_tokens'],
+        cached_ratio(counts['cached_tokens'], counts['input_tokens']) * 100,
+        counts['output_tokens'], duration or 0.0
+    )
+    return counts
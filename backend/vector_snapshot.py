@@ -0,0 +1,388 @@
+"""
+Versioned on-disk snapshot of the FNBrno.DocumentChunks vector table.
+
+Layout of one snapshot version directory:
+
+    manifest.json      format version, embedding model, dimension, row count
+    vectors.npy        float32 matrix (rows x dimension), L2-normalised
+    texts.bin          UTF-8 chunk texts concatenated without separators
+    text_offsets.npy   int64 offsets into texts.bin (rows + 1 entries)
+    chunks.json        per-chunk metadata (id, document, index, department, owner, tokens)
+
+The snapshot root holds a ``CURRENT`` file naming the active version. Readers
+open the matrix and texts with ``mmap`` in read-only mode, so several uvicorn
+workers share a single copy through the OS page cache.
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_settings
+from ingestion.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+CURRENT_POINTER = "CURRENT"
+
+
+def parse_vector_string(value) -> np.ndarray:
+    """Convert an IRIS vector column value ("0.1,0.2,..." or "[0.1, ...]") to float32."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value, dtype=np.float32)
+    return np.array(str(value).strip().strip('[]').split(','), dtype=np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_snapshot(
+    rows: Iterable[Tuple],
+    snapshot_root: str,
+    embedding_model: str,
+    dimension: int
+) -> Path:
+    """
+    Write chunk rows to a new snapshot version and make it current.
+
+    Args:
+        rows: Tuples as yielded by IRISVectorDB.iter_chunks(include_vectors=True)
+        snapshot_root: Directory holding snapshot versions
+        embedding_model: Name of the embedding model the vectors come from
+        dimension: Expected vector dimension
+
+    Returns:
+        Path to the written snapshot version directory
+    """
+    root = Path(snapshot_root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    version = datetime.now().strftime("%Y%m%dT%H%M%S")
+    tmp_dir = root / f".{version}.tmp"
+    final_dir = root / version
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir()
+
+    chunks_meta = []
+    offsets = [0]
+    vectors = []
+
+    with open(tmp_dir / "texts.bin", "wb") as texts_file:
+        for row in rows:
+            chunk_id, doc_name, doc_type, chunk_text, chunk_index, department, process_owner, vector = row
+            vector = parse_vector_string(vector)
+            if vector.shape[0] != dimension:
+                raise ValueError(
+                    f"Chunk {chunk_id} has dimension {vector.shape[0]}, expected {dimension}"
+                )
+
+            encoded = (chunk_text or "").encode("utf-8")
+            texts_file.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+            vectors.append(vector)
+            chunks_meta.append({
+                'id': chunk_id,
+                'document_name': doc_name,
+                'document_type': doc_type,
+                'chunk_index': chunk_index,
+                'department': department or '',
+                'process_owner': process_owner or '',
+                'token_count': count_tokens(chunk_text)
+            })
+
+    matrix = np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, dimension), dtype=np.float32)
+    np.save(tmp_dir / "vectors.npy", _normalize_rows(matrix).astype(np.float32))
+    np.save(tmp_dir / "text_offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+    with open(tmp_dir / "chunks.json", "w", encoding="utf-8") as f:
+        json.dump(chunks_meta, f, ensure_ascii=False)
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'embedding_model': embedding_model,
+        'dimension': dimension,
+        'count': len(chunks_meta)
+    }
+    with open(tmp_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp_dir, final_dir)
+
+    # Switch the CURRENT pointer atomically so running readers never see a partial version
+    pointer_tmp = root / f".{CURRENT_POINTER}.tmp"
+    pointer_tmp.write_text(version, encoding="utf-8")
+    os.replace(pointer_tmp, root / CURRENT_POINTER)
+
+    logger.info(f"Exported {len(chunks_meta)} chunks to snapshot {final_dir}")
+    return final_dir
+
+
+def resolve_snapshot_dir(snapshot_root: str, version: Optional[str] = None) -> Path:
+    """Return the directory of the requested (or current) snapshot version."""
+    root = Path(snapshot_root)
+    if version is None:
+        pointer = root / CURRENT_POINTER
+        if not pointer.exists():
+            raise FileNotFoundError(f"No current snapshot in {root}")
+        version = pointer.read_text(encoding="utf-8").strip()
+
+    snapshot_dir = root / version
+    if not (snapshot_dir / "manifest.json").exists():
+        raise FileNotFoundError(f"Snapshot version not found: {snapshot_dir}")
+    return snapshot_dir
+
+
+class VectorSnapshot:
+    """Read-only, memory-mapped view of one snapshot version."""
+
+    def __init__(self, snapshot_dir: Path):
+        self.path = Path(snapshot_dir)
+
+        with open(self.path / "manifest.json", "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot format {self.manifest.get('format_version')} in {self.path}"
+            )
+
+        with open(self.path / "chunks.json", "r", encoding="utf-8") as f:
+            self.chunks: List[Dict] = json.load(f)
+
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode='r')
+        self.offsets = np.load(self.path / "text_offsets.npy", mmap_mode='r')
+
+        self._texts_file = open(self.path / "texts.bin", "rb")
+        if os.path.getsize(self.path / "texts.bin") > 0:
+            self._texts = mmap.mmap(self._texts_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._texts = b""
+
+        logger.info(
+            f"Loaded snapshot {self.manifest['version']} with {len(self.chunks)} chunks "
+            f"({self.manifest['embedding_model']}, dim={self.manifest['dimension']})"
+        )
+
+    @classmethod
+    def open(cls, snapshot_root: str, version: Optional[str] = None) -> "VectorSnapshot":
+        return cls(resolve_snapshot_dir(snapshot_root, version))
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def get_text(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self._texts[start:end].decode("utf-8")
+
+    def iter_chunk_dicts(self) -> Iterator[Dict]:
+        """Yield chunk dicts in the format expected by IRISVectorDB.insert_chunks."""
+        for row, meta in enumerate(self.chunks):
+            yield {
+                'document_name': meta['document_name'],
+                'document_type': meta['document_type'],
+                'chunk_text': self.get_text(row),
+                'chunk_index': meta['chunk_index'],
+                'department': meta['department'],
+                'process_owner': meta['process_owner'],
+                'token_count': meta.get('token_count'),
+                'embedding': np.asarray(self.vectors[row], dtype=np.float64)
+            }
+
+    def close(self):
+        if isinstance(self._texts, mmap.mmap):
+            self._texts.close()
+        self._texts_file.close()
+
+
+class SnapshotVectorStore:
+    """
+    Drop-in replacement for IRISVectorDB backed by a memory-mapped snapshot.
+
+    Performs exact cosine search with NumPy over the shared vector matrix.
+    """
+
+    def __init__(self, snapshot_root: Optional[str] = None, version: Optional[str] = None):
+        self.settings = get_settings()
+        self.snapshot_root = snapshot_root or self.settings.snapshot_dir
+        self.version = version
+        self.snapshot: Optional[VectorSnapshot] = None
+        self.document_names: List[str] = []
+        self.document_vectors: Optional[np.ndarray] = None
+        self._document_rows: Dict[str, np.ndarray] = {}
+        self._id_rows: Dict[int, int] = {}
+
+    def connect(self):
+        """Open the snapshot files."""
+        try:
+            self.snapshot = VectorSnapshot.open(self.snapshot_root, self.version)
+            if self.snapshot.manifest['embedding_model'] != self.settings.embedding_model:
+                logger.warning(
+                    f"Snapshot embedding model {self.snapshot.manifest['embedding_model']} "
+                    f"differs from configured {self.settings.embedding_model}"
+                )
+            self._build_document_index()
+        except Exception as e:
+            logger.error(f"Failed to open vector snapshot: {e}")
+            raise
+
+    def _build_document_index(self):
+        """Group snapshot rows by document and compute centroid vectors."""
+        rows_by_document: Dict[str, List[int]] = {}
+        self._id_rows = {}
+        for row, meta in enumerate(self.snapshot.chunks):
+            self._id_rows[meta['id']] = row
+            rows_by_document.setdefault(meta['document_name'], []).append(row)
+
+        self.document_names = list(rows_by_document)
+        self._document_rows = {
+            name: np.asarray(rows, dtype=np.int64) for name, rows in rows_by_document.items()
+        }
+
+        dimension = self.snapshot.manifest['dimension']
+        centroids = np.zeros((len(self.document_names), dimension), dtype=np.float32)
+        for doc_idx, name in enumerate(self.document_names):
+            centroids[doc_idx] = self.snapshot.vectors[self._document_rows[name]].mean(axis=0)
+        self.document_vectors = _normalize_rows(centroids)
+
+    def disconnect(self):
+        """Release the memory maps."""
+        if self.snapshot:
+            self.snapshot.close()
+            self.snapshot = None
+        logger.info("Closed vector snapshot")
+
+    @staticmethod
+    def _normalize_query(query_vector: List[float]) -> np.ndarray:
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm > 0 else query
+
+    def vector_search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        min_score: float = 0.0,
+        document_names: Optional[List[str]] = None
+    ) -> List[Tuple]:
+        """
+        Perform exact cosine similarity search over the snapshot.
+
+        Args:
+            query_vector: Embedding vector of the query
+            top_k: Number of top results to return
+            min_score: Minimum relevance score threshold
+            document_names: Restrict the search to chunks of these documents
+
+        Returns:
+            List of tuples in the same shape as IRISVectorDB.vector_search
+        """
+        if not self.snapshot or len(self.snapshot) == 0:
+            return []
+
+        query = self._normalize_query(query_vector)
+
+        if document_names is not None:
+            row_groups = [self._document_rows[name] for name in document_names if name in self._document_rows]
+            if not row_groups:
+                return []
+            rows = np.concatenate(row_groups)
+            scores = self.snapshot.vectors[rows] @ query
+        else:
+            rows = None
+            scores = self.snapshot.vectors @ query
+
+        k = min(top_k, scores.shape[0])
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        results = []
+        for position in candidates:
+            score = float(scores[position])
+            if score < min_score:
+                break
+            row = int(rows[position]) if rows is not None else int(position)
+            meta = self.snapshot.chunks[row]
+            results.append((
+                meta['id'],
+                meta['document_name'],
+                self.snapshot.get_text(row),
+                meta['department'],
+                meta['process_owner'],
+                score,
+                meta['chunk_index'],
+                meta.get('token_count')
+            ))
+
+        logger.info("Snapshot vector search returned %s results", len(results))
+        return results
+
+    def get_chunk_vectors(self, chunk_ids: List[int]) -> Dict[int, np.ndarray]:
+        """Return stored (normalised) embeddings for the given chunk IDs."""
+        return {
+            chunk_id: np.asarray(self.snapshot.vectors[self._id_rows[chunk_id]])
+            for chunk_id in chunk_ids if chunk_id in self._id_rows
+        }
+
+    def document_search(
+        self,
+        query_vector: List[float],
+        top_n: int = 8,
+        allowed_files: Optional[List[str]] = None
+    ) -> List[Tuple]:
+        """
+        Select the documents whose centroid vectors are closest to the query.
+
+        Returns:
+            List of tuples: (document_name, relevance_score)
+        """
+        if self.document_vectors is None or not self.document_names:
+            return []
+
+        scores = self.document_vectors @ self._normalize_query(query_vector)
+        if allowed_files is not None:
+            allowed = set(allowed_files)
+            mask = np.array([name in allowed for name in self.document_names])
+            scores = np.where(mask, scores, -np.inf)
+
+        order = np.argsort(-scores)[:top_n]
+        return [
+            (self.document_names[idx], float(scores[idx]))
+            for idx in order if np.isfinite(scores[idx])
+        ]
+
+    def iter_chunks(self, batch_size: int = 500, include_vectors: bool = True) -> Iterator[Tuple]:
+        """Yield chunk rows in the same shape as IRISVectorDB.iter_chunks."""
+        for row, meta in enumerate(self.snapshot.chunks):
+            base = (
+                meta['id'],
+                meta['document_name'],
+                meta['document_type'],
+                self.snapshot.get_text(row),
+                meta['chunk_index'],
+                meta['department'],
+                meta['process_owner']
+            )
+            if include_vectors:
+                yield base + (self.snapshot.vectors[row],)
+            else:
+                yield base
+
+    def get_chunk_count(self) -> int:
+        """Get total number of chunks in the snapshot."""
+        return len(self.snapshot) if self.snapshot else 0
@@ -0,0 +1,14 @@
+"""
+Offline end-to-end load testing for the FN Brno backend.
+
+Boots backend/app.py against local stand-ins: an OpenAI-compatible server
+(fake_openai), a FHIR Patient server (fake_fhir) and a synthetic vector
+snapshot served by SnapshotVectorStore in place of IRIS. The driver sends a
+mix of /chat traffic across intent categories and writes latency,
+throughput and error rate as a JSON report.
+
+Usage (from the repository root):
+
+    python -m loadtest --requests 500 --concurrency 16 --output report.json
+    python -m loadtest --compare baseline.json report.json
+"""
@@ -0,0 +1,46 @@
+import argparse
+import json
+import sys
+
+from loadtest.driver import compare_reports, run_load_test
+from loadtest.workload import parse_mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /chat load test against local stand-ins")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="Compare two reports and exit")
+    parser.add_argument("--requests", type=int, default=200, help="Measured /chat requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests sent first")
+    parser.add_argument("--turns-per-session", type=int, default=3, help="Turns before a virtual user starts a new session")
+    parser.add_argument("--mix", type=parse_mix, default=None,
+                        help="Category weights, e.g. general_rag=0.6,fhir_patient_lookup=0.4")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765, help="Port for the backend under test")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Fake LLM time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Fake LLM delay per output token (s)")
+    parser.add_argument("--output-tokens", type=int, default=120, help="Fake LLM answer length in tokens")
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="Fake embedding latency (s)")
+    parser.add_argument("--fhir-latency", type=float, default=0.02, help="Fake FHIR latency (s)")
+    parser.add_argument("--patients", type=int, default=500, help="Synthetic patients on the fake FHIR server")
+    parser.add_argument("--dimension", type=int, default=256, help="Embedding dimension of the synthetic snapshot")
+    parser.add_argument("--chunks-per-document", type=int, default=20)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare_reports(*args.compare))
+        return
+
+    report = run_load_test(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
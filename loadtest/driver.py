@@ -0,0 +1,256 @@
+"""
+Boots the backend against the stand-ins and drives /chat traffic.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+from loadtest.fake_fhir import start_fake_fhir
+from loadtest.fake_openai import FakeOpenAIConfig, start_fake_openai
+from loadtest.fixtures import BACKEND_DIR, build_snapshot
+from loadtest.workload import Workload
+
+REPO_ROOT = BACKEND_DIR.parent
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    array = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(array, 50)), 4),
+        "p95": round(float(np.percentile(array, 95)), 4),
+        "p99": round(float(np.percentile(array, 99)), 4),
+        "mean": round(float(array.mean()), 4),
+        "max": round(float(array.max()), 4),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BackendProcess:
+    """uvicorn serving backend/app.py, configured through environment variables."""
+
+    def __init__(self, port: int, env: Dict[str, str], workers: int = 1):
+        self.port = port
+        self.env = env
+        self.workers = workers
+        self.process = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 120.0):
+        command = [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                   "--port", str(self.port), "--log-level", "warning", "--workers", str(self.workers)]
+        self.process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **self.env})
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Backend exited during startup with code {self.process.returncode}")
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError("Backend did not become healthy in time")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class LoadDriver:
+    """Sends requests from a fixed number of concurrent virtual users."""
+
+    def __init__(self, base_url: str, workload: Workload, turns_per_session: int = 3, timeout: float = 60.0):
+        self.base_url = base_url
+        self.workload = workload
+        self.turns_per_session = turns_per_session
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.results: List[Dict[str, Any]] = []
+
+    def _virtual_user(self, request_count: int):
+        http = requests.Session()
+        session_id = None
+        turns = 0
+        for _ in range(request_count):
+            with self.lock:
+                category, query, user_id = self.workload.next_request()
+            if turns >= self.turns_per_session:
+                session_id, turns = None, 0
+            start = time.perf_counter()
+            result = {"category": category, "ok": False, "status": None}
+            try:
+                response = http.post(
+                    f"{self.base_url}/chat",
+                    json={"query": query, "session_id": session_id, "user_id": user_id},
+                    timeout=self.timeout
+                )
+                result["status"] = response.status_code
+                if response.ok:
+                    payload = response.json()
+                    session_id = payload["session_id"]
+                    turns += 1
+                    result["ok"] = True
+                    result["prompt_tokens"] = payload.get("prompt_tokens")
+            except requests.RequestException as e:
+                result["error"] = type(e).__name__
+            result["latency"] = time.perf_counter() - start
+            with self.lock:
+                self.results.append(result)
+
+    def run(self, total_requests: int, concurrency: int) -> float:
+        """Run the workload and return the wall-clock duration."""
+        per_user = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                    for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(self._virtual_user, per_user))
+        return time.perf_counter() - start
+
+
+def summarize(results: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    def stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ok = [row for row in rows if row["ok"]]
+        tokens = [row["prompt_tokens"] for row in ok if row.get("prompt_tokens") is not None]
+        return {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "error_rate": round((len(rows) - len(ok)) / len(rows), 4) if rows else 0.0,
+            "latency_seconds": percentiles([row["latency"] for row in ok]),
+            "mean_prompt_tokens": round(sum(tokens) / len(tokens), 1) if tokens else None,
+        }
+
+    by_category = defaultdict(list)
+    for row in results:
+        by_category[row["category"]].append(row)
+    status_counts = defaultdict(int)
+    for row in results:
+        status_counts[str(row["status"] or row.get("error"))] += 1
+
+    return {
+        **stats(results),
+        "duration_seconds": round(duration, 3),
+        "throughput_rps": round(len(results) / duration, 3) if duration else None,
+        "statuses": dict(status_counts),
+        "by_category": {category: stats(rows) for category, rows in sorted(by_category.items())},
+    }
+
+
+def run_load_test(args) -> Dict[str, Any]:
+    openai_config = FakeOpenAIConfig(
+        ttft=args.ttft,
+        token_delay=args.token_delay,
+        output_tokens=args.output_tokens,
+        embedding_latency=args.embedding_latency,
+        dimension=args.dimension
+    )
+    openai_server = start_fake_openai(config=openai_config)
+    fhir_server = start_fake_fhir(patient_count=args.patients, latency=args.fhir_latency)
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+
+    # vector_snapshot imports backend config, which needs an API key
+    os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+    sys.path.insert(0, str(BACKEND_DIR))
+    snapshot_dir = Path(workdir) / "snapshots"
+    build_snapshot(str(snapshot_dir), args.dimension, args.chunks_per_document)
+
+    env = {
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_server.server_port}/v1",
+        "VECTOR_STORE": "snapshot",
+        "SNAPSHOT_DIR": str(snapshot_dir),
+        "EMBEDDING_DIMENSION": str(args.dimension),
+        "FHIR_BASE_URL": f"http://127.0.0.1:{fhir_server.server_port}",
+        "RAW_DATA_DIR": str(Path(workdir) / "raw_data"),
+        "TRACE_FILE": str(Path(workdir) / "traces.jsonl"),
+        "LOG_LEVEL": "WARNING",
+    }
+    backend = BackendProcess(args.port, env, workers=args.workers)
+    backend.start()
+    try:
+        driver = LoadDriver(backend.url, Workload(args.mix, seed=args.seed), args.turns_per_session)
+        if args.warmup:
+            driver.run(args.warmup, min(args.concurrency, args.warmup))
+            driver.results = []
+        duration = driver.run(args.requests, args.concurrency)
+    finally:
+        backend.stop()
+        openai_server.shutdown()
+        fhir_server.shutdown()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "turns_per_session": args.turns_per_session,
+            "mix": Workload(args.mix).mix,
+            "ttft": args.ttft,
+            "token_delay": args.token_delay,
+            "output_tokens": args.output_tokens,
+            "embedding_latency": args.embedding_latency,
+            "fhir_latency": args.fhir_latency,
+            "dimension": args.dimension,
+            "chunks_per_document": args.chunks_per_document,
+            "seed": args.seed,
+        },
+        "results": summarize(driver.results, duration),
+    }
+
+
+def compare_reports(baseline_path: str, candidate_path: str) -> str:
+    """Side-by-side latency, throughput and error rate of two reports."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(candidate_path, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    def row(label: str, old, new) -> str:
+        if isinstance(old, (int, float)) and isinstance(new, (int, float)) and old:
+            change = f"{(new - old) / old * 100:+.1f}%"
+        else:
+            change = ""
+        return f"{label:<28}{str(old):>12}{str(new):>12}{change:>10}"
+
+    lines = [f"{'':<28}{baseline.get('commit') or 'baseline':>12}{candidate.get('commit') or 'candidate':>12}"]
+    old, new = baseline["results"], candidate["results"]
+    for key in ("p50", "p95", "p99"):
+        lines.append(row(f"latency {key} (s)", old["latency_seconds"][key], new["latency_seconds"][key]))
+    lines.append(row("throughput (req/s)", old["throughput_rps"], new["throughput_rps"]))
+    lines.append(row("error rate", old["error_rate"], new["error_rate"]))
+    for category in sorted(set(old["by_category"]) | set(new["by_category"])):
+        old_p95 = old["by_category"].get(category, {}).get("latency_seconds", {}).get("p95")
+        new_p95 = new["by_category"].get(category, {}).get("latency_seconds", {}).get("p95")
+        lines.append(row(f"{category} p95 (s)", old_p95, new_p95))
+    return "\n".join(lines)
@@ -0,0 +1,464 @@
+"""
+FHIR R4 stand-in serving synthetic Patients and their Observations,
+Conditions and Encounters.
+
+Supports the search parameters the backend sends: for Patient name,
+family, given, gender, birthdate with ge/le/gt/lt/eq prefixes, identifier
+and _revinclude; for the clinical resources patient/subject (comma lists),
+code, code:text, category, clinical-status, status, class, date/onset-date
+and _include; for all of them _id, _lastUpdated, _count, _elements,
+_total and _summary=count|true. Searches return searchset Bundles with a
+next link for paging. Search responses carry an ETag and honour
+If-None-Match. Invalid parameters are rejected with 400 and an
+OperationOutcome, like a strict server would.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+import unicodedata
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+FAMILY_NAMES = [
+    ("Novák", "Nováková"), ("Svoboda", "Svobodová"), ("Novotný", "Novotná"), ("Dvořák", "Dvořáková"),
+    ("Černý", "Černá"), ("Procházka", "Procházková"), ("Kučera", "Kučerová"), ("Veselý", "Veselá"),
+    ("Horák", "Horáková"), ("Němec", "Němcová"), ("Marek", "Marková"), ("Pokorný", "Pokorná"),
+]
+MALE_NAMES = ["Jan", "Petr", "Josef", "Pavel", "Martin", "Tomáš", "Jiří", "Lukáš", "Jakub", "David"]
+FEMALE_NAMES = ["Jana", "Marie", "Eva", "Hana", "Anna", "Lenka", "Kateřina", "Lucie", "Věra", "Petra"]
+DATE_PREFIXES = ("ge", "le", "gt", "lt", "eq", "ne")
+
+CONDITIONS = [
+    ("I10", "Esenciální hypertenze"), ("E11", "Diabetes mellitus 2. typu"), ("J45", "Astma"),
+    ("E78", "Hypercholesterolémie"), ("M54", "Bolest zad"), ("K21", "Gastroezofageální refluxní choroba"),
+]
+# LOINC code, display, category, unit, value range
+OBSERVATIONS = [
+    ("8867-4", "Tepová frekvence", "vital-signs", "/min", (50, 110)),
+    ("8480-6", "Systolický krevní tlak", "vital-signs", "mm[Hg]", (100, 175)),
+    ("29463-7", "Tělesná hmotnost", "vital-signs", "kg", (45, 125)),
+    ("718-7", "Hemoglobin", "laboratory", "g/L", (105, 175)),
+    ("2345-7", "Glukóza", "laboratory", "mmol/L", (3.5, 11.0)),
+]
+ENCOUNTER_CLASSES = [("AMB", "ambulantní"), ("IMP", "hospitalizace"), ("EMER", "urgentní")]
+DEPARTMENTS = ["Interní klinika", "Kardiologická klinika", "Neurologická klinika", "Chirurgická klinika"]
+LAST_DATE = date(2025, 1, 1)
+
+
+def _fold(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+
+
+def generate_patients(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Deterministic synthetic Patient resources."""
+    rng = random.Random(seed)
+    patients = []
+    for i in range(1, count + 1):
+        gender = rng.choice(["male", "female"])
+        male_family, female_family = rng.choice(FAMILY_NAMES)
+        family = male_family if gender == "male" else female_family
+        given = rng.choice(MALE_NAMES if gender == "male" else FEMALE_NAMES)
+        birth_date = date(1930, 1, 1) + timedelta(days=rng.randrange(365 * 94))
+        patients.append({
+            "resourceType": "Patient",
+            "id": str(i),
+            "meta": {"versionId": "1", "lastUpdated": "2025-01-01T00:00:00Z"},
+            "identifier": [{"system": "urn:fnbrno:mrn", "value": f"MRN{i:06d}"}],
+            "name": [{"use": "official", "family": family, "given": [given]}],
+            "gender": gender,
+            "birthDate": birth_date.isoformat(),
+            "telecom": [{"system": "phone", "value": f"+420 6{rng.randrange(10**7, 10**8)}"}],
+            "address": [{"city": rng.choice(["Brno", "Blansko", "Vyškov", "Hodonín"]), "country": "CZ"}]
+        })
+    return patients
+
+
+def _random_date(rng: random.Random, after: str) -> str:
+    start = date.fromisoformat(after)
+    return (start + timedelta(days=rng.randrange(max(1, (LAST_DATE - start).days)))).isoformat()
+
+
+def _coding(system: str, code: str, display: str) -> Dict[str, Any]:
+    return {"coding": [{"system": system, "code": code, "display": display}], "text": display}
+
+
+def generate_clinical_resources(patients: List[Dict[str, Any]], seed: int = 7) -> Dict[str, List[Dict[str, Any]]]:
+    """Deterministic Conditions, Observations and Encounters for the given patients."""
+    rng = random.Random(seed)
+    meta = {"versionId": "1", "lastUpdated": "2025-01-01T00:00:00Z"}
+    resources = {"Condition": [], "Observation": [], "Encounter": []}
+    for patient in patients:
+        subject = {"reference": f"Patient/{patient['id']}"}
+        born = patient["birthDate"]
+
+        for n, (code, display) in enumerate(rng.sample(CONDITIONS, rng.randint(0, 3)), 1):
+            status = rng.choice(["active", "active", "resolved"])
+            resources["Condition"].append({
+                "resourceType": "Condition",
+                "id": f"{patient['id']}-c{n}",
+                "meta": meta,
+                "clinicalStatus": _coding("http://terminology.hl7.org/CodeSystem/condition-clinical", status, status),
+                "code": _coding("http://hl7.org/fhir/sid/icd-10", code, display),
+                "subject": subject,
+                "onsetDateTime": _random_date(rng, born)
+            })
+
+        for n in range(1, rng.randint(0, 5) + 1):
+            code, display, category, unit, (low, high) = rng.choice(OBSERVATIONS)
+            value = round(rng.uniform(low, high), 1)
+            resources["Observation"].append({
+                "resourceType": "Observation",
+                "id": f"{patient['id']}-o{n}",
+                "meta": meta,
+                "status": "final",
+                "category": [_coding("http://terminology.hl7.org/CodeSystem/observation-category", category, category)],
+                "code": _coding("http://loinc.org", code, display),
+                "subject": subject,
+                "effectiveDateTime": _random_date(rng, max(born, "2015-01-01")),
+                "valueQuantity": {"value": value, "unit": unit, "system": "http://unitsofmeasure.org", "code": unit}
+            })
+
+        for n in range(1, rng.randint(0, 3) + 1):
+            class_code, class_display = rng.choice(ENCOUNTER_CLASSES)
+            start = _random_date(rng, max(born, "2015-01-01"))
+            days = rng.randint(2, 10) if class_code == "IMP" else 0
+            resources["Encounter"].append({
+                "resourceType": "Encounter",
+                "id": f"{patient['id']}-e{n}",
+                "meta": meta,
+                "status": "finished",
+                "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": class_code,
+                          "display": class_display},
+                "type": [{"text": rng.choice(DEPARTMENTS)}],
+                "subject": subject,
+                "period": {"start": start, "end": (date.fromisoformat(start) + timedelta(days=days)).isoformat()}
+            })
+    return resources
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def _parse_date_value(value: str):
+    prefix = "eq"
+    if value[:2] in DATE_PREFIXES:
+        prefix, value = value[:2], value[2:]
+    try:
+        if len(value) == 4:
+            return prefix, date(int(value), 1, 1), date(int(value), 12, 31)
+        parsed = date.fromisoformat(value)
+        return prefix, parsed, parsed
+    except ValueError:
+        raise InvalidSearch(f"Invalid date value '{value}' for parameter birthdate")
+
+
+def _matches_date(birth_date: str, value: str) -> bool:
+    prefix, low, high = _parse_date_value(value)
+    actual = date.fromisoformat(birth_date)
+    return {
+        "eq": low <= actual <= high,
+        "ne": not (low <= actual <= high),
+        "ge": actual >= low,
+        "gt": actual > high,
+        "le": actual <= high,
+        "lt": actual < low,
+    }[prefix]
+
+
+def _matches_instant(last_updated: str, value: str) -> bool:
+    prefix = "eq"
+    if value[:2] in DATE_PREFIXES:
+        prefix, value = value[:2], value[2:]
+    try:
+        bound = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        actual = datetime.fromisoformat(last_updated.replace("Z", "+00:00"))
+    except ValueError:
+        raise InvalidSearch(f"Invalid instant '{value}' for parameter _lastUpdated")
+    return {
+        "eq": actual == bound, "ne": actual != bound, "ge": actual >= bound,
+        "gt": actual > bound, "le": actual <= bound, "lt": actual < bound,
+    }[prefix]
+
+
+def _matches_patient(patient: Dict[str, Any], params: Dict[str, List[str]]) -> bool:
+    name = patient["name"][0]
+    family = _fold(name["family"])
+    given = _fold(" ".join(name["given"]))
+    for key, values in params.items():
+        for value in values:
+            folded = _fold(value)
+            if key == "family" and not family.startswith(folded):
+                return False
+            if key == "given" and not given.startswith(folded):
+                return False
+            if key == "name" and not (family.startswith(folded) or given.startswith(folded)):
+                return False
+            if key == "gender" and patient["gender"] != value:
+                return False
+            if key == "identifier" and not any(ident["value"] == value.split("|")[-1] for ident in patient["identifier"]):
+                return False
+            if key == "birthdate" and not _matches_date(patient["birthDate"], value):
+                return False
+    return True
+
+
+def _matches_reference(resource: Dict[str, Any], value: str) -> bool:
+    return resource["subject"]["reference"].split("/")[-1] in {ref.split("/")[-1] for ref in value.split(",")}
+
+
+def _matches_token(concepts: List[Dict[str, Any]], value: str) -> bool:
+    """Comma-separated alternatives of code or system|code."""
+    for alternative in value.split(","):
+        system, _, code = alternative.rpartition("|")
+        for concept in concepts:
+            for coding in concept.get("coding", []):
+                if coding["code"] == code and (not system or coding["system"] == system):
+                    return True
+    return False
+
+
+def _matches_text(concept: Dict[str, Any], value: str) -> bool:
+    return _fold(value) in _fold(concept.get("text", ""))
+
+
+# Clinical search parameters: name -> predicate(resource, value)
+CLINICAL_MATCHERS = {
+    "Observation": {
+        "code": lambda r, v: _matches_token([r["code"]], v),
+        "code:text": lambda r, v: _matches_text(r["code"], v),
+        "category": lambda r, v: _matches_token(r["category"], v),
+        "date": lambda r, v: _matches_date(r["effectiveDateTime"][:10], v),
+    },
+    "Condition": {
+        "code": lambda r, v: _matches_token([r["code"]], v),
+        "code:text": lambda r, v: _matches_text(r["code"], v),
+        "clinical-status": lambda r, v: _matches_token([r["clinicalStatus"]], v),
+        "onset-date": lambda r, v: _matches_date(r["onsetDateTime"][:10], v),
+    },
+    "Encounter": {
+        "date": lambda r, v: _matches_date(r["period"]["start"][:10], v),
+        "status": lambda r, v: r["status"] in v.split(","),
+        "class": lambda r, v: r["class"]["code"] in {code.rpartition("|")[2] for code in v.split(",")},
+    },
+}
+COMMON_PARAMETERS = {"_id", "_lastUpdated"}
+SEARCH_PARAMETERS = {
+    "Patient": {"name", "family", "given", "gender", "birthdate", "identifier"} | COMMON_PARAMETERS,
+    **{
+        resource_type: set(matchers) | {"patient", "subject"} | COMMON_PARAMETERS
+        for resource_type, matchers in CLINICAL_MATCHERS.items()
+    }
+}
+CONTROL_PARAMETERS = {"_count", "_offset", "_summary", "_elements", "_total", "_include", "_revinclude"}
+REFERENCE_PARAMETERS = {"patient", "subject"}
+# Patient elements flagged as summary in FHIR R4
+SUMMARY_ELEMENTS = {"identifier", "active", "name", "telecom", "gender", "birthDate", "deceased", "address",
+                    "managingOrganization", "link"}
+SUBSETTED = {"system": "http://terminology.hl7.org/CodeSystem/v3-ObservationValue", "code": "SUBSETTED"}
+
+
+def _matches(resource_type: str, resource: Dict[str, Any], params: Dict[str, List[str]]) -> bool:
+    for key, values in params.items():
+        for value in values:
+            if key == "_id" and resource["id"] not in value.split(","):
+                return False
+            if key == "_lastUpdated" and not _matches_instant(resource["meta"]["lastUpdated"], value):
+                return False
+            if key in REFERENCE_PARAMETERS and not _matches_reference(resource, value):
+                return False
+            matcher = CLINICAL_MATCHERS.get(resource_type, {}).get(key)
+            if matcher is not None and not matcher(resource, value):
+                return False
+    return resource_type != "Patient" or _matches_patient(resource, params)
+
+
+def _subset(resource: Dict[str, Any], elements) -> Dict[str, Any]:
+    """Resource reduced to the given top-level elements, tagged SUBSETTED."""
+    subset = {key: value for key, value in resource.items() if key in elements or key in ("resourceType", "id")}
+    subset["meta"] = {**resource["meta"], "tag": [SUBSETTED]}
+    return subset
+
+
+class FakeFHIRHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    resources: Dict[str, List[Dict[str, Any]]] = {}
+    by_subject: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    latency: float = 0.02
+    base_path: str = "/csp/healthshare/demo/fhir/r4"
+    etags: bool = True
+    request_count = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload: Dict[str, Any], status: int = 200, etag: Optional[str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_not_modified(self, etag: str):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _outcome(self, status: int, message: str):
+        self._send({
+            "resourceType": "OperationOutcome",
+            "issue": [{"severity": "error", "code": "invalid", "diagnostics": message}]
+        }, status)
+
+    def do_GET(self):
+        with self.lock:
+            type(self).request_count += 1
+        time.sleep(self.latency)
+
+        url = urlparse(self.path)
+        if not url.path.startswith(self.base_path):
+            self._outcome(404, f"Unknown path {url.path}")
+            return
+        resource_path = url.path[len(self.base_path):].strip("/")
+        resource_type, _, resource_id = resource_path.partition("/")
+        params = parse_qs(url.query, keep_blank_values=False)
+
+        if resource_type not in self.resources:
+            self._outcome(404, f"Unknown resource {resource_path}")
+            return
+        try:
+            if resource_id:
+                self._read(resource_type, resource_id)
+            else:
+                self._search(resource_type, params)
+        except InvalidSearch as e:
+            self._outcome(400, str(e))
+
+    def _read(self, resource_type: str, resource_id: str):
+        for resource in self.resources[resource_type]:
+            if resource["id"] == resource_id:
+                self._send(resource)
+                return
+        self._outcome(404, f"{resource_type}/{resource_id} not found")
+
+    def _included(self, resource_type: str, page: List[Dict[str, Any]], params: Dict[str, List[str]]):
+        """Resources added by _include (clinical -> Patient) and _revinclude (Patient -> clinical)."""
+        included = {}
+        for value in params.get("_include", []):
+            source, _, parameter = value.partition(":")
+            if source != resource_type or parameter not in REFERENCE_PARAMETERS:
+                raise InvalidSearch(f"Unsupported _include '{value}'")
+            patients = {patient["id"]: patient for patient in self.resources["Patient"]}
+            for resource in page:
+                patient = patients.get(resource["subject"]["reference"].split("/")[-1])
+                if patient is not None:
+                    included[("Patient", patient["id"])] = patient
+        for value in params.get("_revinclude", []):
+            source, _, parameter = value.partition(":")
+            if resource_type != "Patient" or source not in CLINICAL_MATCHERS or parameter not in REFERENCE_PARAMETERS:
+                raise InvalidSearch(f"Unsupported _revinclude '{value}'")
+            for patient in page:
+                for resource in self.by_subject[source].get(patient["id"], []):
+                    included[(source, resource["id"])] = resource
+        return list(included.values())
+
+    def _search(self, resource_type: str, params: Dict[str, List[str]]):
+        unknown = set(params) - SEARCH_PARAMETERS[resource_type] - CONTROL_PARAMETERS
+        if unknown:
+            raise InvalidSearch(f"Unknown search parameter(s): {', '.join(sorted(unknown))}")
+        try:
+            count = int(params.get("_count", ["50"])[0])
+            offset = int(params.get("_offset", ["0"])[0])
+        except ValueError:
+            raise InvalidSearch("_count and _offset must be integers")
+
+        filters = {key: values for key, values in params.items() if key in SEARCH_PARAMETERS[resource_type]}
+        matches = [resource for resource in self.resources[resource_type] if _matches(resource_type, resource, filters)]
+        summary = params.get("_summary", [None])[0]
+        if summary not in (None, "count", "true", "false"):
+            raise InvalidSearch(f"Unsupported _summary value '{summary}'")
+        total_mode = params.get("_total", ["accurate"])[0]
+        if total_mode not in ("none", "estimate", "accurate"):
+            raise InvalidSearch(f"Unsupported _total value '{total_mode}'")
+        elements = None
+        if "_elements" in params:
+            elements = {element.strip() for value in params["_elements"] for element in value.split(",")}
+        elif summary == "true" and resource_type == "Patient":
+            elements = SUMMARY_ELEMENTS
+
+        self_params = [(key, value) for key, values in params.items() for value in values]
+        base = f"http://{self.headers.get('Host')}{self.base_path}"
+        links = [{"relation": "self", "url": f"{base}/{resource_type}?{urlencode(self_params)}"}]
+        if summary == "count":
+            self._send({"resourceType": "Bundle", "type": "searchset", "total": len(matches), "link": links})
+            return
+
+        page = matches[offset:offset + count]
+        included = self._included(resource_type, page, params)
+        if offset + count < len(matches):
+            next_params = [(k, v) for k, v in self_params if k != "_offset"] + [("_offset", str(offset + count))]
+            links.append({"relation": "next", "url": f"{base}/{resource_type}?{urlencode(next_params)}"})
+
+        # Weak validator over the versions of the returned resources and the total
+        versions = ",".join(
+            f"{resource['resourceType']}/{resource['id']}/{resource['meta']['versionId']}" for resource in page + included
+        )
+        etag = 'W/"' + hashlib.sha1(f"{len(matches)}:{versions}".encode("utf-8")).hexdigest()[:16] + '"'
+        if not self.etags:
+            etag = None
+        elif self.headers.get("If-None-Match") == etag:
+            self._send_not_modified(etag)
+            return
+
+        bundle = {"resourceType": "Bundle", "type": "searchset"}
+        if total_mode != "none":
+            bundle["total"] = len(matches)
+        bundle["link"] = links
+        bundle["entry"] = [
+            {
+                "fullUrl": f"{base}/{resource_type}/{resource['id']}",
+                "resource": _subset(resource, elements) if elements else resource,
+                "search": {"mode": "match"}
+            }
+            for resource in page
+        ] + [
+            {
+                "fullUrl": f"{base}/{resource['resourceType']}/{resource['id']}",
+                "resource": resource,
+                "search": {"mode": "include"}
+            }
+            for resource in included
+        ]
+        self._send(bundle, etag=etag)
+
+
+def start_fake_fhir(port: int = 0, patient_count: int = 500, latency: float = 0.02,
+                    base_path: Optional[str] = None, etags: bool = True) -> ThreadingHTTPServer:
+    """Start the server on a daemon thread; the bound port is server.server_port."""
+    patients = generate_patients(patient_count)
+    resources = {"Patient": patients, **generate_clinical_resources(patients)}
+    by_subject = {}
+    for resource_type in CLINICAL_MATCHERS:
+        by_subject[resource_type] = {}
+        for resource in resources[resource_type]:
+            by_subject[resource_type].setdefault(resource["subject"]["reference"].split("/")[-1], []).append(resource)
+    attributes = {"resources": resources, "by_subject": by_subject, "latency": latency, "request_count": 0,
+                  "etags": etags}
+    if base_path:
+        attributes["base_path"] = base_path.rstrip("/")
+    handler = type("ConfiguredFakeFHIRHandler", (FakeFHIRHandler,), attributes)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-fhir", daemon=True).start()
+    return server
@@ -0,0 +1,290 @@
+"""
+OpenAI-compatible stand-in server.
+
+Implements the endpoints the backend uses: /v1/embeddings,
+/v1/responses (plain, structured-output parse, function calling and
+streaming) and /v1/chat/completions. Latency is simulated as a time to
+first token plus a per-token delay. Embeddings are deterministic bag-of-
+words vectors, so retrieval over a snapshot built with the same function
+returns topically related chunks.
+"""
+
+import json
+import re
+import threading
+import time
+import unicodedata
+import uuid
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+WORD = re.compile(r"\w+", re.UNICODE)
+ANSWER_WORDS = (
+    "Podle interních směrnic FN Brno postupujte tak, že nejprve kontaktujete příslušné oddělení, "
+    "které vám poskytne formulář a potvrdí další kroky. Žádost musí schválit vedoucí pracovník "
+    "a doklady předáte ekonomickému odboru."
+).split()
+
+
+def _fold(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=50000)
+def _word_vector(word: str, dimension: int) -> np.ndarray:
+    rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")))
+    return rng.standard_normal(dimension).astype(np.float32)
+
+
+def hash_embedding(text: str, dimension: int) -> np.ndarray:
+    """Deterministic L2-normalised bag-of-words embedding."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in WORD.findall(_fold(text)):
+        if len(word) > 2:
+            vector += _word_vector(word[:6], dimension)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+def classify(text: str) -> str:
+    """Keyword intent rules matching the load-test workload."""
+    folded = _fold(text)
+    if "pacient" in folded:
+        return "fhir_patient_lookup"
+    if "vyuctov" in folded or "uctenk" in folded:
+        return "trip_expense"
+    if "cest" in folded:
+        return "trip_request"
+    if any(word in folded for word in ("ahoj", "dobry den", "co umis", "dekuji")):
+        return "conversational"
+    return "general_rag"
+
+
+def _estimate_tokens(value: Any) -> int:
+    return max(1, len(json.dumps(value, ensure_ascii=False)) // 4)
+
+
+def _last_user_text(items: Any) -> str:
+    if isinstance(items, str):
+        return items
+    for item in reversed(items or []):
+        if isinstance(item, dict) and item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return content or ""
+    return ""
+
+
+class FakeOpenAIConfig:
+    """Latency and output size of the simulated model."""
+
+    def __init__(self, ttft: float = 0.2, token_delay: float = 0.005, output_tokens: int = 120,
+                 embedding_latency: float = 0.05, dimension: int = 3072):
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.output_tokens = output_tokens
+        self.embedding_latency = embedding_latency
+        self.dimension = dimension
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: FakeOpenAIConfig = FakeOpenAIConfig()
+    seen_prefixes = set()
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    # ----- HTTP plumbing -----
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        try:
+            body = self._read_json()
+            if self.path.endswith("/embeddings"):
+                self._embeddings(body)
+            elif self.path.endswith("/responses"):
+                self._responses(body)
+            elif self.path.endswith("/chat/completions"):
+                self._chat_completions(body)
+            else:
+                self._send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+        except Exception as e:
+            self._send_json({"error": {"message": str(e), "type": "server_error"}}, 500)
+
+    # ----- Endpoints -----
+
+    def _embeddings(self, body: Dict[str, Any]):
+        time.sleep(self.config.embedding_latency)
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = [
+            {"object": "embedding", "index": i, "embedding": hash_embedding(text, self.config.dimension).tolist()}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(_estimate_tokens(text) for text in inputs)
+        self._send_json({
+            "object": "list",
+            "data": data,
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    def _usage(self, body: Dict[str, Any], output_tokens: int) -> Dict[str, Any]:
+        instructions = body.get("instructions") or ""
+        input_tokens = _estimate_tokens(instructions) + _estimate_tokens(body.get("input") or body.get("messages"))
+        # Provider-style prefix caching: a repeated static prefix is cached in 128-token blocks
+        prefix = (body.get("prompt_cache_key"), hash(instructions))
+        with self.lock:
+            cached = prefix in self.seen_prefixes
+            self.seen_prefixes.add(prefix)
+        cached_tokens = (_estimate_tokens(instructions) // 128) * 128 if cached else 0
+        return {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": cached_tokens},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens
+        }
+
+    def _response_object(self, body: Dict[str, Any], output: List[Dict], output_tokens: int) -> Dict[str, Any]:
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model"),
+            "status": "completed",
+            "output": output,
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": body.get("tools") or [],
+            "usage": self._usage(body, output_tokens)
+        }
+
+    def _message(self, text: str) -> Dict[str, Any]:
+        return {
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]
+        }
+
+    def _answer_text(self) -> str:
+        words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(self.config.output_tokens)]
+        return " ".join(words)
+
+    def _responses(self, body: Dict[str, Any]):
+        items = body.get("input") or []
+        text_format = (body.get("text") or {}).get("format") or {}
+        has_tool_output = any(isinstance(item, dict) and item.get("type") == "function_call_output" for item in items)
+
+        if text_format.get("type") == "json_schema":
+            # Structured output (router classification)
+            category = classify(_last_user_text(items))
+            output = [self._message(json.dumps({"category": category, "confidence": None}))]
+            output_tokens = 12
+        elif body.get("tools") and body.get("tool_choice") != "none" and not has_tool_output:
+            query = _fold(_last_user_text(items))
+            arguments = {"gender": "female"} if "zen" in query else {"family": "Novak"}
+            output = [{
+                "type": "function_call",
+                "id": f"fc_{uuid.uuid4().hex}",
+                "call_id": f"call_{uuid.uuid4().hex[:24]}",
+                "name": body["tools"][0]["name"],
+                "arguments": json.dumps(arguments),
+                "status": "completed"
+            }]
+            output_tokens = 20
+        else:
+            output = [self._message(self._answer_text())]
+            output_tokens = self.config.output_tokens
+
+        if body.get("stream"):
+            self._stream_response(body, output, output_tokens)
+            return
+
+        time.sleep(self.config.ttft + output_tokens * self.config.token_delay)
+        self._send_json(self._response_object(body, output, output_tokens))
+
+    def _stream_response(self, body: Dict[str, Any], output: List[Dict], output_tokens: int):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        response = self._response_object(body, output, output_tokens)
+        sequence = 0
+
+        def emit(event: Dict[str, Any]):
+            nonlocal sequence
+            event["sequence_number"] = sequence
+            sequence += 1
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        emit({"type": "response.created", "response": {**response, "status": "in_progress", "output": []}})
+        time.sleep(self.config.ttft)
+        message = output[0]
+        if message["type"] == "message":
+            for word in message["content"][0]["text"].split(" "):
+                emit({"type": "response.output_text.delta", "item_id": message["id"],
+                      "output_index": 0, "content_index": 0, "delta": word + " ", "logprobs": []})
+                time.sleep(self.config.token_delay)
+        emit({"type": "response.completed", "response": response})
+
+    def _chat_completions(self, body: Dict[str, Any]):
+        time.sleep(self.config.ttft)
+        messages = body.get("messages") or []
+        usage = self._usage(body, 1)
+        self._send_json({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "TRUE" if classify(_last_user_text(messages)) != "conversational" else "FALSE"},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": usage["input_tokens"],
+                "completion_tokens": 1,
+                "total_tokens": usage["input_tokens"] + 1,
+                "prompt_tokens_details": {"cached_tokens": usage["input_tokens_details"]["cached_tokens"]}
+            }
+        })
+
+
+def start_fake_openai(port: int = 0, config: Optional[FakeOpenAIConfig] = None) -> ThreadingHTTPServer:
+    """Start the server on a daemon thread; the bound port is server.server_port."""
+    handler = type("ConfiguredFakeOpenAIHandler", (FakeOpenAIHandler,), {
+        "config": config or FakeOpenAIConfig(),
+        "seen_prefixes": set()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
@@ -0,0 +1,91 @@
+"""
+Synthetic retrieval data for load tests.
+
+Builds a vector snapshot with chunks for every document named in
+backend/user_info.json, embedded with the fake server's hash embedding,
+so SnapshotVectorStore can stand in for IRIS with the real access rules.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from loadtest.fake_openai import hash_embedding
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+TOPIC_SENTENCES = {
+    "cest": [
+        "Pracovní cestu schvaluje přímý nadřízený před jejím zahájením na předepsaném formuláři.",
+        "Cestovní náhrady zahrnují jízdní výdaje, stravné a ubytování podle zákoníku práce.",
+        "Vyúčtování pracovní cesty se předkládá do deseti pracovních dnů po návratu včetně účtenek.",
+        "Použití vlastního vozidla musí být předem schváleno a zaměstnanec doloží technický průkaz.",
+    ],
+    "vozidl": [
+        "Služební vozidla rezervuje autoprovoz na základě žádanky schválené vedoucím útvaru.",
+        "Řidič referent musí mít platné školení a lékařskou prohlídku.",
+        "Kniha jízd se vede u každého služebního vozidla a odevzdává se měsíčně.",
+    ],
+    "organizacni": [
+        "Organizační řád vymezuje působnost útvaru, jeho strukturu a odpovědnost vedoucích.",
+        "Útvar řídí vedoucí, kterého jmenuje ředitel nemocnice, a zastupuje jej zástupce vedoucího.",
+        "Oddělení zajišťuje metodickou podporu, kontrolní činnost a spolupráci s ostatními útvary.",
+    ],
+    "procesů": [
+        "Proces schvalování faktur vlastní ekonomický odbor a probíhá měsíčně.",
+        "Proces interního auditu plánuje oddělení interního auditu a kontroly jednou ročně.",
+        "Proces správy zdravotnické techniky zajišťuje oddělení zdravotnické techniky průběžně.",
+    ],
+}
+GENERIC_SENTENCES = [
+    "Zaměstnanec se s dotazem obrací na příslušné oddělení nebo na helpdesk.",
+    "Dokument je závazný pro všechny zaměstnance Fakultní nemocnice Brno.",
+    "Změny dokumentu schvaluje ředitel a zveřejňují se na intranetu.",
+]
+DEPARTMENTS = ["EO", "OIAK", "OPZ", "OHTS", "IO", "CI", "ÚVV", "OPV", "Kancelář ředitele"]
+
+
+def document_names() -> List[str]:
+    """All documents referenced by the access configuration."""
+    with open(BACKEND_DIR / "user_info.json", "r", encoding="utf-8") as f:
+        access = json.load(f)["role_file_access"]
+    names = list(access.get("public", []))
+    for files in access.get("by_user_role", {}).values():
+        names.extend(files)
+    return sorted(set(names))
+
+
+def _sentences_for(document: str) -> List[str]:
+    folded = document.lower()
+    sentences = []
+    for key, topic in TOPIC_SENTENCES.items():
+        if key in folded:
+            sentences.extend(topic)
+    return sentences or GENERIC_SENTENCES
+
+
+def synthetic_rows(chunks_per_document: int, dimension: int, seed: int = 7) -> Iterator[Tuple]:
+    """Rows in the IRISVectorDB.iter_chunks(include_vectors=True) layout."""
+    rng = random.Random(seed)
+    chunk_id = 0
+    for document in document_names():
+        sentences = _sentences_for(document) + GENERIC_SENTENCES
+        department = rng.choice(DEPARTMENTS)
+        document_type = document.rsplit(".", 1)[-1]
+        for index in range(chunks_per_document):
+            chunk_id += 1
+            text = f"{document.rsplit('.', 1)[0]}. " + " ".join(rng.choice(sentences) for _ in range(6))
+            vector = hash_embedding(text, dimension)
+            yield (chunk_id, document, document_type, text, index, department, "", ",".join(f"{x:.6f}" for x in vector))
+
+
+def build_snapshot(snapshot_root: str, dimension: int, chunks_per_document: int = 20) -> Path:
+    """Write a synthetic snapshot and make it current."""
+    from vector_snapshot import export_snapshot
+    return export_snapshot(
+        synthetic_rows(chunks_per_document, dimension),
+        snapshot_root,
+        embedding_model="fake-hash-embedding",
+        dimension=dimension
+    )
@@ -0,0 +1,76 @@
+"""
+/chat traffic mix for load tests.
+
+Queries are grouped by the IntentCategory the fake router assigns to them
+(see fake_openai.classify), so the report can break latency down by
+category.
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+DEFAULT_MIX: Dict[str, float] = {
+    "general_rag": 0.5,
+    "conversational": 0.1,
+    "trip_request": 0.15,
+    "trip_expense": 0.1,
+    "fhir_patient_lookup": 0.15,
+}
+
+QUERIES: Dict[str, List[str]] = {
+    "general_rag": [
+        "Kdo řídí oddělení interního auditu a kontroly?",
+        "Jaké procesy má ekonomický odbor?",
+        "Jak si rezervuji služební vozidlo?",
+        "Co dělá kancelář ředitele?",
+        "Kdo schvaluje změny organizačního řádu?",
+        "Jaké jsou povinnosti řidiče referenta?",
+    ],
+    "conversational": [
+        "Ahoj, co umíš?",
+        "Dobrý den",
+        "Děkuji za pomoc",
+    ],
+    "trip_request": [
+        "Chci podat žádost o pracovní cestu do Prahy",
+        "Jak zařídit služební cestu na konferenci?",
+        "Mohu jet na pracovní cestu vlastním autem?",
+    ],
+    "trip_expense": [
+        "Chci vyúčtovat pracovní cestu",
+        "Mám účtenky z cesty, co s nimi?",
+    ],
+    "fhir_patient_lookup": [
+        "Najdi pacienta Novák",
+        "Vyhledej všechny ženy mezi pacienty",
+        "Hledám pacientku Svobodovou",
+    ],
+}
+
+USER_IDS = [1, 2, 3]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "general_rag=0.5,fhir_patient_lookup=0.5" into weights."""
+    mix = {}
+    for part in value.split(","):
+        category, weight = part.split("=")
+        if category not in QUERIES:
+            raise ValueError(f"Unknown category {category}")
+        mix[category] = float(weight)
+    return mix
+
+
+class Workload:
+    """Picks the category and query of each request."""
+
+    def __init__(self, mix: Dict[str, float] = None, seed: int = 1):
+        self.mix = mix or DEFAULT_MIX
+        self.categories = list(self.mix)
+        self.weights = [self.mix[category] for category in self.categories]
+        self.rng = random.Random(seed)
+
+    def next_request(self) -> Tuple[str, str, int]:
+        """Return (category, query, user_id)."""
+        category = self.rng.choices(self.categories, self.weights)[0]
+        return category, self.rng.choice(QUERIES[category]), self.rng.choice(USER_IDS)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the pure-Python pieces of the RAG hot path.
+
+Each benchmark runs on synthetic input (no database, no API calls) and is
+timed in rounds until --min-time has elapsed, with the garbage collector
+off during each round as in timeit; the median time per call is
+compared against a stored baseline and the script exits with status 1 if
+any benchmark is slower than the baseline by more than --tolerance.
+
+A fixed calibration loop is timed right before every benchmark, and the
+baseline is scaled by how much faster or slower that loop runs now, so a
+committed baseline stays meaningful on other hardware and under varying
+load. Without a baseline, or when it lacks calibration timings or comes
+from another Python version or architecture, changes are only reported
+and never fail the run.
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add backend and repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Nothing here calls the API, but the settings require a key
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from config import get_settings
+from ingestion.chunker import TextChunker
+from ingestion.parsers import DocumentParser
+from rag.retriever import VectorRetriever
+from rag.context import ContextPacker
+from rag.generator import ResponseGenerator
+from rag.prompts import get_system_prompt, build_prompt_input
+from models.schemas import Message, IntentCategory
+from fhir.client import FHIRClient
+from vector_snapshot import parse_vector_string
+from loadtest.fake_fhir import generate_patients
+
+logging.basicConfig(level=logging.WARNING)
+
+DEFAULT_BASELINE = Path(__file__).parent / "eval_data" / "component_benchmarks.json"
+
+SENTENCES = [
+    "Pracovní cestu schvaluje přímý nadřízený před jejím zahájením.",
+    "Vyúčtování se předkládá do deseti pracovních dnů po návratu včetně účtenek.",
+    "Oddělení zajišťuje metodickou podporu a kontrolní činnost.",
+    "Proces vlastní ekonomický odbor a probíhá měsíčně!",
+    "Kdo schvaluje změny organizačního řádu?",
+]
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function returning the zero-argument callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def synthetic_text(characters: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < characters:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 8)))
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+
+def synthetic_chunks(count: int):
+    rng = random.Random(2)
+    return [
+        {
+            'document_name': f"Zhodnocení procesů {i % 9}.xlsx",
+            'chunk_text': synthetic_text(700, seed=i),
+            'department': rng.choice(["EO", "OIAK", "OPZ"]),
+            'process_owner': rng.choice(["", "vedoucí EO"]),
+            'relevance_score': rng.random(),
+            'token_count': 180,
+        }
+        for i in range(count)
+    ]
+
+
+def patient_bundle(count: int):
+    return {
+        'resourceType': 'Bundle',
+        'type': 'searchset',
+        'total': count,
+        'entry': [{'resource': patient} for patient in generate_patients(count)]
+    }
+
+
+@benchmark("chunker.chunk_text_1mb")
+def _chunk_text():
+    settings = get_settings()
+    chunker = TextChunker(chunk_size=settings.chunk_size, overlap=settings.chunk_overlap)
+    text = synthetic_text(1_000_000)
+    return lambda: chunker.chunk_text(text)
+
+
+@benchmark("parsers.parse_xlsx_2000_rows")
+def _parse_xlsx():
+    import pandas as pd
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "Zhodnocení procesů EO.xlsx")
+    rng = random.Random(3)
+    frame = pd.DataFrame({
+        'Proces': [f"Proces {i}" for i in range(2000)],
+        'Vlastník procesu': [rng.choice(["vedoucí EO", "vedoucí OIAK", None]) for _ in range(2000)],
+        'Popis': [rng.choice(SENTENCES) for _ in range(2000)],
+        'Frekvence': [rng.choice(["měsíčně", "ročně", "průběžně"]) for _ in range(2000)],
+    })
+    frame.to_excel(path, index=False)
+    return lambda: DocumentParser.parse_xlsx(path)
+
+
+@benchmark("parsers.parse_docx_500_paragraphs")
+def _parse_docx():
+    import docx
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "Organizacni_rad.docx")
+    document = docx.Document()
+    for i in range(500):
+        document.add_paragraph(synthetic_text(400, seed=i))
+    table = document.add_table(rows=100, cols=3)
+    for row in table.rows:
+        for cell, text in zip(row.cells, SENTENCES):
+            cell.text = text
+    document.save(path)
+    return lambda: DocumentParser.parse_docx(path)
+
+
+@benchmark("retriever.format_context_for_llm_50")
+def _format_context():
+    retriever = VectorRetriever(None, None)
+    chunks = synthetic_chunks(50)
+    return lambda: retriever.format_context_for_llm(chunks)
+
+
+@benchmark("context.pack_50")
+def _pack_context():
+    packer = ContextPacker()
+    chunks = synthetic_chunks(50)
+    return lambda: packer.pack(chunks, IntentCategory.GENERAL_RAG)
+
+
+@benchmark("generator.history_items_200")
+def _history_items():
+    generator = ResponseGenerator()
+    messages = [
+        Message(role="user" if i % 2 == 0 else "assistant", content=synthetic_text(300, seed=i), timestamp=datetime.now())
+        for i in range(200)
+    ]
+    return lambda: generator._history_items(messages)
+
+
+@benchmark("prompts.get_system_prompt")
+def _system_prompt():
+    categories = list(IntentCategory)
+    return lambda: [get_system_prompt(category) for category in categories]
+
+
+@benchmark("prompts.build_prompt_input")
+def _prompt_input():
+    context = VectorRetriever(None, None).format_context_for_llm(synthetic_chunks(10))
+    history = [{"role": "user", "content": s} for s in SENTENCES]
+    return lambda: build_prompt_input("Kdo schvaluje pracovní cesty?", context, history)
+
+
+@benchmark("fhir.extract_patients_5000")
+def _extract_patients():
+    client = FHIRClient(get_settings())
+    bundle = patient_bundle(5000)
+    return lambda: client._extract_patients_from_bundle(bundle)
+
+
+@benchmark("fhir.format_patients_czech_5000")
+def _format_patients():
+    client = FHIRClient(get_settings())
+    patients = client._extract_patients_from_bundle(patient_bundle(5000))
+    return lambda: client.format_patients_for_czech_response(patients)
+
+
+@benchmark("vectors.serialize_3072")
+def _serialize_vector():
+    vector = np.random.default_rng(4).standard_normal(3072).astype(np.float32)
+    return lambda: str(vector.tolist())
+
+
+@benchmark("vectors.parse_3072")
+def _parse_vector():
+    text = str(np.random.default_rng(4).standard_normal(3072).astype(np.float32).tolist())
+    return lambda: parse_vector_string(text)
+
+
+def calibration_loop():
+    """Fixed interpreter workload (dicts, strings, sorting) that machine speed is measured with."""
+    words = [f"slovo{i % 97}" for i in range(2000)]
+
+    def run():
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        return " ".join(sorted(counts, key=counts.get)).upper().split()
+    return run
+
+
+def machine_info() -> dict:
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.machine()}
+
+
+def comparable(stored: dict) -> bool:
+    """Whether the baseline carries calibration timings from the same Python and architecture."""
+    recorded = stored.get('machine', {})
+    current = machine_info()
+    calibrated = all('calibration' in result for result in stored.get('benchmarks', {}).values())
+    return calibrated and all(recorded.get(key) == current[key] for key in ('python', 'processor'))
+
+
+def timed_loops(function, loops: int) -> float:
+    """Seconds for `loops` calls with the garbage collector off, as timeit does."""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def measure(function, min_time: float, rounds: int) -> dict:
+    """Median/min seconds per call over `rounds` rounds of auto-sized loops."""
+    function()  # warm-up
+    loops = 1
+    while True:
+        elapsed = timed_loops(function, loops)
+        if elapsed >= min_time / rounds or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    timings = [timed_loops(function, loops) / loops for _ in range(rounds)]
+
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'loops': loops,
+        'rounds': rounds,
+    }
+
+
+def format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark RAG hot-path components")
+    parser.add_argument('--filter', default='', help="Only run benchmarks whose name contains this")
+    parser.add_argument('--min-time', type=float, default=1.0, help="Seconds spent timing each benchmark")
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite the baseline with this run")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown of the median (0.25 = 25%%)")
+    parser.add_argument('--output', default=None, help="Optional path for the JSON results")
+    args = parser.parse_args()
+
+    stored = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    baseline = stored.get('benchmarks', {})
+
+    gate = comparable(stored) if stored else False
+    if stored and not gate:
+        print("Baseline has no calibration or comes from another Python version or architecture; "
+              "changes are reported only\n")
+
+    calibration = calibration_loop()
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<40}{'median':>12}{'expected':>12}{'change':>10}")
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        function = setup()
+        machine = measure(calibration, args.min_time / 4, args.rounds)['median']
+        results[name] = {**measure(function, args.min_time, args.rounds), 'calibration': machine}
+        median = results[name]['median']
+        reference = baseline.get(name, {}).get('median')
+        change = ""
+        if reference:
+            if gate:
+                # Scale by how much slower the calibration loop runs now than when the baseline was recorded
+                reference *= machine / baseline[name]['calibration']
+            ratio = median / reference - 1
+            change = f"{ratio * 100:+.1f}%"
+            if ratio > args.tolerance and gate:
+                regressions.append(name)
+                change += " !"
+        print(f"{name:<40}{format_seconds(median):>12}{format_seconds(reference) if reference else '-':>12}{change:>10}")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'benchmarks': results,
+    }
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Script to compare the verbose and compact FHIR patient result formats.
+
+Builds the search_fhir_patients tool output for synthetic result sets
+(5, 20 and 50 patients by default) in the verbose format with ASCII-escaped
+JSON, as tool outputs were sent before, and in the compact table format,
+and reports their size in tokens. With --latency it also sends the
+final-answer request (instructions, query, tool call and output) to the
+configured OpenAI endpoint --repeats times per format and reports median
+latency and the input tokens the API billed.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+
+# Add backend and repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from config import get_settings
+from fhir.client import FHIRClient
+from fhir.formatting import format_patients_compact
+from ingestion.tokens import count_tokens
+from loadtest.fake_fhir import generate_patients
+from models.schemas import IntentCategory
+from rag.prompts import get_system_prompt
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUERY = "Najdi pacienty s příjmením Novák"
+
+
+def tool_outputs(client: FHIRClient, patients: list, total: int, max_rows: int) -> dict:
+    """search_fhir_patients output string per format."""
+    return {
+        'verbose': json.dumps({"patient_results": client.format_patients_for_czech_response(patients, total)}),
+        'compact': json.dumps({"patient_results": format_patients_compact(patients, total, max_rows=max_rows)},
+                              ensure_ascii=False)
+    }
+
+
+def final_answer_latency(openai_client, settings, output: str, repeats: int) -> dict:
+    """Median latency and billed input tokens of the final-answer call for one tool output."""
+    items = [
+        {"role": "user", "content": QUERY},
+        {"type": "function_call", "call_id": "call_benchmark", "name": "search_fhir_patients",
+         "arguments": json.dumps({"family": "Novák"})},
+        {"type": "function_call_output", "call_id": "call_benchmark", "output": output}
+    ]
+    latencies, input_tokens = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = openai_client.responses.create(
+            model=settings.openai_model,
+            instructions=get_system_prompt(IntentCategory.FHIR_PATIENT_LOOKUP),
+            input=items,
+            max_output_tokens=1000,
+            reasoning={"effort": "minimal"}
+        )
+        latencies.append(time.perf_counter() - start)
+        input_tokens.append(response.usage.input_tokens if response.usage else 0)
+    return {'latency_p50': round(float(np.median(latencies)), 3), 'input_tokens': int(np.median(input_tokens))}
+
+
+def main(args):
+    settings = get_settings()
+    client = FHIRClient(settings)
+    max_rows = args.max_rows or settings.fhir_compact_max_rows
+    openai_client = None
+    if args.latency:
+        from openai import OpenAI
+        openai_client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+
+    results = []
+    for count in args.patients:
+        patients = [client._format_patient_data(patient) for patient in generate_patients(count)]
+        # Results of the size limit are usually cut off, so report a larger total
+        total = count * 3 if count >= settings.fhir_max_results else count
+        outputs = tool_outputs(client, patients, total, max_rows)
+        baseline = count_tokens(outputs['verbose'])
+        for mode, output in outputs.items():
+            result = {'format': mode, 'patients': count, 'chars': len(output), 'tokens': count_tokens(output)}
+            result['tokens_vs_verbose'] = round(result['tokens'] / baseline, 3)
+            if openai_client:
+                result.update(final_answer_latency(openai_client, settings, output, args.repeats))
+            results.append(result)
+            line = (f"{mode:<8} {count:>4} patients: {result['tokens']:>6} tokens "
+                    f"({result['tokens_vs_verbose']:>5.0%} of verbose)")
+            if openai_client:
+                line += f", final call p50 {result['latency_p50']:.2f}s, billed input {result['input_tokens']}"
+            print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare verbose and compact FHIR tool output formats")
+    parser.add_argument("--patients", type=lambda value: [int(v) for v in value.split(',')], default=[5, 20, 50],
+                        help="Comma-separated result set sizes (default 5,20,50)")
+    parser.add_argument("--max-rows", type=int, default=None,
+                        help=f"Compact rows (default fhir_compact_max_rows={get_settings().fhir_compact_max_rows})")
+    parser.add_argument("--latency", action="store_true", help="Also time the final-answer call per format")
+    parser.add_argument("--repeats", type=int, default=5, help="Final-answer calls per format with --latency")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
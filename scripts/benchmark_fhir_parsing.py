@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Script to compare whole and streaming parsing of large FHIR Patient Bundles.
+
+Writes synthetic searchset Bundles (1k and 10k patients by default) to
+temporary files and turns each into formatted patients the way
+PatientPages does, once by reading and parsing the whole body and once
+with the incremental parser (requires ijson). Reports wall time and peak
+Python memory (tracemalloc). The whole parse holds the raw body, the
+parsed tree and the formatted list at once and grows with the Bundle;
+the streaming parse holds one entry at a time and stays flat.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+# Add backend and repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Nothing here calls the API, but the settings require a key
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from config import get_settings
+from fhir.client import FHIRClient
+from fhir.streaming import iter_bundle, streaming_available
+from loadtest.fake_fhir import generate_patients
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def write_bundle(path: str, count: int):
+    base = "http://fhir.example/fhir/r4/Patient"
+    bundle = {
+        "resourceType": "Bundle",
+        "type": "searchset",
+        "total": count,
+        "link": [{"relation": "self", "url": f"{base}?_count={count}"}],
+        "entry": [
+            {"fullUrl": f"{base}/{patient['id']}", "resource": patient, "search": {"mode": "match"}}
+            for patient in generate_patients(count)
+        ]
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f, ensure_ascii=False)
+
+
+def parse_whole(client: FHIRClient, path: str) -> int:
+    with open(path, 'rb') as f:
+        body = f.read()
+    patients = client._extract_patients_from_bundle(json.loads(body))
+    return len(patients)
+
+
+def parse_streaming(client: FHIRClient, path: str) -> int:
+    count = 0
+    with open(path, 'rb') as f:
+        for kind, value in iter_bundle(f):
+            resource = value.get('resource', {}) if kind == 'entry' else {}
+            if resource.get('resourceType') == 'Patient':
+                client._format_patient_data(resource)
+                count += 1
+    return count
+
+
+def measure(parse, client: FHIRClient, path: str) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = parse(client, path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'patients': count, 'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2**20, 2)}
+
+
+def main(args):
+    if not streaming_available():
+        raise SystemExit("ijson is not installed; pip install ijson")
+
+    client = FHIRClient(get_settings())
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.patients:
+            path = os.path.join(tmp, f"bundle-{count}.json")
+            write_bundle(path, count)
+            size_mb = round(os.path.getsize(path) / 2**20, 2)
+            for mode, parse in (("whole", parse_whole), ("streaming", parse_streaming)):
+                result = {'mode': mode, 'bundle_patients': count, 'bundle_mb': size_mb, **measure(parse, client, path)}
+                results.append(result)
+                print(f"{mode:<10} {count:>7} patients ({size_mb:>6.2f} MB): "
+                      f"{result['seconds']:>7.3f} s, peak {result['peak_mb']:>7.2f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark whole vs streaming FHIR Bundle parsing")
+    parser.add_argument("--patients", type=lambda value: [int(v) for v in value.split(',')], default=[1000, 10000],
+                        help="Comma-separated Bundle sizes (default 1000,10000)")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
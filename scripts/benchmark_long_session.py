@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Script to measure prompt size and latency over a long chat session.
+
+Replays a scripted conversation against a running backend and records
+prompt_tokens and processing_time of every turn. Run it once against a
+backend started with HISTORY_SUMMARIZATION=false and once with the default
+(true) to see the effect of rolling history summarization.
+"""
+
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import requests
+
+DEFAULT_SESSION = Path(__file__).parent / "eval_data" / "long_session.json"
+
+
+def replay(base_url: str, session_path: str, user_id: int, pause: float, output_path: str = None):
+    """
+    Send the scripted queries as one session and report per-turn usage.
+
+    Args:
+        base_url: Backend URL
+        session_path: JSON list of queries
+        user_id: User ID sent with each request
+        pause: Seconds to wait between turns (lets background summaries finish)
+        output_path: Optional path for the JSON report
+    """
+    with open(session_path, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+
+    session_id = None
+    turns = []
+    for turn, query in enumerate(queries, 1):
+        response = requests.post(
+            f"{base_url}/chat",
+            json={'query': query, 'session_id': session_id, 'user_id': user_id},
+            timeout=120
+        )
+        response.raise_for_status()
+        data = response.json()
+        session_id = data['session_id']
+        turns.append({
+            'turn': turn,
+            'prompt_tokens': data.get('prompt_tokens') or 0,
+            'processing_time': round(data['processing_time'], 3)
+        })
+        print(f"{turn:>4}{turns[-1]['prompt_tokens']:>10}{turns[-1]['processing_time']:>10.2f}s")
+        time.sleep(pause)
+
+    # Later turns are where summarization pays off
+    tail = turns[len(turns) // 2:]
+    report = {
+        'session_id': session_id,
+        'turns': turns,
+        'total_prompt_tokens': sum(t['prompt_tokens'] for t in turns),
+        'tail_mean_prompt_tokens': round(float(np.mean([t['prompt_tokens'] for t in tail])), 1),
+        'tail_mean_processing_time': round(float(np.mean([t['processing_time'] for t in tail])), 3)
+    }
+    print(f"Total prompt tokens: {report['total_prompt_tokens']}")
+    print(f"Second half: {report['tail_mean_prompt_tokens']} prompt tokens, "
+          f"{report['tail_mean_processing_time']}s per turn")
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a long chat session and report prompt tokens per turn")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--session", default=str(DEFAULT_SESSION), help="Scripted queries (JSON list)")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--pause", type=float, default=2.0)
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    replay(args.url, args.session, args.user_id, args.pause, args.output)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark intent classification on a labeled query set.
+
+Runs a router implementation (anything with classify_intent(query, history)
+returning an IntentCategory) over scripts/eval_data/router_queries.json and
+reports accuracy, a confusion matrix, latency percentiles and tokens per
+classification.
+
+The default LLM router can run live, record its API responses, or replay a
+recording offline:
+
+    python scripts/benchmark_router.py --mode record --model gpt-5-mini --reasoning-effort minimal
+    python scripts/benchmark_router.py --mode replay --model gpt-5-mini --reasoning-effort minimal
+
+No recordings are committed: replay needs a prior --mode record run with
+an API key for the same model and reasoning effort, stored under
+scripts/eval_data/router_recordings/ (commit it to share the offline run).
+Recordings are keyed by model, reasoning effort and the full request, so a
+changed routing prompt or query set is reported as missing recordings
+rather than silently replaying stale answers. Replayed latency is the
+recorded API latency plus the measured local overhead.
+
+With --process-tables DIR (default: raw_data_dir when it exists), queries
+routed to general_rag also go through the structured process store as in
+/chat, and cases labeled "structured": true/false check whether the store
+answers them, so questions that only mention a process are not taken over
+by table lookups.
+
+Other implementations are loaded with --router module:factory (called with
+no arguments), e.g. a local classifier under evaluation.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import importlib
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from models.schemas import Message, IntentCategory
+from usage import start_request_usage
+from config import get_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_SET = Path(__file__).parent / "eval_data" / "router_queries.json"
+DEFAULT_RECORDINGS = Path(__file__).parent / "eval_data" / "router_recordings"
+CATEGORIES = [category.value for category in IntentCategory]
+
+
+class MissingRecording(KeyError):
+    pass
+
+
+class RecordedResponses:
+    """
+    Stand-in for client.responses that records or replays parse() calls.
+
+    Recordings are stored as JSON lines of {"key", "output", "usage", "latency"}.
+    """
+
+    def __init__(self, path: Path, live_client=None):
+        self.path = path
+        self.live_client = live_client
+        self.recordings = {}
+        self.last_latency = 0.0
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.recordings[entry['key']] = entry
+
+    @staticmethod
+    def request_key(kwargs: dict) -> str:
+        request = {key: value for key, value in kwargs.items() if key != 'text_format'}
+        request['text_format'] = kwargs['text_format'].__name__
+        return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def parse(self, **kwargs):
+        key = self.request_key(kwargs)
+        text_format = kwargs['text_format']
+
+        if self.live_client is None:
+            entry = self.recordings.get(key)
+            if entry is None:
+                raise MissingRecording(f"No recording for request {key[:12]}; re-run with --mode record")
+            self.last_latency = entry['latency']
+            usage = entry['usage']
+            return SimpleNamespace(
+                output_parsed=text_format.model_validate(entry['output']),
+                usage=SimpleNamespace(
+                    input_tokens=usage['input_tokens'],
+                    output_tokens=usage['output_tokens'],
+                    input_tokens_details=SimpleNamespace(cached_tokens=usage['cached_tokens'])
+                )
+            )
+
+        start = time.perf_counter()
+        response = self.live_client.responses.parse(**kwargs)
+        latency = time.perf_counter() - start
+        self.last_latency = 0.0  # already part of the measured wall time
+        details = getattr(response.usage, 'input_tokens_details', None)
+        entry = {
+            'key': key,
+            'output': response.output_parsed.model_dump(mode='json'),
+            'usage': {
+                'input_tokens': response.usage.input_tokens,
+                'output_tokens': response.usage.output_tokens,
+                'cached_tokens': getattr(details, 'cached_tokens', 0) or 0
+            },
+            'latency': round(latency, 4)
+        }
+        self.recordings[key] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return response
+
+
+def build_router(args):
+    """Instantiate the router under test and its recorded-response hook (if any)."""
+    if args.router != "llm":
+        module_name, _, attribute = args.router.partition(':')
+        return getattr(importlib.import_module(module_name), attribute)(), None
+
+    from rag.router import RAGRouter
+    router = RAGRouter()
+    if args.model:
+        router.model = args.model
+    if args.reasoning_effort is not None:
+        router.reasoning_effort = args.reasoning_effort
+    # Keep the benchmark from sharing prompt-cache routing with production traffic
+    router.cache_key = f"{router.cache_key}-benchmark"
+
+    if args.mode == "live":
+        return router, None
+
+    effort = router.reasoning_effort or "none"
+    recordings_path = Path(args.recordings) / f"{router.model}-{effort}.jsonl"
+    if args.mode == "replay" and not recordings_path.exists():
+        raise SystemExit(f"No recordings at {recordings_path}; run once with --mode record "
+                         f"(needs OPENAI_API_KEY) before replaying offline")
+    responses = RecordedResponses(recordings_path, router.client if args.mode == "record" else None)
+    router.client = SimpleNamespace(responses=responses)
+    return router, responses
+
+
+def load_process_tables(directory):
+    """Process table store for the structured check, or None without tables."""
+    if not directory or not Path(directory).is_dir():
+        return None
+    from rag.structured import ProcessTableStore
+    store = ProcessTableStore.from_directory(directory)
+    return store if len(store) else None
+
+
+def history_messages(item: dict) -> list:
+    """Prior user turns of a multi-turn case as Message objects."""
+    return [
+        Message(role="user", content=text, timestamp=datetime.now())
+        for text in item.get('history', [])
+    ]
+
+
+def benchmark(args):
+    with open(args.queries, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+
+    router, responses = build_router(args)
+    process_tables = load_process_tables(args.process_tables)
+    confusion = {expected: {predicted: 0 for predicted in CATEGORIES} for expected in CATEGORIES}
+    latencies, input_tokens, output_tokens, cached_tokens = [], [], [], []
+    per_query = []
+
+    for item in queries:
+        usage = start_request_usage()
+        start = time.perf_counter()
+        predicted = router.classify_intent(item['query'], history_messages(item)).value
+        latency = time.perf_counter() - start + (responses.last_latency if responses else 0.0)
+
+        if args.router == "llm" and not usage.calls:
+            # RAGRouter swallows API errors (and missing recordings) and falls back to general_rag
+            raise SystemExit(f"Classification call failed for '{item['query']}', see the error above")
+
+        # Same order as /chat: only queries routed to general_rag reach the process store
+        structured = None
+        if process_tables is not None and 'structured' in item:
+            structured = predicted == IntentCategory.GENERAL_RAG.value and process_tables.answer(item['query']) is not None
+
+        confusion[item['expected']][predicted] += 1
+        latencies.append(latency)
+        input_tokens.append(usage.input_tokens)
+        output_tokens.append(usage.output_tokens)
+        cached_tokens.append(usage.cached_tokens)
+        per_query.append({
+            'query': item['query'],
+            'history': len(item.get('history', [])),
+            'expected': item['expected'],
+            'predicted': predicted,
+            'latency_ms': round(latency * 1000, 1),
+            'structured': structured,
+            'expected_structured': item.get('structured')
+        })
+
+    correct = sum(confusion[category][category] for category in CATEGORIES)
+    latencies_ms = np.array(latencies) * 1000
+    per_category = {}
+    for category in CATEGORIES:
+        support = sum(confusion[category].values())
+        predicted_total = sum(confusion[expected][category] for expected in CATEGORIES)
+        true_positive = confusion[category][category]
+        per_category[category] = {
+            'support': support,
+            'recall': round(true_positive / support, 3) if support else None,
+            'precision': round(true_positive / predicted_total, 3) if predicted_total else None
+        }
+    multi_turn = [row for row in per_query if row['history']]
+    structured_checked = [row for row in per_query if row['structured'] is not None]
+
+    report = {
+        'router': args.router,
+        'model': getattr(router, 'model', None),
+        'reasoning_effort': getattr(router, 'reasoning_effort', None),
+        'mode': args.mode,
+        'queries': len(queries),
+        'accuracy': round(correct / len(queries), 4),
+        'multi_turn_accuracy': round(
+            sum(row['expected'] == row['predicted'] for row in multi_turn) / len(multi_turn), 4
+        ) if multi_turn else None,
+        'structured_accuracy': round(
+            sum(row['structured'] == row['expected_structured'] for row in structured_checked) / len(structured_checked), 4
+        ) if structured_checked else None,
+        'structured_errors': [row for row in structured_checked if row['structured'] != row['expected_structured']],
+        'latency_p50_ms': round(float(np.percentile(latencies_ms, 50)), 1),
+        'latency_p95_ms': round(float(np.percentile(latencies_ms, 95)), 1),
+        'input_tokens_mean': round(float(np.mean(input_tokens)), 1),
+        'output_tokens_mean': round(float(np.mean(output_tokens)), 1),
+        'cached_tokens_mean': round(float(np.mean(cached_tokens)), 1),
+        'per_category': per_category,
+        'confusion': confusion,
+        'errors': [row for row in per_query if row['expected'] != row['predicted']]
+    }
+
+    print(f"Router: {report['router']} model={report['model']} effort={report['reasoning_effort']} ({args.mode})")
+    print(f"Accuracy: {report['accuracy']:.3f} (multi-turn {report['multi_turn_accuracy']})")
+    if structured_checked:
+        print(f"Structured store: {report['structured_accuracy']:.3f} of {len(structured_checked)} labeled queries")
+    else:
+        print("Structured store: not checked (no process tables)")
+    print(f"Latency p50/p95: {report['latency_p50_ms']:.0f} / {report['latency_p95_ms']:.0f} ms")
+    print(f"Tokens per classification: input={report['input_tokens_mean']:.0f} "
+          f"(cached {report['cached_tokens_mean']:.0f}) output={report['output_tokens_mean']:.0f}")
+    print()
+    short = [category[:12] for category in CATEGORIES]
+    header = "expected \\ predicted"
+    print(f"{header:<22}" + "".join(f"{name:>14}" for name in short))
+    for category in CATEGORIES:
+        print(f"{category:<22}" + "".join(f"{confusion[category][predicted]:>14}" for predicted in CATEGORIES))
+    if report['errors']:
+        print("\nMisclassified:")
+        for row in report['errors']:
+            print(f"  [{row['expected']} -> {row['predicted']}] {row['query']}")
+    if report['structured_errors']:
+        print("\nStructured store disagrees:")
+        for row in report['structured_errors']:
+            taken = "answered from tables" if row['structured'] else "not answered from tables"
+            print(f"  [{taken}] {row['query']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark intent classification accuracy and latency")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Labeled query set (JSON)")
+    parser.add_argument("--router", default="llm", help="'llm' (RAGRouter) or module:factory of another implementation")
+    parser.add_argument("--mode", choices=["live", "record", "replay"], default="live",
+                        help="LLM router only: call the API, call and record, or replay recordings offline")
+    parser.add_argument("--model", default=None, help=f"Override router_model (default {get_settings().router_model})")
+    parser.add_argument("--reasoning-effort", default=None, help="Override router_reasoning_effort ('' to omit)")
+    parser.add_argument("--recordings", default=str(DEFAULT_RECORDINGS), help="Directory with recorded responses")
+    parser.add_argument("--process-tables", default=get_settings().raw_data_dir,
+                        help="Directory with process XLSX tables for the structured check ('' to skip)")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    benchmark(args)
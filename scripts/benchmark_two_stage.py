@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark two-stage (document prefilter -> chunk search) retrieval
+against the flat chunk-level vector_search.
+
+Query embeddings are generated once up front, so only search time is measured.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from iris_db import IRISVectorDB
+from vector_snapshot import SnapshotVectorStore
+from ingestion.embedder import EmbeddingGenerator
+from config import get_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_SET = Path(__file__).parent / "eval_data" / "retrieval_queries.json"
+
+
+def document_recall(results: list, expected_documents: list) -> float:
+    """Fraction of expected documents present in the results."""
+    if not expected_documents:
+        return 1.0
+    retrieved = {row[1] for row in results}
+    return len(retrieved & set(expected_documents)) / len(expected_documents)
+
+
+def overlap(results: list, reference: list) -> float:
+    """Fraction of reference chunk IDs that are also in results."""
+    if not reference:
+        return 1.0
+    return len({row[0] for row in results} & {row[0] for row in reference}) / len(reference)
+
+
+def benchmark(query_set_path: str, top_k: int, top_n: int, user_id: str = None,
+              repeats: int = 3, output_path: str = None):
+    """
+    Compare flat and two-stage search on a labeled query set.
+
+    Args:
+        query_set_path: JSON list of {"query", "expected_documents"}
+        top_k: Number of chunks per query
+        top_n: Number of documents selected in the first stage
+        user_id: Apply this user's file access (default: no restriction)
+        repeats: Timed repetitions per query
+        output_path: Optional path for the JSON report
+    """
+    settings = get_settings()
+    with open(query_set_path, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+
+    allowed_files = None
+    if user_id is not None:
+        users_config = settings.users_config
+        allowed_files = users_config.get_allowed_files_for_user(users_config.users[str(user_id)])
+
+    embedder = EmbeddingGenerator()
+    query_vectors = [embedder.generate_embedding(item['query']).tolist() for item in queries]
+
+    db = SnapshotVectorStore() if settings.vector_store == "snapshot" else IRISVectorDB()
+    db.connect()
+
+    def flat(vector):
+        # Baseline: global top-k, access filter applied afterwards
+        results = db.vector_search(vector, top_k=top_k, min_score=settings.min_relevance_score)
+        if allowed_files is not None:
+            results = [row for row in results if row[1] in allowed_files]
+        return results
+
+    def two_stage(vector):
+        documents = db.document_search(vector, top_n=top_n, allowed_files=allowed_files)
+        return db.vector_search(
+            vector, top_k=top_k, min_score=settings.min_relevance_score,
+            document_names=[doc[0] for doc in documents]
+        )
+
+    def exact(vector):
+        # Reference: access filter pushed into the search, no prefilter
+        return db.vector_search(
+            vector, top_k=top_k, min_score=settings.min_relevance_score,
+            document_names=allowed_files
+        )
+
+    try:
+        report = {'top_k': top_k, 'top_n': top_n, 'user_id': user_id, 'queries': len(queries), 'modes': {}}
+        references = [exact(vector) for vector in query_vectors]
+
+        for mode, search in (('flat', flat), ('two_stage', two_stage)):
+            latencies, recalls, overlaps, counts = [], [], [], []
+            for item, vector, reference in zip(queries, query_vectors, references):
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    results = search(vector)
+                    latencies.append(time.perf_counter() - start)
+                recalls.append(document_recall(results, item['expected_documents']))
+                overlaps.append(overlap(results, reference))
+                counts.append(len(results))
+
+            latencies_ms = np.array(latencies) * 1000
+            report['modes'][mode] = {
+                'recall': round(float(np.mean(recalls)), 4),
+                'overlap_with_exact': round(float(np.mean(overlaps)), 4),
+                'avg_results': round(float(np.mean(counts)), 2),
+                'latency_p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+                'latency_p95_ms': round(float(np.percentile(latencies_ms, 95)), 2)
+            }
+
+        print(f"{'mode':<12}{'recall':>8}{'overlap':>9}{'results':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        for mode, stats in report['modes'].items():
+            print(f"{mode:<12}{stats['recall']:>8.3f}{stats['overlap_with_exact']:>9.3f}"
+                  f"{stats['avg_results']:>9.1f}{stats['latency_p50_ms']:>9.1f}{stats['latency_p95_ms']:>9.1f}")
+
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Report written to {output_path}")
+
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark two-stage vs flat vector search")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Labeled query set (JSON)")
+    parser.add_argument("--top-k", type=int, default=get_settings().top_k_results)
+    parser.add_argument("--top-n", type=int, default=get_settings().prefilter_documents)
+    parser.add_argument("--user-id", default=None, help="Apply file access of this user")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    benchmark(args.queries, args.top_k, args.top_n, args.user_id, args.repeats, args.output)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Script to check how /chat threads conversation history through a turn.
+
+Runs app._chat for two turns of one session with the router and generator
+replaced by recorders (no API calls). The history given to classification
+and generation must be the session as it was before the turn, without the
+current query, even though the user message is saved to the session first;
+the session must hold the user message and the assistant reply afterwards.
+Exits non-zero on any mismatch.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Nothing here calls the API, but the settings require a key
+os.environ.setdefault("OPENAI_API_KEY", "check")
+
+import app
+from conversation.session_manager import SessionManager
+from conversation.summarizer import ConversationSummarizer
+from models.schemas import ChatRequest, IntentCategory
+
+# Configure logging
+logging.basicConfig(
+    level=logging.ERROR,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+# app configures INFO logging on import
+logging.getLogger().setLevel(logging.ERROR)
+
+QUERIES = ["Ahoj", "Co umíš?"]
+
+
+class RecordingRouter:
+    """Classifies everything as conversational and records the history it was given."""
+
+    def __init__(self):
+        self.histories = []
+
+    def classify_intent(self, query, history):
+        self.histories.append([message.content for message in history])
+        return IntentCategory.CONVERSATIONAL
+
+
+class RecordingGenerator:
+    """Answers with a fixed text and records the history and the stored session at generation time."""
+
+    def __init__(self, session_manager: SessionManager):
+        self.session_manager = session_manager
+        self.session_id = None
+        self.histories = []
+        self.sessions = []
+
+    def generate_response(self, query, context, history, category, user_system_prompt=None, history_summary=None):
+        self.histories.append([message.content for message in history])
+        self.sessions.append([message.content for message in self.session_manager.get_session(self.session_id)])
+        return f"Odpověď na: {query}"
+
+
+def main(args):
+    session_manager = SessionManager()
+    summarizer = ConversationSummarizer(session_manager)
+    router = RecordingRouter()
+    generator = RecordingGenerator(session_manager)
+    app.session_manager, app.summarizer, app.rag_router, app.generator = session_manager, summarizer, router, generator
+
+    session_id = session_manager.create_session()
+    generator.session_id = session_id
+    try:
+        for query in QUERIES:
+            asyncio.run(app._chat(ChatRequest(query=query, session_id=session_id, user_id=args.user_id)))
+    finally:
+        summarizer.shutdown()
+
+    expected_history = [[], ["Ahoj", "Odpověď na: Ahoj"]]
+    checks = [
+        ("router history excludes the current query", router.histories, expected_history),
+        ("generator history excludes the current query", generator.histories, expected_history),
+        ("user message is saved before generation", generator.sessions,
+         [["Ahoj"], ["Ahoj", "Odpověď na: Ahoj", "Co umíš?"]]),
+        ("session holds both turns afterwards",
+         [message.content for message in session_manager.get_session(session_id)],
+         ["Ahoj", "Odpověď na: Ahoj", "Co umíš?", "Odpověď na: Co umíš?"]),
+    ]
+
+    failures = []
+    for name, actual, expected in checks:
+        if actual != expected:
+            failures.append({'check': name, 'expected': expected, 'actual': actual})
+            print(f"FAIL {name}: expected {expected}, got {actual}")
+        else:
+            print(f"ok   {name}")
+
+    print(f"{len(checks) - len(failures)}/{len(checks)} checks passed")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'checks': len(checks), 'failures': failures}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check conversation history handling in /chat")
+    parser.add_argument("--user-id", type=int, default=1, help="User from user_info.json")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to check rule-based FHIR parameter extraction on a labeled query set.
+
+Runs fhir/extraction.py over scripts/eval_data/fhir_extraction_cases.json,
+where "expected" is the search_fhir_patients arguments or null for queries
+that must go to LLM tool calling, and exits non-zero on any mismatch.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fhir.extraction import extract_patient_search
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASES = Path(__file__).parent / "eval_data" / "fhir_extraction_cases.json"
+
+
+def main(args):
+    with open(args.cases, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+
+    failures = []
+    for case in cases:
+        actual = extract_patient_search(case['query'])
+        if actual != case['expected']:
+            failures.append({**case, 'actual': actual})
+            print(f"FAIL {case['query']!r}: expected {case['expected']}, got {actual}")
+
+    rules = sum(1 for case in cases if case['expected'] is not None)
+    print(f"{len(cases) - len(failures)}/{len(cases)} cases passed "
+          f"({rules} extracted by rules, {len(cases) - rules} left to the LLM)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cases': len(cases), 'failures': failures}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check rule-based FHIR parameter extraction")
+    parser.add_argument("--cases", default=str(DEFAULT_CASES), help="Labeled query set (JSON)")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Script to check FHIR search parameter handling against the fake FHIR server.
+
+Starts loadtest/fake_fhir.py and runs birthdate and gender searches through
+FHIRClient with the cache and index disabled. Valid lookups (year, month,
+range, ne, count) must take exactly one request and succeed; invalid ones
+(future date, empty range, unknown gender or prefix) must be rejected
+locally with no request. Every valid search is repeated on a synced patient
+index and must return the same patients and total. Exits non-zero on any
+mismatch.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add backend and repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Nothing here calls the API, but the settings require a key
+os.environ.setdefault("OPENAI_API_KEY", "check")
+
+from config import Settings
+from fhir.client import FHIRBadRequestError, FHIRClient
+from loadtest.fake_fhir import start_fake_fhir
+
+# Configure logging
+logging.basicConfig(
+    level=logging.ERROR,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# (name, search parameters, count only)
+VALID_CASES = [
+    ('year', {'birthdate': '1980'}, False),
+    # Birth month and date of the first synthetic patient, so they match someone
+    ('month', {'birthdate': '1973-12'}, False),
+    ('day', {'birthdate': '1973-12-10'}, False),
+    ('range', {'birthdate': 'ge1970-01-01&le1979-12-31'}, False),
+    ('range list', {'birthdate': ['ge1970', 'lt1975']}, False),
+    ('not year', {'birthdate': 'ne1980', 'family': 'Novák'}, False),
+    ('gender and year', {'gender': 'male', 'birthdate': '1973'}, False),
+    ('count', {'gender': 'male', 'birthdate': 'lt1950-01-01'}, True),
+    ('count not year', {'birthdate': 'ne1980'}, True),
+]
+INVALID_CASES = [
+    ('future date', {'birthdate': 'ge2999-01-01'}),
+    ('empty range', {'birthdate': 'ge1990-01-01&le1980-12-31'}),
+    ('bad gender', {'gender': 'muz'}),
+    ('bad prefix', {'birthdate': 'sa1980'}),
+    ('bad date', {'birthdate': '1980-13'}),
+]
+
+
+def run(client: FHIRClient, params: dict, count_only: bool, limit: int):
+    if count_only:
+        return None, client.count_patients(params)
+    patients, total = client.search_patients_with_total(params, limit)
+    return sorted(patient['id'] for patient in patients), total
+
+
+def main(args):
+    server = start_fake_fhir(patient_count=args.patients, latency=0)
+    handler = server.RequestHandlerClass
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    settings = {'fhir_base_url': base_url, 'fhir_cache_enabled': False, 'fhir_page_size': args.patients,
+                'fhir_max_results': args.patients}
+    rest = FHIRClient(Settings(**settings))
+    indexed = FHIRClient(Settings(**settings, fhir_index_enabled=True))
+    failures = []
+
+    try:
+        indexed.index.sync()
+        for name, params, count_only in VALID_CASES:
+            handler.request_count = 0
+            try:
+                ids, total = run(rest, params, count_only, args.patients)
+            except FHIRBadRequestError as e:
+                failures.append({'case': name, 'problems': [str(e)]})
+                print(f"FAIL {name}: {e}")
+                continue
+            requests_made = handler.request_count
+            index_ids, index_total = run(indexed, params, count_only, args.patients)
+            problems = []
+            if requests_made != 1:
+                problems.append(f"{requests_made} requests, expected 1")
+            if handler.request_count != requests_made:
+                problems.append("index search made a request")
+            if (ids, total) != (index_ids, index_total):
+                problems.append(f"REST returned {total} patients, index {index_total}")
+            if problems:
+                failures.append({'case': name, 'problems': problems})
+                print(f"FAIL {name}: {'; '.join(problems)}")
+            else:
+                print(f"ok   {name}: {total} patients, 1 request")
+
+        for name, params in INVALID_CASES:
+            handler.request_count = 0
+            try:
+                rest.search_patients_with_total(params)
+                rejected = False
+            except FHIRBadRequestError:
+                rejected = True
+            if not rejected or handler.request_count:
+                problem = f"rejected={rejected}, {handler.request_count} requests, expected local rejection"
+                failures.append({'case': name, 'problems': [problem]})
+                print(f"FAIL {name}: {problem}")
+            else:
+                print(f"ok   {name}: rejected without a request")
+    finally:
+        rest.close()
+        indexed.close()
+        server.shutdown()
+
+    cases = len(VALID_CASES) + len(INVALID_CASES)
+    print(f"{cases - len(failures)}/{cases} cases passed")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cases': cases, 'failures': failures}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check FHIR search parameters against the fake FHIR server")
+    parser.add_argument("--patients", type=int, default=500, help="Synthetic patients on the fake server")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Script to check which questions the structured process store answers.
+
+Builds a ProcessTableStore from a small synthetic process table and runs
+labeled queries through ProcessTableStore.answer(): lookups must be
+answered with the expected kind, and questions about the directive, form
+or regulation behind a process must be declined so they go to vector
+retrieval. Exits non-zero on any mismatch.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import pandas as pd
+
+from rag.structured import ProcessTableStore
+
+# Configure logging
+logging.basicConfig(
+    level=logging.ERROR,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PROCESSES = [
+    ('EO', 'Schvalování faktur', 'vedoucí EO'),
+    ('EO', 'Vyúčtování pracovní cesty', 'vedoucí EO'),
+    ('EO', 'Inventarizace majetku', 'vedoucí EO'),
+    ('OIAK', 'Příprava podkladů pro jednání rady kvality', 'předseda rady kvality'),
+    ('OIAK', 'Archivace dokumentů', 'vedoucí OIAK'),
+]
+
+# (query, expected kind or None when the store must decline)
+CASES = [
+    ("Kdo vlastní proces schvalování faktur?", 'process_owner'),
+    ("Jak probíhá proces inventarizace majetku?", 'process_detail'),
+    ("Kolik procesů má EO?", 'count_by_department'),
+    # rada/radu fold to the same stem as řád, but are not a rules document
+    ("Kdo vlastní proces přípravy podkladů pro jednání rady kvality?", 'process_owner'),
+    ("Kdo je zodpovědný za proces přípravy podkladů pro radu kvality?", 'process_owner'),
+    ("Podle jaké směrnice se řídí proces schvalování faktur?", None),
+    ("Kde najdu formulář k procesu vyúčtování pracovní cesty?", None),
+    ("Jaký metodický pokyn upravuje proces archivace dokumentů?", None),
+    ("Kde je v organizačním řádu popsán proces inventarizace majetku?", None),
+]
+
+
+def build_store() -> ProcessTableStore:
+    return ProcessTableStore(pd.DataFrame({
+        'Dokument': [f"Zhodnocení procesů {department}.xlsx" for department, _, _ in PROCESSES],
+        'Oddělení': [department for department, _, _ in PROCESSES],
+        'Proces': [process for _, process, _ in PROCESSES],
+        'Vlastník procesu': [owner for _, _, owner in PROCESSES],
+    }))
+
+
+def main(args):
+    store = build_store()
+    failures = []
+    for query, expected in CASES:
+        result = store.answer(query)
+        actual = result['kind'] if result else None
+        if actual != expected:
+            failures.append({'query': query, 'expected': expected, 'actual': actual})
+            print(f"FAIL {query!r}: expected {expected}, got {actual}")
+        else:
+            print(f"ok   {query!r}: {actual}")
+
+    print(f"{len(CASES) - len(failures)}/{len(CASES)} cases passed")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cases': len(CASES), 'failures': failures}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check structured process store answers")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Script to check snapshot vector search against edge cases.
+
+Exports a small synthetic snapshot (and an empty one) to a temporary
+directory and runs SnapshotVectorStore.vector_search with regular,
+zero, negative and oversized top_k, document filters that match nothing
+and an empty snapshot. Like IRISVectorDB, searches with nothing to return
+must return an empty list rather than raise. Exits non-zero on any mismatch.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Nothing here calls the API, but the settings require a key
+os.environ.setdefault("OPENAI_API_KEY", "check")
+
+from vector_snapshot import SnapshotVectorStore, export_snapshot
+
+# Configure logging
+logging.basicConfig(
+    level=logging.ERROR,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DIMENSION = 8
+DOCUMENTS = ["Organizacni_rad.docx", "Zhodnocení procesů EO.xlsx"]
+
+# (name, snapshot, search arguments, expected number of results)
+CASES = [
+    ('top 3', 'full', {'top_k': 3}, 3),
+    ('top_k above size', 'full', {'top_k': 100}, 6),
+    ('top_k zero', 'full', {'top_k': 0}, 0),
+    ('top_k negative', 'full', {'top_k': -1}, 0),
+    ('one document', 'full', {'top_k': 5, 'document_names': [DOCUMENTS[0]]}, 3),
+    ('one document, top_k zero', 'full', {'top_k': 0, 'document_names': [DOCUMENTS[0]]}, 0),
+    ('no documents', 'full', {'top_k': 5, 'document_names': []}, 0),
+    ('unknown document', 'full', {'top_k': 5, 'document_names': ["Neexistuje.pdf"]}, 0),
+    ('empty snapshot', 'empty', {'top_k': 5}, 0),
+    ('empty snapshot, top_k zero', 'empty', {'top_k': 0}, 0),
+]
+
+
+def synthetic_rows(count: int):
+    rng = np.random.default_rng(5)
+    for i in range(count):
+        yield (i + 1, DOCUMENTS[i % 2], "docx", f"Text bloku {i}.", i // 2, "EO", "",
+               rng.standard_normal(DIMENSION).tolist())
+
+
+def open_store(root: str, count: int) -> SnapshotVectorStore:
+    export_snapshot(synthetic_rows(count), root, "synthetic", DIMENSION)
+    store = SnapshotVectorStore(root)
+    store.connect()
+    return store
+
+
+def main(args):
+    query = np.random.default_rng(6).standard_normal(DIMENSION).tolist()
+    failures = []
+
+    with tempfile.TemporaryDirectory(prefix="snapshot-check-") as tmp:
+        stores = {
+            'full': open_store(os.path.join(tmp, "full"), 6),
+            'empty': open_store(os.path.join(tmp, "empty"), 0),
+        }
+        try:
+            for name, snapshot, search, expected in CASES:
+                try:
+                    results = stores[snapshot].vector_search(query, min_score=-1.0, **search)
+                    problem = None if len(results) == expected else f"{len(results)} results, expected {expected}"
+                    if results and [r[5] for r in results] != sorted((r[5] for r in results), reverse=True):
+                        problem = "results not sorted by score"
+                except Exception as e:
+                    problem = f"raised {type(e).__name__}: {e}"
+                if problem:
+                    failures.append({'case': name, 'problem': problem})
+                    print(f"FAIL {name}: {problem}")
+                else:
+                    print(f"ok   {name}: {expected} results")
+        finally:
+            for store in stores.values():
+                store.disconnect()
+
+    print(f"{len(CASES) - len(failures)}/{len(CASES)} cases passed")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cases': len(CASES), 'failures': failures}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check snapshot vector search edge cases")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    main(parser.parse_args())
@@ -54,6 +54,18 @@ def delete_database():
         except Exception as e:
             logger.warning(f"Could not drop table (may not exist): {e}")
 
+        # Drop document-level table used for two-stage retrieval
+        logger.info("Dropping Documents table...")
+        try:
+            db.cursor.execute("DROP INDEX DocHNSWIndex ON FNBrno.Documents")
+        except Exception as e:
+            logger.warning(f"Could not drop document index (may not exist): {e}")
+        try:
+            db.cursor.execute("DROP TABLE FNBrno.Documents")
+            logger.info("✓ Documents table dropped")
+        except Exception as e:
+            logger.warning(f"Could not drop table (may not exist): {e}")
+
         # Commit changes
         db.conn.commit()
 
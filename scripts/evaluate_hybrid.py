@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Script to compare lexical-only, vector-only and hybrid (RRF) retrieval.
+
+Runs every query from a labeled set through the three modes and reports
+document-level recall@k and latency percentiles.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from iris_db import IRISVectorDB
+from vector_snapshot import SnapshotVectorStore
+from ingestion.embedder import EmbeddingGenerator
+from rag.lexical import BM25Index
+from rag.retriever import VectorRetriever
+from config import get_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_SET = Path(__file__).parent / "eval_data" / "retrieval_queries.json"
+
+
+def document_recall(chunks: list, expected_documents: list) -> float:
+    """Fraction of expected documents present among the retrieved chunks."""
+    if not expected_documents:
+        return 1.0
+    retrieved = {chunk['document_name'] for chunk in chunks}
+    return len(retrieved & set(expected_documents)) / len(expected_documents)
+
+
+def summarize(recalls: list, latencies: list) -> dict:
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'recall': round(float(np.mean(recalls)), 4),
+        'latency_p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'latency_p95_ms': round(float(np.percentile(latencies_ms, 95)), 2),
+        'latency_mean_ms': round(float(np.mean(latencies_ms)), 2)
+    }
+
+
+def evaluate(query_set_path: str, top_k: int, output_path: str = None):
+    """
+    Evaluate the three retrieval modes on a labeled query set.
+
+    Args:
+        query_set_path: JSON list of {"query", "expected_documents"}
+        top_k: Number of chunks retrieved per query
+        output_path: Optional path for the JSON report
+    """
+    settings = get_settings()
+    with open(query_set_path, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+
+    db = SnapshotVectorStore() if settings.vector_store == "snapshot" else IRISVectorDB()
+    db.connect()
+
+    try:
+        build_start = time.perf_counter()
+        index = BM25Index.from_rows(db.iter_chunks(include_vectors=False))
+        build_time = time.perf_counter() - build_start
+
+        retriever = VectorRetriever(db, EmbeddingGenerator(), index)
+        modes = {
+            'lexical': lambda q: index.search(q, top_k=top_k),
+            'vector': lambda q: retriever._vector_search(q, top_k, settings.min_relevance_score),
+            'hybrid': lambda q: retriever.retrieve(q, top_k=top_k)
+        }
+
+        report = {'top_k': top_k, 'queries': len(queries), 'index_build_s': round(build_time, 3), 'modes': {}}
+        per_query = []
+
+        for mode, search in modes.items():
+            recalls, latencies = [], []
+            for item in queries:
+                start = time.perf_counter()
+                chunks = search(item['query'])
+                latencies.append(time.perf_counter() - start)
+                recall = document_recall(chunks, item['expected_documents'])
+                recalls.append(recall)
+                per_query.append({'mode': mode, 'query': item['query'], 'recall': recall})
+            report['modes'][mode] = summarize(recalls, latencies)
+
+        report['per_query'] = per_query
+
+        print(f"{'mode':<10}{'recall@' + str(top_k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+        for mode, stats in report['modes'].items():
+            print(f"{mode:<10}{stats['recall']:>12.3f}{stats['latency_p50_ms']:>10.1f}{stats['latency_p95_ms']:>10.1f}")
+
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Report written to {output_path}")
+
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare lexical, vector and hybrid retrieval")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Labeled query set (JSON)")
+    parser.add_argument("--top-k", type=int, default=get_settings().top_k_results)
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    evaluate(args.queries, args.top_k, args.output)
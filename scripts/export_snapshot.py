@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Script to export the FN Brno vector database into a versioned on-disk snapshot.
+
+The snapshot can be served read-only by the backend (vector_store = "snapshot")
+or loaded into a fresh IRIS instance with load_snapshot.py without calling
+the embedding API.
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from iris_db import IRISVectorDB
+from vector_snapshot import export_snapshot
+from config import get_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def export_database(snapshot_root: str):
+    """
+    Dump all chunks, vectors and metadata from IRIS to a new snapshot version.
+
+    Args:
+        snapshot_root: Directory holding snapshot versions
+    """
+    settings = get_settings()
+    db = IRISVectorDB()
+
+    try:
+        logger.info("Connecting to InterSystems IRIS...")
+        db.connect()
+
+        total_chunks = db.get_chunk_count()
+        logger.info(f"Exporting {total_chunks} chunks to {snapshot_root}")
+
+        snapshot_dir = export_snapshot(
+            db.iter_chunks(include_vectors=True),
+            snapshot_root=snapshot_root,
+            embedding_model=settings.embedding_model,
+            dimension=settings.embedding_dimension
+        )
+
+        logger.info(f"✓ Snapshot export complete: {snapshot_dir}")
+
+    except Exception as e:
+        logger.error(f"Error during snapshot export: {e}")
+        raise
+
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export vector database to a snapshot")
+    parser.add_argument("--snapshot-dir", default=get_settings().snapshot_dir,
+                        help="Snapshot root directory (default from config)")
+    args = parser.parse_args()
+
+    export_database(args.snapshot_dir)
@@ -14,7 +14,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 from iris_db import IRISVectorDB
 from ingestion.parsers import parse_document
 from ingestion.chunker import TextChunker
-from ingestion.embedder import EmbeddingGenerator
+from ingestion.embedder import EmbeddingGenerator, compute_document_vectors
 from config import get_settings
 
 # Configure logging
@@ -46,10 +46,11 @@ def ingest_documents(raw_data_path: str):
     logger.info("Starting document ingestion pipeline")
 
     # Initialize components
+    settings = get_settings()
     db = IRISVectorDB()
-    chunk_size=700
-    chunker = TextChunker(chunk_size=chunk_size, overlap=100)
-    logger.info(f"Chunking with chink size {chunk_size}")
+    chunk_size = settings.chunk_size
+    chunker = TextChunker(chunk_size=chunk_size, overlap=settings.chunk_overlap)
+    logger.info(f"Chunking with chunk size {chunk_size} and overlap {settings.chunk_overlap}")
     embedder = EmbeddingGenerator()
 
     try:
@@ -60,6 +61,7 @@ def ingest_documents(raw_data_path: str):
         # Create table and index if they don't exist
         logger.info("Setting up database schema...")
         db.create_vector_table()
+        db.create_document_table()
 
         # Find all documents
         documents = find_documents(raw_data_path)
@@ -110,9 +112,14 @@ def ingest_documents(raw_data_path: str):
             # Insert into database
             db.insert_chunks(batch_with_embeddings)
 
+        # Document-level centroids for two-stage retrieval
+        logger.info("Computing document vectors...")
+        db.insert_documents(compute_document_vectors(all_chunks))
+
         # Create index after insertion for better performance
         logger.info("Creating HNSW index...")
         db.create_vector_index()
+        db.create_document_index()
 
         # Show statistics
         total_chunks = db.get_chunk_count()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Script to bootstrap the FN Brno vector database from an exported snapshot.
+
+Inserts the stored chunk texts and vectors into IRIS directly, so a fresh
+environment does not need to call the embedding API.
+"""
+
+import os
+import sys
+import logging
+import argparse
+from itertools import islice
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from iris_db import IRISVectorDB
+from vector_snapshot import VectorSnapshot
+from ingestion.embedder import compute_document_vectors
+from config import get_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_snapshot(snapshot_root: str, version: str = None, batch_size: int = 100):
+    """
+    Load a snapshot version into the IRIS vector table.
+
+    Args:
+        snapshot_root: Directory holding snapshot versions
+        version: Snapshot version to load (default: CURRENT)
+        batch_size: Number of chunks inserted per batch
+    """
+    settings = get_settings()
+    snapshot = VectorSnapshot.open(snapshot_root, version)
+
+    manifest = snapshot.manifest
+    if manifest['dimension'] != settings.embedding_dimension:
+        raise ValueError(
+            f"Snapshot dimension {manifest['dimension']} does not match "
+            f"configured embedding_dimension {settings.embedding_dimension}"
+        )
+    if manifest['embedding_model'] != settings.embedding_model:
+        logger.warning(
+            f"Snapshot was built with {manifest['embedding_model']}, "
+            f"backend is configured for {settings.embedding_model}"
+        )
+
+    db = IRISVectorDB()
+
+    try:
+        logger.info("Connecting to InterSystems IRIS...")
+        db.connect()
+
+        logger.info("Setting up database schema...")
+        db.create_vector_table()
+        db.create_document_table()
+
+        existing = db.get_chunk_count()
+        if existing:
+            logger.warning(f"Table already contains {existing} chunks; snapshot rows will be appended")
+
+        chunks = snapshot.iter_chunk_dicts()
+        inserted = 0
+        document_chunks = []
+        while True:
+            batch = list(islice(chunks, batch_size))
+            if not batch:
+                break
+            db.insert_chunks(batch)
+            inserted += len(batch)
+            document_chunks.extend(
+                {key: chunk[key] for key in ('document_name', 'document_type', 'department', 'embedding')}
+                for chunk in batch
+            )
+            logger.info(f"Inserted {inserted}/{len(snapshot)} chunks")
+
+        logger.info("Computing document vectors...")
+        db.insert_documents(compute_document_vectors(document_chunks))
+
+        logger.info("Creating HNSW index...")
+        db.create_vector_index()
+        db.create_document_index()
+
+        logger.info(f"✓ Snapshot {manifest['version']} loaded! Total chunks in database: {db.get_chunk_count()}")
+
+    except Exception as e:
+        logger.error(f"Error loading snapshot: {e}")
+        raise
+
+    finally:
+        snapshot.close()
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a vector snapshot into IRIS")
+    parser.add_argument("--snapshot-dir", default=get_settings().snapshot_dir,
+                        help="Snapshot root directory (default from config)")
+    parser.add_argument("--version", default=None,
+                        help="Snapshot version to load (default: CURRENT)")
+    args = parser.parse_args()
+
+    load_snapshot(args.snapshot_dir, args.version)
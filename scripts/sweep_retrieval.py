@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Script to sweep retrieval parameters on a labeled query set.
+
+Re-chunks the documents in raw_data/ for every chunk size/overlap pair,
+embeds chunks and queries once (cached in SQLite, so later sweeps run
+offline), and evaluates every combination of top_k, embedding dimension,
+minimum score and filter strategy with exact in-memory cosine search.
+Reports document recall@k, MRR, search latency and context prompt tokens.
+
+Smaller dimensions are obtained by truncating and re-normalising the full
+text-embedding-3 vectors, which is what the API's `dimensions` parameter
+does, so one cached embedding serves the whole dimension sweep.
+
+Filter strategies (need --user-id, otherwise only "none" is evaluated):
+    none       no access control, upper bound on recall
+    pre        search only chunks of allowed documents (IRIS WHERE ... IN)
+    post       search everything, then drop disallowed chunks
+    two_stage  pick the closest allowed documents by centroid, then their chunks
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import itertools
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from ingestion.parsers import parse_document
+from ingestion.chunker import TextChunker
+from ingestion.embedder import EmbeddingGenerator, compute_document_vectors
+from ingestion.tokens import count_tokens
+from rag.context import format_chunk_header, CHUNK_SEPARATOR
+from config import get_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_QUERY_SET = Path(__file__).parent / "eval_data" / "retrieval_queries.json"
+DEFAULT_CACHE = PROJECT_ROOT / "eval_cache" / "embeddings.sqlite"
+FILTER_STRATEGIES = ("none", "pre", "post", "two_stage")
+POST_FILTER_OVERFETCH = 3
+
+
+def find_documents(base_path: str) -> list:
+    """Supported documents under base_path, as in ingest_data.py."""
+    documents = []
+    for ext in ['*.docx', '*.doc', '*.xlsx']:
+        documents.extend(Path(base_path).rglob(ext))
+    return sorted(documents)
+
+
+class EmbeddingCache:
+    """Full-dimension embeddings keyed by model and text hash."""
+
+    def __init__(self, path: str, model: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (model TEXT, text_hash TEXT, vector BLOB, PRIMARY KEY (model, text_hash))"
+        )
+        self.model = model
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: list) -> dict:
+        found = {}
+        keys = {self._key(text): text for text in texts}
+        key_list = list(keys)
+        for i in range(0, len(key_list), 500):
+            batch = key_list[i:i + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self.conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model] + batch
+            )
+            for text_hash, blob in rows:
+                found[keys[text_hash]] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, texts: list, vectors: list):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+            [(self.model, self._key(text), np.asarray(vector, dtype=np.float32).tobytes())
+             for text, vector in zip(texts, vectors)]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def embed_texts(texts: list, cache: EmbeddingCache, offline: bool) -> np.ndarray:
+    """Embeddings for texts, calling the API only for cache misses."""
+    found = cache.get_many(texts)
+    missing = list(dict.fromkeys(text for text in texts if text not in found))
+    if missing:
+        if offline:
+            raise RuntimeError(f"{len(missing)} texts are not in the embedding cache (remove --offline to embed them)")
+        logger.warning(f"Embedding {len(missing)} uncached texts")
+        vectors = EmbeddingGenerator().generate_embeddings_batch(missing)
+        cache.put_many(missing, vectors)
+        found.update({text: np.asarray(vector, dtype=np.float32) for text, vector in zip(missing, vectors)})
+    return np.vstack([found[text] for text in texts])
+
+
+def build_chunks(parsed_documents: list, chunk_size: int, overlap: int) -> list:
+    """Chunk parsed documents the way ingest_data.py does."""
+    chunker = TextChunker(chunk_size=chunk_size, overlap=overlap)
+    chunks = []
+    for parsed_doc in parsed_documents:
+        if parsed_doc['document_type'] == 'xlsx':
+            chunks.extend(chunker.chunk_structured_data(parsed_doc))
+        else:
+            chunks.extend(chunker.create_chunks_with_metadata(parsed_doc))
+    return chunks
+
+
+def truncate(matrix: np.ndarray, dimension: int) -> np.ndarray:
+    """Shorten embeddings to `dimension` and L2-normalise the rows."""
+    shortened = matrix[:, :dimension]
+    norms = np.linalg.norm(shortened, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return shortened / norms
+
+
+def top_rows(scores: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best-scoring candidate rows, best first."""
+    if len(candidates) == 0:
+        return candidates
+    candidate_scores = scores[candidates]
+    k = min(k, len(candidates))
+    best = np.argpartition(-candidate_scores, k - 1)[:k]
+    return candidates[best[np.argsort(-candidate_scores[best])]]
+
+
+def search(strategy: str, query: np.ndarray, index: dict, top_k: int, min_score: float,
+           allowed_mask: np.ndarray, prefilter_documents: int) -> list:
+    """(chunk index, score) pairs returned by one filter strategy."""
+    scores = index['chunk_vectors'] @ query
+    all_rows = np.arange(len(scores))
+
+    if strategy == "none":
+        rows = top_rows(scores, all_rows, top_k)
+    elif strategy == "pre":
+        rows = top_rows(scores, all_rows[allowed_mask], top_k)
+    elif strategy == "post":
+        rows = top_rows(scores, all_rows, top_k * POST_FILTER_OVERFETCH)
+        rows = rows[allowed_mask[rows]][:top_k]
+    elif strategy == "two_stage":
+        document_scores = index['document_vectors'] @ query
+        allowed_documents = np.flatnonzero(index['document_allowed'])
+        selected = top_rows(document_scores, allowed_documents, prefilter_documents)
+        in_selected = np.isin(index['chunk_document'], selected)
+        rows = top_rows(scores, all_rows[in_selected], top_k)
+    else:
+        raise ValueError(f"Unknown filter strategy {strategy}")
+
+    return [(int(row), float(scores[row])) for row in rows if scores[row] >= min_score]
+
+
+def reciprocal_rank(documents: list, expected_documents: set) -> float:
+    for rank, document in enumerate(documents, 1):
+        if document in expected_documents:
+            return 1.0 / rank
+    return 0.0
+
+
+def context_tokens(chunks: list) -> int:
+    """Prompt tokens the retrieved chunks would take in the context message."""
+    if not chunks:
+        return 0
+    return count_tokens(CHUNK_SEPARATOR.join(
+        format_chunk_header(idx, chunk) + chunk['chunk_text'] for idx, chunk in enumerate(chunks, 1)
+    ))
+
+
+def parse_pairs(value: str) -> list:
+    """"500:100,700:100" -> [(500, 100), (700, 100)]"""
+    return [tuple(int(part) for part in pair.split(':')) for pair in value.split(',')]
+
+
+def parse_list(cast):
+    return lambda value: [cast(part) for part in value.split(',')]
+
+
+def sweep(args):
+    settings = get_settings()
+    with open(args.queries, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+
+    allowed_files = None
+    filters = args.filters
+    if args.user_id is not None:
+        users_config = settings.users_config
+        allowed_files = set(users_config.get_allowed_files_for_user(users_config.users[str(args.user_id)]))
+    elif filters != ["none"]:
+        logger.warning("No --user-id given, evaluating filter strategy 'none' only")
+        filters = ["none"]
+
+    documents = find_documents(args.raw_data)
+    if not documents:
+        raise SystemExit(f"No documents found in {args.raw_data}")
+    parsed_documents = [parse_document(str(path)) for path in documents]
+
+    cache = EmbeddingCache(args.cache, settings.embedding_model)
+    results = []
+    try:
+        query_matrix = embed_texts([item['query'] for item in queries], cache, args.offline)
+
+        for chunk_size, overlap in args.chunking:
+            chunks = build_chunks(parsed_documents, chunk_size, overlap)
+            chunk_matrix = embed_texts([chunk['chunk_text'] for chunk in chunks], cache, args.offline)
+            document_names = [chunk['document_name'] for chunk in chunks]
+            allowed_mask = np.array([allowed_files is None or name in allowed_files for name in document_names])
+
+            for dimension in args.dimensions:
+                vectors = truncate(chunk_matrix, dimension)
+                for chunk, vector in zip(chunks, vectors):
+                    chunk['embedding'] = vector
+                document_rows = compute_document_vectors(chunks)
+                document_position = {doc['document_name']: i for i, doc in enumerate(document_rows)}
+                index = {
+                    'chunk_vectors': np.ascontiguousarray(vectors, dtype=np.float32),
+                    'chunk_document': np.array([document_position[name] for name in document_names]),
+                    'document_vectors': np.vstack([doc['embedding'] for doc in document_rows]).astype(np.float32),
+                    'document_allowed': np.array([allowed_files is None or doc['document_name'] in allowed_files
+                                                  for doc in document_rows]),
+                }
+                query_vectors = truncate(query_matrix, dimension).astype(np.float32)
+
+                for strategy, top_k, min_score in itertools.product(filters, args.top_k, args.min_scores):
+                    recalls, reciprocal_ranks, latencies, tokens = [], [], [], []
+                    for item, query in zip(queries, query_vectors):
+                        expected = set(item['expected_documents'])
+                        if strategy != "none" and allowed_files is not None:
+                            expected &= allowed_files
+                            if not expected:
+                                continue
+                        start = time.perf_counter()
+                        rows = search(strategy, query, index, top_k, min_score, allowed_mask, args.prefilter_documents)
+                        latencies.append(time.perf_counter() - start)
+
+                        retrieved = [document_names[row] for row, _ in rows]
+                        recalls.append(len(set(retrieved) & expected) / len(expected) if expected else 1.0)
+                        reciprocal_ranks.append(reciprocal_rank(retrieved, expected))
+                        tokens.append(context_tokens([{**chunks[row], 'relevance_score': score} for row, score in rows]))
+
+                    if not latencies:
+                        continue
+                    latencies_ms = np.array(latencies) * 1000
+                    results.append({
+                        'chunk_size': chunk_size,
+                        'overlap': overlap,
+                        'chunks': len(chunks),
+                        'dimension': dimension,
+                        'filter': strategy,
+                        'top_k': top_k,
+                        'min_score': min_score,
+                        'queries': len(latencies),
+                        'recall': round(float(np.mean(recalls)), 4),
+                        'mrr': round(float(np.mean(reciprocal_ranks)), 4),
+                        'latency_p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+                        'latency_p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+                        'prompt_tokens_mean': round(float(np.mean(tokens)), 1),
+                    })
+    finally:
+        cache.close()
+
+    print(f"{'chunking':<10}{'dim':>6}{'filter':>11}{'k':>4}{'min':>6}{'recall':>8}{'MRR':>7}{'p50 ms':>9}{'p95 ms':>9}{'tokens':>8}")
+    for row in results:
+        print(f"{row['chunk_size']}:{row['overlap']:<{9 - len(str(row['chunk_size']))}}{row['dimension']:>6}"
+              f"{row['filter']:>11}{row['top_k']:>4}{row['min_score']:>6.2f}{row['recall']:>8.3f}{row['mrr']:>7.3f}"
+              f"{row['latency_p50_ms']:>9.2f}{row['latency_p95_ms']:>9.2f}{row['prompt_tokens_mean']:>8.0f}")
+
+    if args.output:
+        report = {
+            'embedding_model': settings.embedding_model,
+            'user_id': args.user_id,
+            'queries': len(queries),
+            'search': 'exact in-memory cosine (latency excludes IRIS/HNSW)',
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Sweep retrieval parameters against a labeled query set")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Labeled query set (JSON)")
+    parser.add_argument("--raw-data", default=settings.raw_data_dir, help="Directory with source documents")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE), help="SQLite embedding cache")
+    parser.add_argument("--offline", action="store_true", help="Fail instead of calling the embedding API on cache misses")
+    parser.add_argument("--top-k", type=parse_list(int), default=[5, settings.top_k_results, 20])
+    parser.add_argument("--chunking", type=parse_pairs, default=[(500, 100), (settings.chunk_size, settings.chunk_overlap), (1000, 150)],
+                        help="chunk_size:overlap pairs, e.g. 500:100,700:100")
+    parser.add_argument("--dimensions", type=parse_list(int), default=[256, 1024, settings.embedding_dimension])
+    parser.add_argument("--min-scores", type=parse_list(float), default=[settings.min_relevance_score])
+    parser.add_argument("--filters", type=parse_list(str), default=list(FILTER_STRATEGIES),
+                        help=f"Comma-separated subset of {', '.join(FILTER_STRATEGIES)}")
+    parser.add_argument("--user-id", default=None, help="Apply this user's file access for filter strategies")
+    parser.add_argument("--prefilter-documents", type=int, default=settings.prefilter_documents)
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    unknown = set(args.filters) - set(FILTER_STRATEGIES)
+    if unknown:
+        parser.error(f"Unknown filter strategies: {', '.join(sorted(unknown))}")
+
+    sweep(args)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Script to render a request trace as a text waterfall.
+
+Reads the JSONL span export written by backend/tracing.py and prints the
+spans of one trace as an indented tree with start offsets, durations and
+attributes. The trace id is returned by /chat as ``trace_id``.
+"""
+
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+# Default of Settings.trace_file; override with --file
+DEFAULT_TRACE_FILE = Path(__file__).parent.parent / "traces" / "traces.jsonl"
+BAR_WIDTH = 40
+HIDDEN_ATTRIBUTES = {'error'}
+
+
+def load_spans(trace_file: str, trace_id: str = None) -> list:
+    """
+    Load the spans of one trace.
+
+    Args:
+        trace_file: JSONL span export
+        trace_id: Trace id or unique prefix (default: most recent trace)
+
+    Returns:
+        List of span dicts
+    """
+    spans_by_trace = defaultdict(list)
+    order = []
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            span = json.loads(line)
+            if span['traceId'] not in spans_by_trace:
+                order.append(span['traceId'])
+            spans_by_trace[span['traceId']].append(span)
+
+    if not order:
+        raise SystemExit(f"No traces in {trace_file}")
+
+    if trace_id is None:
+        return spans_by_trace[order[-1]]
+
+    matches = [tid for tid in order if tid.startswith(trace_id)]
+    if not matches:
+        raise SystemExit(f"Trace {trace_id} not found in {trace_file}")
+    if len(matches) > 1:
+        raise SystemExit(f"Trace prefix {trace_id} is ambiguous: {', '.join(matches[:5])}")
+    return spans_by_trace[matches[0]]
+
+
+def format_attributes(attributes: dict) -> str:
+    return " ".join(f"{key}={value}" for key, value in attributes.items()
+                    if key not in HIDDEN_ATTRIBUTES and value is not None)
+
+
+def render(spans: list):
+    """Print spans as an indented waterfall."""
+    children = defaultdict(list)
+    for span in spans:
+        children[span['parentSpanId']].append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda span: span['startTimeUnixNano'])
+
+    root = children[None][0]
+    trace_start = root['startTimeUnixNano']
+    total = max(root['endTimeUnixNano'] - trace_start, 1)
+
+    print(f"Trace {root['traceId']}  total {total / 1e6:.1f} ms  ({len(spans)} spans)")
+
+    def walk(span, depth):
+        offset = span['startTimeUnixNano'] - trace_start
+        duration = (span['endTimeUnixNano'] or span['startTimeUnixNano']) - span['startTimeUnixNano']
+        bar_start = int(offset / total * BAR_WIDTH)
+        bar_length = max(1, int(duration / total * BAR_WIDTH))
+        bar = " " * bar_start + "█" * min(bar_length, BAR_WIDTH - bar_start)
+
+        label = ("  " * depth + span['name'])[:32]
+        status = " ERROR" if span['status'] != "OK" else ""
+        print(f"{label:<32} {offset / 1e6:>8.1f} {duration / 1e6:>8.1f} ms |{bar:<{BAR_WIDTH}}|"
+              f"{status} {format_attributes(span['attributes'])}")
+        if span['status'] != "OK" and span['attributes'].get('error'):
+            print(f"{'':<32} {span['attributes']['error']}")
+
+        for child in children[span['spanId']]:
+            walk(child, depth + 1)
+
+    print(f"{'span':<32} {'start':>8} {'dur':>8}")
+    walk(root, 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a request trace as a waterfall")
+    parser.add_argument("trace_id", nargs="?", default=None, help="Trace id or prefix (default: last trace)")
+    parser.add_argument("--file", default=str(DEFAULT_TRACE_FILE), help="JSONL span export")
+    args = parser.parse_args()
+
+    render(load_spans(args.file, args.trace_id))